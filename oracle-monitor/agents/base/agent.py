@@ -4,11 +4,12 @@ import os
 import logging
 import json
 import threading
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime, timezone
 from abc import ABC, abstractmethod
 from kafka import KafkaConsumer, KafkaProducer
 from kafka.errors import KafkaError
+from agents.base.heartbeat import HeartbeatCoalescer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,6 +20,14 @@ class BaseAgent(ABC):
         self.deployment_name = f"{name}-deployment"
         self.api_url = os.getenv("AGENT_API_URL", api_url)
         self.running = False # Start false, set true in run
+        # Keep-alive connection to the API for registration and heartbeats
+        self.session = requests.Session()
+        # "batch" coalesces heartbeats of all agents in this process; "single" posts a full payload per agent
+        self.heartbeat_mode = os.getenv("AGENT_HEARTBEAT_MODE", "batch")
+        self.heartbeat_interval = float(os.getenv("AGENT_HEARTBEAT_INTERVAL_SECONDS", "30"))
+        self.coalescer = None
+        # task_id -> ISO time it started; reported as "activity" with each heartbeat
+        self.active_tasks: Dict[str, str] = {}
         
         # Kafka Config
         self.kafka_bootstrap_servers = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "kafka:9092")
@@ -46,9 +55,11 @@ class BaseAgent(ABC):
                 logger.error(f"Failed to connect to Kafka Producer: {e}. Retrying in 5s...")
                 time.sleep(5)
 
-    def register(self):
-        """Register with retry logic."""
+    def register(self, max_attempts: Optional[int] = None) -> bool:
+        """Register with retry logic; gives up after `max_attempts` tries if set. True once registered."""
+        attempt = 0
         while not self._shutdown_event.is_set():
+            attempt += 1
             try:
                 payload = {
                     "name": self.name,
@@ -57,15 +68,18 @@ class BaseAgent(ABC):
                     "models": [],
                     "updated_at": datetime.now(timezone.utc).isoformat()
                 }
-                response = requests.post(f"{self.api_url}/agents/register", json=payload, timeout=5)
+                response = self.session.post(f"{self.api_url}/agents/register", json=payload, timeout=5)
                 if response.status_code == 200:
                     logger.info(f"Agent {self.name} registered successfully.")
-                    return
+                    return True
                 else:
                     logger.warning(f"Registration failed: {response.status_code}. Retrying in 5s...")
             except Exception as e:
                 logger.error(f"Failed to register: {e}. Retrying in 5s...")
+            if max_attempts is not None and attempt >= max_attempts:
+                return False
             time.sleep(5)
+        return False
 
     def heartbeat(self):
         """Send heartbeat to API."""
@@ -77,15 +91,32 @@ class BaseAgent(ABC):
                 "models": [],
                 "updated_at": datetime.now(timezone.utc).isoformat()
             }
-            requests.post(f"{self.api_url}/agents/heartbeat", json=payload, timeout=2)
+            response = self.session.post(f"{self.api_url}/agents/heartbeat", json=payload, timeout=2)
+            if response.status_code == 404:
+                # The API expired us after missed heartbeats (or restarted); register again
+                self.register()
         except Exception as e:
             logger.debug(f"Heartbeat failed: {e}")
 
+    def start_task(self, task_id: str):
+        self.active_tasks[task_id] = datetime.now(timezone.utc).isoformat()
+
+    def finish_task(self, task_id: str):
+        self.active_tasks.pop(task_id, None)
+
+    def heartbeat_state(self) -> dict:
+        """Fields reported with each batched heartbeat: the deployment and the tasks between start_task and finish_task."""
+        tasks = [
+            {"id": task_id, "status": "running", "started_on": started_on}
+            for task_id, started_on in sorted(dict(self.active_tasks).items())
+        ]
+        return {"deployment_name": self.deployment_name, "activity": {"active_task_ids": tasks}}
+
     def _heartbeat_loop(self):
         """Background heartbeat thread."""
         while self.running:
             self.heartbeat()
-            time.sleep(30)
+            time.sleep(self.heartbeat_interval)
 
     def _consume_tasks(self):
         """Consume tasks from Kafka (optional for agents that need it)."""
@@ -148,9 +179,13 @@ class BaseAgent(ABC):
         self.register()
         self.running = True
         
-        # Start heartbeat thread
-        heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
-        heartbeat_thread.start()
+        if self.heartbeat_mode == "batch":
+            self.coalescer = HeartbeatCoalescer.shared(self.api_url, self.heartbeat_interval)
+            self.coalescer.add(self)
+        else:
+            # Start heartbeat thread
+            heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+            heartbeat_thread.start()
         
         try:
             self.run()
@@ -158,6 +193,8 @@ class BaseAgent(ABC):
             logger.info(f"Agent {self.name} stopping...")
         finally:
             self.running = False
+            if self.coalescer:
+                self.coalescer.remove(self)
             if self.producer:
                 self.producer.close()
             if self.consumer:
@@ -0,0 +1,129 @@
+import logging
+import queue
+import threading
+from typing import Any, Dict, Optional, Set
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+class HeartbeatCoalescer:
+    """
+    Sends the heartbeats of every agent in this process as one request to
+    /agents/heartbeat/batch per interval, over one keep-alive session.
+
+    Each heartbeat carries the agent's name plus only the fields of
+    `heartbeat_state()` that changed since the API last acknowledged them, so a
+    steady agent costs a few bytes. Agents the API reports as unknown (expired
+    or restarted) are registered again on a separate thread, `register_attempts`
+    tries at a time, so a slow API never holds up the other agents' heartbeats;
+    they send their full state next time.
+    """
+
+    _shared: Dict[str, "HeartbeatCoalescer"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, api_url: str, interval_seconds: float = 30.0, session: Optional[requests.Session] = None,
+                 register_attempts: int = 3):
+        self.api_url = api_url
+        self.interval_seconds = interval_seconds
+        self.register_attempts = register_attempts
+        self.session = session or requests.Session()
+        self._agents: Dict[str, Any] = {}
+        # name -> fields the API has acknowledged
+        self._acked: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Agents waiting to register again; a name is queued at most once
+        self._registrations: "queue.Queue[Any]" = queue.Queue()
+        self._registering: Set[str] = set()
+        self._register_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def shared(cls, api_url: str, interval_seconds: float = 30.0) -> "HeartbeatCoalescer":
+        """The coalescer every agent in this process uses for `api_url`."""
+        with cls._shared_lock:
+            coalescer = cls._shared.get(api_url)
+            if coalescer is None:
+                coalescer = cls._shared[api_url] = cls(api_url, interval_seconds)
+            return coalescer
+
+    def add(self, agent):
+        with self._lock:
+            self._agents[agent.name] = agent
+            self._acked.pop(agent.name, None)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="heartbeats", daemon=True)
+                self._thread.start()
+
+    def remove(self, agent):
+        with self._lock:
+            self._agents.pop(agent.name, None)
+            self._acked.pop(agent.name, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            agents = dict(self._agents)
+            acked = {name: dict(fields) for name, fields in self._acked.items()}
+
+        beats, states = [], {}
+        for name, agent in agents.items():
+            state = agent.heartbeat_state()
+            last = acked.get(name, {})
+            beats.append({"name": name, **{k: v for k, v in state.items() if last.get(k) != v}})
+            states[name] = state
+        if not beats:
+            return
+
+        try:
+            response = self.session.post(f"{self.api_url}/agents/heartbeat/batch", json={"heartbeats": beats}, timeout=5)
+            response.raise_for_status()
+            unknown = set(response.json().get("unknown", []))
+        except Exception as e:
+            # Nothing acknowledged: the same changes are sent again next time
+            logger.debug(f"Heartbeat batch failed: {e}")
+            return
+
+        with self._lock:
+            for name, state in states.items():
+                if name in unknown:
+                    self._acked.pop(name, None)
+                elif name in self._agents:
+                    self._acked[name] = state
+        for name in unknown:
+            if name in agents:
+                self._reregister(agents[name])
+
+    def _reregister(self, agent):
+        with self._lock:
+            if agent.name in self._registering:
+                return
+            self._registering.add(agent.name)
+            if self._register_thread is None:
+                self._register_thread = threading.Thread(target=self._run_registrations, name="registrations",
+                                                         daemon=True)
+                self._register_thread.start()
+        self._registrations.put(agent)
+
+    def _run_registrations(self):
+        while True:
+            agent = self._registrations.get()
+            if agent is None:
+                return
+            try:
+                # Still unregistered after these attempts: the next batch reports it unknown and queues it again
+                agent.register(max_attempts=self.register_attempts)
+            except Exception as e:
+                logger.warning(f"Registering {agent.name} again failed: {e}")
+            finally:
+                with self._lock:
+                    self._registering.discard(agent.name)
+
+    def stop(self):
+        self._stop.set()
+        self._registrations.put(None)
@@ -10,6 +10,7 @@ class ResearchAgent(BaseAgent):
         while self.running:
             task_counter += 1
             task_id = f"research-{task_counter:04d}"
+            self.start_task(task_id)
             
             # Phase 1: Initialization
             self.publish_log(
@@ -91,6 +92,8 @@ class ResearchAgent(BaseAgent):
                 task_id=task_id
             )
             
+            self.finish_task(task_id)
+            
             # Short pause before next cycle
             time.sleep(2.0)
 
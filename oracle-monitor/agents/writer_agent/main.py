@@ -10,6 +10,7 @@ class WriterAgent(BaseAgent):
         while self.running:
             report_counter += 1
             task_id = f"writer-{report_counter:04d}"
+            self.start_task(task_id)
             
             # Phase 1: Start
             self.publish_log(
@@ -78,6 +79,8 @@ class WriterAgent(BaseAgent):
                 task_id=task_id
             )
             
+            self.finish_task(task_id)
+            
             # Pause before next report
             time.sleep(2.5)
 
@@ -8,5 +8,40 @@ class Settings:
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    # The latest snapshot is cached in memory; Realtime inserts into system_snapshots drop it early
+    SNAPSHOT_CACHE_TTL_SECONDS = float(os.getenv("SNAPSHOT_CACHE_TTL_SECONDS", "5"))
+    SNAPSHOT_CACHE_REALTIME = os.getenv("SNAPSHOT_CACHE_REALTIME", "true").lower() == "true"
+    SNAPSHOT_CACHE_REALTIME_TTL_SECONDS = float(os.getenv("SNAPSHOT_CACHE_REALTIME_TTL_SECONDS", "60"))
+    # Task producer: "kafka" or "memory" (in-process stand-in, nothing leaves the API)
+    KAFKA_PRODUCER_BACKEND = os.getenv("KAFKA_PRODUCER_BACKEND", "kafka")
+    KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+    KAFKA_TOPIC_TASKS = os.getenv("KAFKA_TOPIC_TASKS", "agent-tasks")
+    # Records are batched per partition for up to KAFKA_LINGER_MS and each batch is compressed
+    KAFKA_LINGER_MS = int(os.getenv("KAFKA_LINGER_MS", "5"))
+    KAFKA_BATCH_BYTES = int(os.getenv("KAFKA_BATCH_BYTES", "65536"))
+    KAFKA_COMPRESSION = os.getenv("KAFKA_COMPRESSION", "gzip")
+    KAFKA_MAX_BLOCK_MS = int(os.getenv("KAFKA_MAX_BLOCK_MS", "5000"))
+    # "acked" answers after the broker acknowledged each task; "fire_and_forget" once it is buffered
+    TASK_PRODUCER_MODE = os.getenv("TASK_PRODUCER_MODE", "acked")
+    TASK_ACK_TIMEOUT_SECONDS = float(os.getenv("TASK_ACK_TIMEOUT_SECONDS", "10"))
+    # PDF reports render in this many worker processes; rendered PDFs are cached per (snapshot, newest log)
+    REPORT_RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "2"))
+    REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "16"))
+    # /reports/history covers this many days by default and aggregates into at most this many buckets
+    HISTORY_DEFAULT_DAYS = float(os.getenv("HISTORY_DEFAULT_DAYS", "7"))
+    HISTORY_MAX_BUCKETS = int(os.getenv("HISTORY_MAX_BUCKETS", "1000"))
+    # Chat model: "gemini", or "fake" to stream a canned reply every CHAT_FAKE_DELAY_SECONDS per word
+    CHAT_MODEL_BACKEND = os.getenv("CHAT_MODEL_BACKEND", "gemini")
+    CHAT_MODEL = os.getenv("CHAT_MODEL", "gemini-2.5-flash")
+    CHAT_FAKE_DELAY_SECONDS = float(os.getenv("CHAT_FAKE_DELAY_SECONDS", "0.05"))
+    # Chat prompts carry at most this much snapshot context; answers are cached per (content, question)
+    CHAT_CONTEXT_MAX_CHARS = int(os.getenv("CHAT_CONTEXT_MAX_CHARS", "12000"))
+    CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "256"))
+    CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "300"))
+    # "memory" keeps agents per worker process; "sqlite" shares them between workers through a WAL-mode file
+    AGENT_REGISTRY_BACKEND = os.getenv("AGENT_REGISTRY_BACKEND", "memory")
+    AGENT_REGISTRY_PATH = os.getenv("AGENT_REGISTRY_PATH", "/tmp/oracle-monitor/agents.db")
+    # Agents without a heartbeat for this long are removed (agents beat every 30s); 0 keeps them forever
+    AGENT_TTL_SECONDS = float(os.getenv("AGENT_TTL_SECONDS", "90"))
 
 settings = Settings()
@@ -0,0 +1,120 @@
+"""
+The API's data access.
+
+One `Database` lives for the whole app (see the lifespan in api/main.py). It
+owns a single async Supabase client, whose HTTP connections are pooled and
+kept alive across requests, so handlers await queries instead of blocking
+the event loop or connecting per module.
+
+`latest_snapshot()` is served from memory. The cached snapshot is dropped
+when Supabase Realtime reports an insert into system_snapshots (the
+supabase_realtime publication, migration 003). It also expires after
+SNAPSHOT_CACHE_REALTIME_TTL_SECONDS in case an event is missed, or after
+SNAPSHOT_CACHE_TTL_SECONDS while Realtime is not subscribed. Concurrent
+misses share one fetch.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from supabase import AsyncClient, acreate_client
+
+logger = logging.getLogger(__name__)
+
+class Database:
+    def __init__(self, url: str, key: str, snapshot_ttl_seconds: float = 5.0,
+                 realtime: bool = True, realtime_ttl_seconds: float = 60.0):
+        self.url = url
+        self.key = key
+        self.snapshot_ttl_seconds = snapshot_ttl_seconds
+        self.realtime = realtime
+        self.realtime_ttl_seconds = realtime_ttl_seconds
+        self.client: Optional[AsyncClient] = None
+        self.subscribed = False
+        self._channel = None
+        # (fetched at, snapshot); None when empty or invalidated
+        self._latest: Optional[tuple] = None
+        self._inflight: Optional[asyncio.Task] = None
+        # Bumped on every invalidation, so a fetch that started before it isn't cached
+        self._generation = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "Database":
+        return cls(settings.SUPABASE_URL, settings.SUPABASE_KEY, settings.SNAPSHOT_CACHE_TTL_SECONDS,
+                   settings.SNAPSHOT_CACHE_REALTIME, settings.SNAPSHOT_CACHE_REALTIME_TTL_SECONDS)
+
+    async def connect(self):
+        self.client = await acreate_client(self.url, self.key)
+        if self.realtime:
+            await self._subscribe()
+
+    async def _subscribe(self):
+        try:
+            self._channel = self.client.channel("api-latest-snapshot")
+            self._channel.on_postgres_changes("INSERT", schema="public", table="system_snapshots",
+                                              callback=lambda payload: self.invalidate())
+            await self._channel.subscribe(self._on_subscription)
+        except Exception as e:
+            logger.warning(f"Realtime unavailable, caching the latest snapshot for "
+                           f"{self.snapshot_ttl_seconds}s only: {e}")
+
+    def _on_subscription(self, status, error=None):
+        self.subscribed = getattr(status, "value", status) == "SUBSCRIBED"
+        if not self.subscribed:
+            # Events may have been missed while the channel was down
+            logger.warning(f"Realtime channel {getattr(status, 'value', status)}: {error or ''}")
+            self.invalidate()
+
+    def invalidate(self):
+        self._generation += 1
+        self._latest = None
+        self._inflight = None
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self.realtime_ttl_seconds if self.subscribed else self.snapshot_ttl_seconds
+
+    async def latest_snapshot(self) -> Optional[Dict[str, Any]]:
+        """The newest snapshot as full state, from memory while it is still current."""
+        if self._latest is not None and time.monotonic() - self._latest[0] < self.ttl_seconds:
+            return self._latest[1]
+
+        task = self._inflight
+        if task is None:
+            task = self._inflight = asyncio.ensure_future(self._fetch_latest(self._generation))
+            task.add_done_callback(self._fetched)
+        # Shielded: one caller going away doesn't cancel the fetch the others wait on
+        return await asyncio.shield(task)
+
+    def _fetched(self, task: asyncio.Task):
+        if self._inflight is task:
+            self._inflight = None
+
+    async def _fetch_latest(self, generation: int) -> Optional[Dict[str, Any]]:
+        # Resolved server-side so delta-encoded rows come back as full state
+        response = await self.client.rpc("get_latest_snapshot").execute()
+        snapshot = response.data or None
+        if generation == self._generation:
+            self._latest = (time.monotonic(), snapshot)
+        return snapshot
+
+    async def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        response = await self.client.rpc(name, params or {}).execute()
+        return response.data
+
+    def table(self, name: str):
+        """Query builder on the shared client; finish with `await ....execute()`."""
+        return self.client.table(name)
+
+    async def close(self):
+        if self._channel is not None:
+            try:
+                await self.client.remove_channel(self._channel)
+            except Exception as e:
+                logger.debug(f"Could not remove realtime channel: {e}")
+
+def get_db(request: Request) -> Database:
+    """The app-wide Database created in the lifespan."""
+    return request.app.state.db
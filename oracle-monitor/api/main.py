@@ -1,8 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware  # 1. Import Middleware
+from api.config import settings
+from api.db import Database
+from api.producer import TaskProducer
+from api.services.chat_model import create_chat_model
+from api.services.report_renderer import ReportRenderer
 from api.routes import agents, tasks, health, chat, reports
 
-app = FastAPI(title="Oracle Monitor Agent API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Supabase client for every route, with the latest snapshot cached in memory
+    app.state.db = Database.from_settings(settings)
+    await app.state.db.connect()
+    # One Kafka producer for the app's lifetime; it connects on the first task
+    app.state.task_producer = TaskProducer.from_settings(settings)
+    app.state.report_renderer = ReportRenderer(settings.REPORT_RENDER_WORKERS, settings.REPORT_CACHE_SIZE)
+    app.state.chat_model = create_chat_model(settings)
+    yield
+    await app.state.task_producer.close()
+    app.state.report_renderer.shutdown()
+    await app.state.db.close()
+
+app = FastAPI(title="Oracle Monitor Agent API", lifespan=lifespan)
 
 # 2. Configure CORS
 # Replace with your actual frontend URL(s) for better security in production
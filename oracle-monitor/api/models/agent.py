@@ -15,3 +15,24 @@ class AgentRegistration(BaseModel):
     name: str
     deployment_name: str
     activity: AgentActivity = AgentActivity()
+
+class AgentChanges(BaseModel):
+    epoch: str
+    version: int
+    full: bool
+    upserts: List[AgentRegistration] = []
+    removed: List[str] = []
+
+class AgentHeartbeat(BaseModel):
+    """A heartbeat for a registered agent; only fields that changed since the last one are set."""
+    name: str
+    deployment_name: Optional[str] = None
+    activity: Optional[AgentActivity] = None
+
+class HeartbeatBatch(BaseModel):
+    heartbeats: List[AgentHeartbeat]
+
+class HeartbeatBatchResult(BaseModel):
+    updated: int
+    # Agents the API doesn't know (expired or never registered); they should register again
+    unknown: List[str] = []
@@ -1,7 +1,23 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class Task(BaseModel):
     id: str
     description: str
     priority: str = "medium"
+
+class TaskBatch(BaseModel):
+    tasks: List[Task]
+
+class TaskResult(BaseModel):
+    task_id: str
+    # task_queued (acked), task_accepted (fire-and-forget), failed or unconfirmed
+    status: str
+    partition: Optional[int] = None
+    offset: Optional[int] = None
+    error: Optional[str] = None
+
+class TaskBatchResult(BaseModel):
+    queued: int
+    failed: int
+    results: List[TaskResult]
@@ -0,0 +1,215 @@
+"""
+The API's Kafka producer for agent tasks.
+
+One `TaskProducer` lives for the whole app (see the lifespan in api/main.py).
+It wraps a single kafka-python KafkaProducer, which batches records per
+partition (linger_ms) and compresses each batch. `send()` can block on
+metadata or a full buffer, so calls run on a dedicated thread, and broker
+acks are handed back to the event loop as asyncio futures. The event loop
+itself never waits on Kafka I/O.
+
+In "acked" mode callers get the partition and offset of every task, or an
+error. In "fire_and_forget" mode they get an answer as soon as the tasks are
+in the producer's buffer; delivery failures are only logged.
+
+`InMemoryProducer` stands in for Kafka (KAFKA_PRODUCER_BACKEND=memory) in
+local runs and tests.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+class RecordMetadata(NamedTuple):
+    topic: str
+    partition: int
+    offset: int
+
+class _DoneFuture:
+    """Minimal kafka-python style future whose outcome is known at send time."""
+
+    def __init__(self, value=None, exception: Optional[Exception] = None):
+        self.value = value
+        self.exception = exception
+
+    def add_callback(self, fn):
+        if self.exception is None:
+            fn(self.value)
+        return self
+
+    def add_errback(self, fn):
+        if self.exception is not None:
+            fn(self.exception)
+        return self
+
+class InMemoryProducer:
+    """In-process stand-in for KafkaProducer: keeps records per partition and acks immediately."""
+
+    def __init__(self, partitions: int = 3):
+        self.partitions = partitions
+        self.records: Dict[str, Dict[int, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+        # Set to an exception to make every send fail, e.g. to exercise error paths
+        self.error: Optional[Exception] = None
+        self._lock = threading.Lock()
+
+    def send(self, topic: str, value: Any = None, key: Optional[bytes] = None):
+        if self.error is not None:
+            return _DoneFuture(exception=self.error)
+        partition = (sum(key) if key else 0) % self.partitions
+        with self._lock:
+            log = self.records[topic][partition]
+            log.append({"key": key, "value": value})
+            return _DoneFuture(RecordMetadata(topic, partition, len(log) - 1))
+
+    def flush(self, timeout=None):
+        pass
+
+    def close(self, timeout=None):
+        pass
+
+def _resolve(future: asyncio.Future, value=None, exception: Optional[BaseException] = None):
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(value)
+
+class TaskProducer:
+    # After a failed connect, fail sends immediately for this long instead of reconnecting per request
+    RECONNECT_SECONDS = 5.0
+
+    def __init__(self, create_producer, topic: str, mode: str = "acked", ack_timeout_seconds: float = 10.0):
+        # Called on the producer thread, so a slow or absent broker never blocks startup
+        self._create_producer = create_producer
+        self.topic = topic
+        self.mode = mode
+        self.ack_timeout_seconds = ack_timeout_seconds
+        self._producer = None
+        self._retry_at = 0.0
+        # One thread: sends keep their order and the KafkaProducer is only created once
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-producer")
+
+    @classmethod
+    def from_settings(cls, settings) -> "TaskProducer":
+        if settings.KAFKA_PRODUCER_BACKEND == "memory":
+            fake = InMemoryProducer()
+            return cls(lambda: fake, settings.KAFKA_TOPIC_TASKS, settings.TASK_PRODUCER_MODE,
+                       settings.TASK_ACK_TIMEOUT_SECONDS)
+
+        def create():
+            from kafka import KafkaProducer
+            return KafkaProducer(
+                bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+                acks="all",
+                retries=3,
+                linger_ms=settings.KAFKA_LINGER_MS,
+                batch_size=settings.KAFKA_BATCH_BYTES,
+                compression_type=settings.KAFKA_COMPRESSION,
+                max_block_ms=settings.KAFKA_MAX_BLOCK_MS,
+            )
+
+        return cls(create, settings.KAFKA_TOPIC_TASKS, settings.TASK_PRODUCER_MODE,
+                   settings.TASK_ACK_TIMEOUT_SECONDS)
+
+    @property
+    def producer(self):
+        """The underlying producer, once created."""
+        return self._producer
+
+    def _send_all(self, records: List[Dict[str, Any]], loop: asyncio.AbstractEventLoop,
+                  futures: List[asyncio.Future]):
+        """Producer thread: hand records to the KafkaProducer and route each ack to its asyncio future."""
+        try:
+            if self._producer is None:
+                if time.monotonic() < self._retry_at:
+                    raise ConnectionError("Kafka unavailable, not retrying yet")
+                try:
+                    self._producer = self._create_producer()
+                except Exception:
+                    self._retry_at = time.monotonic() + self.RECONNECT_SECONDS
+                    raise
+        except Exception as e:
+            logger.error(f"Could not connect task producer to Kafka: {e}")
+            for future in futures:
+                loop.call_soon_threadsafe(_resolve, future, None, e)
+            return
+
+        for record, future in zip(records, futures):
+            try:
+                sent = self._producer.send(self.topic, value=record, key=str(record["id"]).encode("utf-8"))
+            except Exception as e:
+                loop.call_soon_threadsafe(_resolve, future, None, e)
+                continue
+            sent.add_callback(lambda metadata, f=future: loop.call_soon_threadsafe(_resolve, f, metadata))
+            sent.add_errback(lambda e, f=future: loop.call_soon_threadsafe(_resolve, f, None, e))
+
+    async def send_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enqueue records (each with an "id") and return one result per record, in order."""
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in records]
+        deadline = loop.time() + self.ack_timeout_seconds
+        handoff = loop.run_in_executor(self._executor, self._send_all, records, loop, futures)
+        try:
+            # A stuck connect or full buffer can hold the producer thread; don't hold the request longer
+            await asyncio.wait_for(asyncio.shield(handoff), self.ack_timeout_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+        if self.mode == "fire_and_forget":
+            # Let callbacks for errors raised at send time run before answering
+            await asyncio.sleep(0)
+            results = []
+            for record, future in zip(records, futures):
+                if future.done() and future.exception() is not None:
+                    results.append({"task_id": record["id"], "status": "failed", "error": str(future.exception())})
+                elif not handoff.done():
+                    future.add_done_callback(self._log_failure)
+                    results.append({"task_id": record["id"], "status": "unconfirmed",
+                                    "error": "producer busy, task not yet buffered"})
+                else:
+                    future.add_done_callback(self._log_failure)
+                    results.append({"task_id": record["id"], "status": "task_accepted"})
+            return results
+
+        if futures:
+            await asyncio.wait(futures, timeout=max(0.0, deadline - loop.time()))
+        results = []
+        for record, future in zip(records, futures):
+            if not future.done():
+                future.add_done_callback(self._log_failure)
+                results.append({"task_id": record["id"], "status": "unconfirmed",
+                                "error": f"no broker ack within {self.ack_timeout_seconds}s"})
+            elif future.exception() is not None:
+                results.append({"task_id": record["id"], "status": "failed", "error": str(future.exception())})
+            else:
+                metadata = future.result()
+                results.append({"task_id": record["id"], "status": "task_queued",
+                                "partition": metadata.partition, "offset": metadata.offset})
+        return results
+
+    async def send(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return (await self.send_many([record]))[0]
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Task delivery failed: {future.exception()}")
+
+    def _close(self):
+        if self._producer is not None:
+            self._producer.flush()
+            self._producer.close()
+
+    async def close(self):
+        """Deliver what is buffered, then release the producer and its thread."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,405 @@
+"""
+Agent registries behind /agents.
+
+Both backends version every change for /agents/changes, expire agents whose
+last heartbeat is older than `ttl_seconds`, and index agents by deployment.
+`AgentRegistry` lives in one process; `SQLiteAgentRegistry` keeps the same
+state in a WAL-mode SQLite file so every uvicorn worker on the host shares it.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set
+from api.models.agent import AgentRegistration
+
+class AgentRegistry:
+    """
+    In-process agent store that versions every change.
+
+    Each upsert or removal bumps `version` and moves the agent to the end of an
+    ordered log, so `changes_since(n)` walks back only over entries newer than n:
+    the cost is proportional to churn, not to the number of registered agents.
+    `epoch` identifies this store instance; a client holding a version from a
+    different epoch (e.g. before an API restart) gets a full resync.
+
+    Heartbeat times are kept in arrival order too, so expiry pops from the
+    front and only touches the agents that actually expired. Public methods hold
+    a lock, since the /agents handlers run on the threadpool.
+    """
+
+    def __init__(self, max_tombstones: int = 10000, ttl_seconds: Optional[float] = None):
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        self.max_tombstones = max_tombstones
+        self.ttl_seconds = ttl_seconds
+
+        self._agents: Dict[str, Dict[str, Any]] = {}
+        # name -> version of its last change, kept in version order
+        self._changed: "OrderedDict[str, int]" = OrderedDict()
+        self._removed: "OrderedDict[str, int]" = OrderedDict()
+        # Deltas are only complete for `since` >= this (older tombstones were dropped)
+        self._oldest_complete = 0
+        # name -> time of its last heartbeat, oldest first
+        self._last_seen: "OrderedDict[str, float]" = OrderedDict()
+        self._by_deployment: Dict[str, Set[str]] = defaultdict(set)
+        # Re-entrant: public methods call expire() and remove()
+        self._lock = threading.RLock()
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            self.expire()
+            return name in self._agents
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.expire()
+            return list(self._agents.values())
+
+    def by_deployment(self, deployment_name: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.expire()
+            return [self._agents[name] for name in sorted(self._by_deployment.get(deployment_name, ()))]
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Remove agents without a heartbeat in the last `ttl_seconds`; returns their names."""
+        with self._lock:
+            if not self.ttl_seconds:
+                return []
+            cutoff = (now if now is not None else time.time()) - self.ttl_seconds
+            expired = []
+            while self._last_seen:
+                name, seen = next(iter(self._last_seen.items()))
+                if seen >= cutoff:
+                    break
+                self.remove(name)
+                expired.append(name)
+            return expired
+
+    def upsert(self, agent: AgentRegistration, now: Optional[float] = None) -> bool:
+        """Store the agent and refresh its heartbeat; returns False (and keeps the version) when nothing changed."""
+        with self._lock:
+            now = now if now is not None else time.time()
+            self.expire(now)
+            self._touch(agent.name, now)
+            return self._store(agent.name, agent.model_dump(mode="json"))
+
+    def heartbeat_many(self, beats: List[Dict[str, Any]], now: Optional[float] = None) -> List[str]:
+        """
+        Apply partial heartbeats ({"name": ..., <changed fields>}) to registered agents.
+        Returns the names that are not registered; those are left alone.
+        """
+        with self._lock:
+            now = now if now is not None else time.time()
+            self.expire(now)
+            unknown = []
+            for beat in beats:
+                name = beat["name"]
+                current = self._agents.get(name)
+                if current is None:
+                    unknown.append(name)
+                    continue
+                self._touch(name, now)
+                self._store(name, {**current, **beat})
+            return unknown
+
+    def _touch(self, name: str, now: float):
+        self._last_seen[name] = now
+        self._last_seen.move_to_end(name)
+
+    def _store(self, name: str, data: Dict[str, Any]) -> bool:
+        previous = self._agents.get(name)
+        if previous == data:
+            return False
+
+        if previous is not None and previous["deployment_name"] != data["deployment_name"]:
+            self._unindex(name, previous["deployment_name"])
+        self._by_deployment[data["deployment_name"]].add(name)
+        self.version += 1
+        self._agents[name] = data
+        self._changed[name] = self.version
+        self._changed.move_to_end(name)
+        self._removed.pop(name, None)
+        return True
+
+    def _unindex(self, name: str, deployment_name: str):
+        names = self._by_deployment.get(deployment_name)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._by_deployment[deployment_name]
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            data = self._agents.pop(name, None)
+            if data is None:
+                return False
+
+            self._last_seen.pop(name, None)
+            self._unindex(name, data["deployment_name"])
+            self.version += 1
+            self._changed.pop(name, None)
+            self._removed[name] = self.version
+            if len(self._removed) > self.max_tombstones:
+                _, dropped_version = self._removed.popitem(last=False)
+                self._oldest_complete = dropped_version
+            return True
+
+    def changes_since(self, since: int, epoch: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            self.expire()
+            if epoch != self.epoch or since < self._oldest_complete or since > self.version:
+                return {
+                    "epoch": self.epoch,
+                    "version": self.version,
+                    "full": True,
+                    "upserts": self.all(),
+                    "removed": [],
+                }
+
+            upserts = []
+            for name, version in reversed(self._changed.items()):
+                if version <= since:
+                    break
+                upserts.append(self._agents[name])
+
+            removed = []
+            for name, version in reversed(self._removed.items()):
+                if version <= since:
+                    break
+                removed.append(name)
+
+            return {
+                "epoch": self.epoch,
+                "version": self.version,
+                "full": False,
+                "upserts": upserts,
+                "removed": removed,
+            }
+
+class SQLiteAgentRegistry:
+    """
+    AgentRegistry's interface and versioning, kept in a WAL-mode SQLite file.
+
+    Every uvicorn worker opens the same file. WAL lets readers proceed while one
+    worker writes, and writes run in IMMEDIATE transactions so versions are
+    assigned in order across processes. Indexes on version, last_seen and
+    deployment_name keep /changes, expiry and per-deployment lookups to range
+    scans; /status reads only the live rows.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS agents (
+            name TEXT PRIMARY KEY,
+            deployment_name TEXT NOT NULL,
+            data TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            last_seen REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS agents_version ON agents (version);
+        CREATE INDEX IF NOT EXISTS agents_last_seen ON agents (last_seen);
+        CREATE INDEX IF NOT EXISTS agents_deployment ON agents (deployment_name);
+        CREATE TABLE IF NOT EXISTS removed (name TEXT PRIMARY KEY, version INTEGER NOT NULL);
+        CREATE INDEX IF NOT EXISTS removed_version ON removed (version);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+    """
+
+    def __init__(self, path: str, max_tombstones: int = 10000, ttl_seconds: Optional[float] = None,
+                 expire_interval_seconds: float = 1.0):
+        self.max_tombstones = max_tombstones
+        self.ttl_seconds = ttl_seconds
+        # Reads sweep for expired agents at most this often per worker
+        self.expire_interval_seconds = expire_interval_seconds
+        self._next_expiry = 0.0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._conn.executescript(self.SCHEMA)
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                [("epoch", uuid.uuid4().hex), ("version", 0), ("oldest_complete", 0)],
+            )
+            self._conn.execute("COMMIT")
+
+    def _write(self, fn, *args):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(*args)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _read(self, fn, *args):
+        """Run `fn` on one consistent snapshot of the database."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                return fn(*args)
+            finally:
+                self._conn.execute("COMMIT")
+
+    def _meta(self, key: str) -> Any:
+        return self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def _bump(self) -> int:
+        return self._conn.execute(
+            "UPDATE meta SET value = value + 1 WHERE key = 'version' RETURNING value"
+        ).fetchone()[0]
+
+    @property
+    def epoch(self) -> str:
+        with self._lock:
+            return self._meta("epoch")
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self._meta("version")
+
+    def __contains__(self, name: str) -> bool:
+        self.expire()
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM agents WHERE name = ?", (name,)).fetchone() is not None
+
+    def all(self) -> List[Dict[str, Any]]:
+        self.expire()
+        with self._lock:
+            return [json.loads(data) for data, in self._conn.execute("SELECT data FROM agents ORDER BY version")]
+
+    def by_deployment(self, deployment_name: str) -> List[Dict[str, Any]]:
+        self.expire()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM agents WHERE deployment_name = ? ORDER BY name", (deployment_name,)
+            )
+            return [json.loads(data) for data, in rows]
+
+    def expire(self, now: Optional[float] = None, force: bool = False) -> List[str]:
+        """Remove agents without a heartbeat in the last `ttl_seconds`; returns their names."""
+        if not self.ttl_seconds:
+            return []
+        if not force and time.monotonic() < self._next_expiry:
+            return []
+        self._next_expiry = time.monotonic() + self.expire_interval_seconds
+        cutoff = (now if now is not None else time.time()) - self.ttl_seconds
+        with self._lock:
+            # Cheap indexed check first, so a quiet registry never takes the write lock
+            if self._conn.execute("SELECT 1 FROM agents WHERE last_seen < ? LIMIT 1", (cutoff,)).fetchone() is None:
+                return []
+        return self._write(self._expire, cutoff)
+
+    def _expire(self, cutoff: float) -> List[str]:
+        names = [name for name, in self._conn.execute("SELECT name FROM agents WHERE last_seen < ?", (cutoff,))]
+        for name in names:
+            self._remove(name)
+        return names
+
+    def upsert(self, agent: AgentRegistration, now: Optional[float] = None) -> bool:
+        """Store the agent and refresh its heartbeat; returns False (and keeps the version) when nothing changed."""
+        now = now if now is not None else time.time()
+        data = json.dumps(agent.model_dump(mode="json"), sort_keys=True)
+        self.expire(now)
+        return self._write(self._upsert, agent.name, agent.deployment_name, data, now)
+
+    def heartbeat_many(self, beats: List[Dict[str, Any]], now: Optional[float] = None) -> List[str]:
+        """
+        Apply partial heartbeats ({"name": ..., <changed fields>}) to registered agents in one
+        transaction. Returns the names that are not registered; those are left alone.
+        """
+        now = now if now is not None else time.time()
+        self.expire(now)
+        return self._write(self._heartbeat_many, beats, now)
+
+    def _heartbeat_many(self, beats: List[Dict[str, Any]], now: float) -> List[str]:
+        unknown = []
+        for beat in beats:
+            row = self._conn.execute("SELECT data FROM agents WHERE name = ?", (beat["name"],)).fetchone()
+            if row is None:
+                unknown.append(beat["name"])
+                continue
+            data = {**json.loads(row[0]), **beat}
+            self._upsert(beat["name"], data["deployment_name"], json.dumps(data, sort_keys=True), now)
+        return unknown
+
+    def _upsert(self, name: str, deployment_name: str, data: str, now: float) -> bool:
+        row = self._conn.execute("SELECT data FROM agents WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[0] == data:
+            self._conn.execute("UPDATE agents SET last_seen = ? WHERE name = ?", (now, name))
+            return False
+
+        version = self._bump()
+        self._conn.execute(
+            """
+            INSERT INTO agents (name, deployment_name, data, version, last_seen) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET deployment_name = excluded.deployment_name,
+                data = excluded.data, version = excluded.version, last_seen = excluded.last_seen
+            """,
+            (name, deployment_name, data, version, now),
+        )
+        self._conn.execute("DELETE FROM removed WHERE name = ?", (name,))
+        return True
+
+    def remove(self, name: str) -> bool:
+        return self._write(self._remove, name)
+
+    def _remove(self, name: str) -> bool:
+        if self._conn.execute("DELETE FROM agents WHERE name = ?", (name,)).rowcount == 0:
+            return False
+
+        version = self._bump()
+        self._conn.execute("INSERT OR REPLACE INTO removed (name, version) VALUES (?, ?)", (name, version))
+        excess = self._conn.execute("SELECT COUNT(*) FROM removed").fetchone()[0] - self.max_tombstones
+        if excess > 0:
+            dropped = self._conn.execute(
+                "DELETE FROM removed WHERE version IN (SELECT version FROM removed ORDER BY version LIMIT ?) "
+                "RETURNING version",
+                (excess,),
+            ).fetchall()
+            self._conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'oldest_complete'", (max(v for v, in dropped),)
+            )
+        return True
+
+    def changes_since(self, since: int, epoch: Optional[str] = None) -> Dict[str, Any]:
+        self.expire()
+        return self._read(self._changes_since, since, epoch)
+
+    def _changes_since(self, since: int, epoch: Optional[str]) -> Dict[str, Any]:
+        current_epoch, version = self._meta("epoch"), self._meta("version")
+        if epoch != current_epoch or since < self._meta("oldest_complete") or since > version:
+            rows = self._conn.execute("SELECT data FROM agents ORDER BY version")
+            return {
+                "epoch": current_epoch,
+                "version": version,
+                "full": True,
+                "upserts": [json.loads(data) for data, in rows],
+                "removed": [],
+            }
+
+        upserts = self._conn.execute("SELECT data FROM agents WHERE version > ? ORDER BY version DESC", (since,))
+        removed = self._conn.execute("SELECT name FROM removed WHERE version > ? ORDER BY version DESC", (since,))
+        return {
+            "epoch": current_epoch,
+            "version": version,
+            "full": False,
+            "upserts": [json.loads(data) for data, in upserts],
+            "removed": [name for name, in removed],
+        }
+
+def create_registry(backend: str = "memory", path: str = "", ttl_seconds: Optional[float] = None):
+    """"memory" is per process; "sqlite" shares one registry between all workers on the host."""
+    if backend == "sqlite":
+        return SQLiteAgentRegistry(path, ttl_seconds=ttl_seconds)
+    return AgentRegistry(ttl_seconds=ttl_seconds)
@@ -1,25 +1,46 @@
 from fastapi import APIRouter, HTTPException
-from api.models.agent import AgentRegistration
-from typing import List, Dict
+from api.models.agent import AgentRegistration, AgentChanges, HeartbeatBatch, HeartbeatBatchResult
+from api.config import settings
+from api.registry import create_registry
+from typing import List, Optional
 
 router = APIRouter()
 
-# In-memory store for agent status (would be Redis/DB in production)
-agent_store: Dict[str, AgentRegistration] = {}
+registry = create_registry(
+    settings.AGENT_REGISTRY_BACKEND,
+    settings.AGENT_REGISTRY_PATH,
+    ttl_seconds=settings.AGENT_TTL_SECONDS,
+)
 
+# Handlers are plain `def`: FastAPI runs them in its threadpool, so a registry call waiting on the
+# SQLite write lock (up to its 10s timeout) holds a worker thread, not the event loop
 @router.post("/register")
-async def register_agent(agent: AgentRegistration):
-    agent_store[agent.name] = agent
+def register_agent(agent: AgentRegistration):
+    registry.upsert(agent)
     return {"status": "registered", "agent": agent.name}
 
 @router.post("/heartbeat")
-async def agent_heartbeat(agent: AgentRegistration):
-    if agent.name not in agent_store:
+def agent_heartbeat(agent: AgentRegistration):
+    if agent.name not in registry:
         raise HTTPException(status_code=404, detail="Agent not registered")
     
-    agent_store[agent.name] = agent
+    registry.upsert(agent)
     return {"status": "updated"}
 
+@router.post("/heartbeat/batch", response_model=HeartbeatBatchResult)
+def agent_heartbeat_batch(batch: HeartbeatBatch):
+    """Heartbeats for many agents in one request, each carrying only its changed fields."""
+    beats = [hb.model_dump(mode="json", exclude_unset=True, exclude_none=True) for hb in batch.heartbeats]
+    unknown = registry.heartbeat_many(beats)
+    return {"updated": len(beats) - len(unknown), "unknown": unknown}
+
 @router.get("/status", response_model=List[AgentRegistration])
-async def get_agents_status():
-    return list(agent_store.values())
+def get_agents_status(deployment_name: Optional[str] = None):
+    if deployment_name:
+        return registry.by_deployment(deployment_name)
+    return registry.all()
+
+@router.get("/changes", response_model=AgentChanges)
+def get_agent_changes(since: int = 0, epoch: Optional[str] = None):
+    """Agents changed or removed after version `since`; a full list if `epoch` doesn't match."""
+    return registry.changes_since(since, epoch)
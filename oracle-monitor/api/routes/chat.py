@@ -1,33 +1,27 @@
-import os
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from supabase import create_client, Client
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv # 1. Import load_dotenv
-import json
+import logging
+import time
 
 # 2. Load the .env file immediately
 # This looks for a .env file in the current directory or parents
-load_dotenv() 
+load_dotenv()
 
 # Now import settings (which presumably reads os.environ)
 from api.config import settings
+from api.db import Database, get_db
+from api.services.chat_context import AnswerCache, build_context, content_hash
+from api.services.chat_model import sse_event, stream_events
 
-router = APIRouter()
-
-# Initialize clients
-# Ensure your config/settings actually reads from os.getenv('SUPABASE_URL')
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+logger = logging.getLogger(__name__)
 
-# Initialize the new client
-# You can now explicitly verify the key exists
-api_key = settings.GEMINI_API_KEY
-if not api_key:
-    # Fallback to os.getenv directly if settings module fails
-    api_key = os.getenv("GEMINI_API_KEY") 
+router = APIRouter()
 
-client = genai.Client(api_key=api_key)
+# The same question about unchanged content gets the same answer without a model call
+answer_cache = AnswerCache(settings.CHAT_CACHE_SIZE, settings.CHAT_CACHE_TTL_SECONDS)
 
 class ChatRequest(BaseModel):
     message: str
@@ -35,41 +29,87 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     reply: str
     context_used: bool
+    cached: bool = False
 
-@router.post("/query", response_model=ChatResponse)
-async def query_oracle(request: ChatRequest):
-    try:
-        # 1. Fetch Snapshot
-        response = supabase.table("system_snapshots") \
-            .select("*") \
-            .order("timestamp", desc=True) \
-            .limit(1) \
-            .execute()
-        
-        snapshot_context = "No system data available."
-        if response.data:
-            snapshot = response.data[0].get("state", {})
-            snapshot_context = json.dumps(snapshot, indent=2)[:30000]
-
-        # 2. Construct Prompt
-        system_instructions = f"""
+def get_chat_model(request: Request):
+    """The app-wide chat model created in the lifespan (Gemini, or the fake stream)."""
+    return request.app.state.chat_model
+
+# Content hash of the last snapshot seen: the cached snapshot is the same object until it changes
+_last_hash = (None, None)
+
+def _snapshot_hash(snapshot):
+    global _last_hash
+    seen, snapshot_hash = _last_hash
+    if seen is not snapshot:
+        snapshot_hash = content_hash(snapshot)
+        _last_hash = (snapshot, snapshot_hash)
+    return snapshot_hash
+
+def _prepare(snapshot, message: str):
+    """
+    Latest snapshot -> (context_used, content hash, cached answer, prompt).
+    CPU-bound on large snapshots (hashing, context building); run on a worker thread.
+    """
+    snapshot_hash = _snapshot_hash(snapshot) if snapshot else None
+    cached = answer_cache.get(snapshot_hash, message) if snapshot_hash else None
+    if cached is not None:
+        return True, snapshot_hash, cached, None
+
+    # Compact, unhealthy entities first, only the sections the question is about
+    snapshot_context = build_context(snapshot, message, settings.CHAT_CONTEXT_MAX_CHARS)
+    system_instructions = f"""
         You are Oracle, the AI monitor.
-        CURRENT SYSTEM STATE (JSON Snapshot):
+        CURRENT SYSTEM STATE:
         {snapshot_context}
         Answer questions about system health.
         """
+    return snapshot is not None, snapshot_hash, None, system_instructions
 
-        # 3. Call Gemini
-        response = client.models.generate_content(
-            model="gemini-2.5-flash", 
-            contents=request.message,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instructions
-            )
-        )
-        
-        return ChatResponse(reply=response.text, context_used=True)
+@router.post("/query", response_model=ChatResponse)
+async def query_oracle(request: ChatRequest, model=Depends(get_chat_model), db: Database = Depends(get_db)):
+    try:
+        started = time.perf_counter()
+        snapshot = await db.latest_snapshot()
+        context_used, snapshot_hash, cached, system_instructions = await run_in_threadpool(_prepare, snapshot, request.message)
+        if cached is not None:
+            return ChatResponse(reply=cached, context_used=True, cached=True)
+
+        reply = await model.generate(system_instructions, request.message)
+        logger.info(f"Chat answered in {time.perf_counter() - started:.2f}s with ~{len(system_instructions) // 4} context tokens")
+
+        if snapshot_hash and reply:
+            answer_cache.put(snapshot_hash, request.message, reply)
+        return ChatResponse(reply=reply, context_used=context_used)
 
     except Exception as e:
-        print(f"Chat Error: {e}")
-        return ChatResponse(reply=f"Error: {str(e)}", context_used=False)
\ No newline at end of file
+        logger.error(f"Chat Error: {e}")
+        return ChatResponse(reply=f"Error: {str(e)}", context_used=False)
+
+@router.post("/stream")
+async def stream_oracle(request: ChatRequest, model=Depends(get_chat_model), db: Database = Depends(get_db)):
+    """
+    The answer as server-sent events while it is generated: `meta`
+    ({"context_used", "cached"}), `delta` ({"text"}) per chunk, then `done`
+    or `error`.
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    try:
+        snapshot = await db.latest_snapshot()
+        context_used, snapshot_hash, cached, system_instructions = await run_in_threadpool(_prepare, snapshot, request.message)
+    except Exception as e:
+        logger.error(f"Chat Error: {e}")
+
+        async def failed():
+            yield sse_event("error", {"error": str(e)})
+        return StreamingResponse(failed(), media_type="text/event-stream", headers=headers)
+
+    def remember(reply: str):
+        if snapshot_hash:
+            answer_cache.put(snapshot_hash, request.message, reply)
+
+    return StreamingResponse(
+        stream_events(model, system_instructions, request.message, {"context_used": context_used}, cached, remember),
+        media_type="text/event-stream",
+        headers=headers,
+    )
@@ -1,10 +1,23 @@
-from fastapi import APIRouter
-from api.models.task import Task
+from fastapi import APIRouter, Depends, HTTPException, Request
+from api.models.task import Task, TaskBatch, TaskBatchResult, TaskResult
+from api.producer import TaskProducer
 
 router = APIRouter()
 
-@router.post("/")
-async def create_task(task: Task):
-    # In a real system, this would push to Kafka
-    # producer.send("agent-tasks", task.json().encode('utf-8'))
-    return {"status": "task_queued", "task_id": task.id}
+def get_task_producer(request: Request) -> TaskProducer:
+    """The app-wide producer created in the lifespan; override this dependency to inject another."""
+    return request.app.state.task_producer
+
+@router.post("/", response_model=TaskResult)
+async def create_task(task: Task, producer: TaskProducer = Depends(get_task_producer)):
+    result = await producer.send(task.model_dump(mode="json"))
+    if result["status"] in ("failed", "unconfirmed"):
+        raise HTTPException(status_code=503, detail=result)
+    return result
+
+@router.post("/bulk", response_model=TaskBatchResult)
+async def create_tasks(batch: TaskBatch, producer: TaskProducer = Depends(get_task_producer)):
+    """Enqueue many tasks in one request; each task gets its own result."""
+    results = await producer.send_many([task.model_dump(mode="json") for task in batch.tasks])
+    failed = sum(1 for r in results if r["status"] in ("failed", "unconfirmed"))
+    return {"queued": len(results) - failed, "failed": failed, "results": results}
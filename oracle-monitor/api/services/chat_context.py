@@ -0,0 +1,249 @@
+"""
+Snapshot context for /chat/query.
+
+`build_context` turns a snapshot into a compact prompt block: one line of
+unindented JSON per entity, an ATTENTION list of unhealthy or saturated
+entities first, and only the sections the question is about. Entities are
+cut whole once the character budget is spent, unhealthy ones last, and the
+block says how many were left out, so nothing disappears silently.
+
+`AnswerCache` keeps answers per (snapshot content hash, normalized question);
+`content_hash` covers only what the context can include.
+"""
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+SECTIONS = ("agents", "workload", "queues", "litellm")
+
+# Words that tie a question to a section; a question matching none gets every section
+SECTION_KEYWORDS = {
+    "agents": ("agent", "task", "busy", "idle", "invocation", "running", "failed", "stuck"),
+    "workload": ("pod", "deployment", "k8s", "kubernetes", "restart", "crash", "cpu", "memory", "ram",
+                 "replica", "scale", "scaling", "image", "rollout", "namespace", "cluster", "node"),
+    "queues": ("queue", "backlog", "pending", "waiting", "depth", "kafka", "priority"),
+    "litellm": ("model", "llm", "litellm", "rpm", "tpm", "token", "rate", "limit", "quota", "throttl"),
+}
+
+# Thresholds for the ATTENTION list
+RESTART_WARN = 3
+WAIT_WARN_MINS = 15
+QUEUE_DEPTH_WARN = 50
+RATE_WARN = 0.8
+HEALTHY_POD_STATUSES = ("running", "succeeded", "completed")
+
+# Per-pod noise that costs tokens without helping answers
+DROP_FIELDS = ("updated_at",)
+# Healthy pods listed per deployment; the rest are counted
+MAX_HEALTHY_PODS = 10
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question.strip().lower()).rstrip(" ?!.")
+
+def relevant_sections(question: str) -> List[str]:
+    words = normalize_question(question)
+    sections = [s for s in SECTIONS if any(k in words for k in SECTION_KEYWORDS[s])]
+    return sections or list(SECTIONS)
+
+def _deployment_name(deployment: Dict[str, Any]) -> str:
+    name = deployment.get("deployment_name") or "?"
+    return f"{deployment['namespace']}/{name}" if deployment.get("namespace") else name
+
+def _ratio(used: Any, limit: Any) -> Optional[float]:
+    if isinstance(used, (int, float)) and isinstance(limit, (int, float)) and limit > 0:
+        return used / limit
+    return None
+
+def _pod_issues(pod: Dict[str, Any]) -> List[str]:
+    issues = []
+    status = str(pod.get("status") or "")
+    if status and status.lower() not in HEALTHY_POD_STATUSES:
+        issues.append(f"status {status}")
+    if (pod.get("restarts") or 0) >= RESTART_WARN:
+        issues.append(f"{pod['restarts']} restarts")
+    return issues
+
+def _queue_depth(queue: Dict[str, Any]) -> int:
+    depth = queue.get("depth")
+    return len(queue.get("tasks") or []) if depth is None else depth
+
+def _task_wait_mins(task: Dict[str, Any]) -> float:
+    return max(task.get("waiting_since_mins") or 0, (task.get("priority") or {}).get("waiting_since_mins") or 0)
+
+def entity_issues(section: str, entity: Dict[str, Any]) -> List[str]:
+    """Why an entity needs attention; empty when it looks healthy."""
+    issues = []
+    if section == "agents":
+        tasks = (entity.get("activity") or {}).get("active_task_ids") or []
+        failed = sum(1 for t in tasks if t.get("status") == "failed")
+        if failed:
+            issues.append(f"{failed} failed task(s)")
+        stuck = sum(1 for t in tasks if _task_wait_mins(t) >= WAIT_WARN_MINS)
+        if stuck:
+            issues.append(f"{stuck} task(s) waiting {WAIT_WARN_MINS}+ min")
+        running = sum(1 for t in tasks if t.get("status") == "running")
+        limit = entity.get("max_parallel_invocations")
+        if limit and running >= limit:
+            issues.append(f"at capacity ({running}/{limit} running)")
+    elif section == "workload":
+        live = entity.get("live") or {}
+        active, max_pods = live.get("active_pods"), entity.get("max_pods")
+        if active == 0:
+            issues.append("no active pods")
+        elif active is not None and max_pods and active >= max_pods:
+            issues.append(f"at max pods ({active}/{max_pods})")
+        bad_pods = [p for p in entity.get("pods") or [] if _pod_issues(p)]
+        if bad_pods:
+            issues.append(f"{len(bad_pods)} unhealthy pod(s): " + "; ".join(
+                f"{p.get('pod_id')} {', '.join(_pod_issues(p))}" for p in bad_pods[:5]))
+    elif section == "queues":
+        tasks = entity.get("tasks") or []
+        depth = _queue_depth(entity)
+        if depth >= QUEUE_DEPTH_WARN:
+            issues.append(f"depth {depth}")
+        oldest = max((_task_wait_mins(t) for t in tasks), default=0)
+        if oldest >= WAIT_WARN_MINS:
+            issues.append(f"oldest task waiting {oldest:.0f} min")
+    elif section == "litellm":
+        for rate in ("rpm", "tpm"):
+            use = _ratio(entity.get(rate), entity.get(f"{rate}_max"))
+            if use is not None and use >= RATE_WARN:
+                issues.append(f"{rate} {entity.get(rate)}/{entity.get(f'{rate}_max')} ({use:.0%})")
+    return issues
+
+def _entity_label(section: str, entity: Dict[str, Any]) -> str:
+    if section == "workload":
+        return f"deployment {_deployment_name(entity)}"
+    if section == "litellm":
+        return f"model {entity.get('model')}"
+    return f"{section.rstrip('s')} {entity.get('name')}"
+
+def _compact_entity(section: str, entity: Dict[str, Any]) -> Dict[str, Any]:
+    """The entity without noise fields; queues as counts, deployments with unhealthy pods first."""
+    compact = {k: v for k, v in entity.items() if v is not None and k not in DROP_FIELDS and k != "pods"}
+    if section == "queues":
+        tasks = entity.get("tasks") or []
+        compact["tasks"] = len(tasks)
+        if tasks:
+            compact["oldest_wait_mins"] = round(max(_task_wait_mins(t) for t in tasks), 1)
+            levels: Dict[str, int] = {}
+            for t in tasks:
+                level = (t.get("priority") or {}).get("level")
+                if level:
+                    levels[level] = levels.get(level, 0) + 1
+            if levels:
+                compact["priorities"] = levels
+    elif section == "workload" and entity.get("pods") is not None:
+        pods = [{k: v for k, v in p.items() if v is not None and k not in DROP_FIELDS} for p in entity["pods"]]
+        bad = [p for p in pods if _pod_issues(p)]
+        good = [p for p in pods if not _pod_issues(p)]
+        compact["pods"] = bad + good[:MAX_HEALTHY_PODS]
+        if len(good) > MAX_HEALTHY_PODS:
+            compact["healthy_pods_omitted"] = len(good) - MAX_HEALTHY_PODS
+    return compact
+
+def content_hash(snapshot: Dict[str, Any]) -> str:
+    """
+    Hash of what `build_context` can send from the snapshot: every section's
+    compact entities plus the sorted stale sections. Ids, timestamps and the
+    dropped noise fields don't count, so snapshots that differ only there share
+    cached answers.
+    """
+    content = {
+        section: [_compact_entity(section, e) for e in snapshot.get(section) or [] if isinstance(e, dict)]
+        for section in SECTIONS
+    }
+    content["stale_sections"] = sorted(snapshot.get("stale_sections") or [])
+    return hashlib.blake2b(json.dumps(content, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"),
+                           digest_size=16).hexdigest()
+
+def _summary(snapshot: Dict[str, Any]) -> str:
+    agents = snapshot.get("agents") or []
+    workload = snapshot.get("workload") or []
+    queues = snapshot.get("queues") or []
+    tasks = sum(len((a.get("activity") or {}).get("active_task_ids") or []) for a in agents)
+    active = sum((d.get("live") or {}).get("active_pods") or 0 for d in workload)
+    max_pods = sum(d.get("max_pods") or 0 for d in workload)
+    queued = sum(_queue_depth(q) for q in queues)
+    return (f"{len(agents)} agents ({tasks} active tasks), {len(workload)} deployments ({active}/{max_pods} pods), "
+            f"{len(queues)} queues ({queued} queued tasks), {len(snapshot.get('litellm') or [])} models")
+
+def build_context(snapshot: Optional[Dict[str, Any]], question: str, max_chars: int = 12000) -> str:
+    """Prompt block describing `snapshot` for `question`, at most about `max_chars` long."""
+    if not snapshot:
+        return "No system data available."
+
+    sections = relevant_sections(question)
+    lines = [f"Snapshot {snapshot.get('id')} at {snapshot.get('timestamp')}.", "Totals: " + _summary(snapshot)]
+    if snapshot.get("stale_sections"):
+        lines.append(f"Stale (last good value, collector behind): {', '.join(snapshot['stale_sections'])}")
+
+    # Unhealthy entities across all sections, and each selected section's entities, unhealthy first
+    attention: List[str] = []
+    ordered: Dict[str, List[Tuple[bool, Dict[str, Any]]]] = {}
+    for section in SECTIONS:
+        entities = [e for e in snapshot.get(section) or [] if isinstance(e, dict)]
+        flagged = [(entity_issues(section, e), e) for e in entities]
+        attention += [f"- {_entity_label(section, e)}: {', '.join(issues)}" for issues, e in flagged if issues]
+        if section in sections:
+            ordered[section] = [(True, e) for issues, e in flagged if issues] + \
+                               [(False, e) for issues, e in flagged if not issues]
+
+    lines.append(f"ATTENTION ({len(attention)}):" if attention else "ATTENTION: nothing unhealthy.")
+    lines += attention[:50]
+    if len(attention) > 50:
+        lines.append(f"- ... {len(attention) - 50} more")
+
+    budget = max_chars - sum(len(line) + 1 for line in lines)
+    for section, entities in ordered.items():
+        header = f"{section} ({len(entities)}), one JSON object per line:"
+        lines.append(header)
+        budget -= len(header) + 1
+        omitted = 0
+        for i, (_, entity) in enumerate(entities):
+            line = _dumps(_compact_entity(section, entity))
+            if len(line) + 1 > budget:
+                # The rest are counted, not serialized
+                omitted = len(entities) - i
+                break
+            lines.append(line)
+            budget -= len(line) + 1
+        if omitted:
+            lines.append(f"... {omitted} more {section} omitted for length (unhealthy ones are listed first)")
+    skipped = [s for s in SECTIONS if s not in sections]
+    if skipped:
+        lines.append(f"Sections not included for this question: {', '.join(skipped)}")
+    return "\n".join(lines)
+
+class AnswerCache:
+    """LRU of answers keyed by (snapshot content hash, normalized question), each kept for `ttl_seconds`."""
+
+    def __init__(self, max_size: int = 256, ttl_seconds: float = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._answers: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+
+    def get(self, snapshot_hash: str, question: str) -> Optional[str]:
+        key = (snapshot_hash, normalize_question(question))
+        entry = self._answers.get(key)
+        if entry is None:
+            return None
+        stored_at, answer = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._answers[key]
+            return None
+        self._answers.move_to_end(key)
+        return answer
+
+    def put(self, snapshot_hash: str, question: str, answer: str):
+        key = (snapshot_hash, normalize_question(question))
+        self._answers[key] = (time.monotonic(), answer)
+        self._answers.move_to_end(key)
+        while len(self._answers) > self.max_size:
+            self._answers.popitem(last=False)
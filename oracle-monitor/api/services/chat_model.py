@@ -0,0 +1,101 @@
+"""
+Chat model backends and the server-sent event stream for /chat/stream.
+
+Backends are async: `stream()` yields text as the model produces it and
+`generate()` returns the whole reply, so a generation never holds the event
+loop and concurrent chats run side by side. `GeminiChatModel` uses the
+google-genai async client; `FakeChatModel` (CHAT_MODEL_BACKEND=fake) streams
+a canned reply word by word, for local runs and tests without a model.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class GeminiChatModel:
+    def __init__(self, api_key: Optional[str], model: str = "gemini-2.5-flash"):
+        from google import genai
+        self._client = genai.Client(api_key=api_key)
+        self.model = model
+
+    def _config(self, system: str):
+        from google.genai import types
+        return types.GenerateContentConfig(system_instruction=system)
+
+    async def stream(self, system: str, message: str) -> AsyncIterator[str]:
+        chunks = await self._client.aio.models.generate_content_stream(
+            model=self.model, contents=message, config=self._config(system))
+        async for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+
+    async def generate(self, system: str, message: str) -> str:
+        response = await self._client.aio.models.generate_content(
+            model=self.model, contents=message, config=self._config(system))
+        return response.text or ""
+
+class FakeChatModel:
+    """Streams a reply built from the question and context, one word every `delay_seconds`."""
+
+    def __init__(self, delay_seconds: float = 0.05, reply: Optional[str] = None):
+        self.delay_seconds = delay_seconds
+        self.reply = reply
+
+    def _reply(self, system: str, message: str) -> str:
+        if self.reply is not None:
+            return self.reply
+        attention = next((line for line in system.splitlines() if line.strip().startswith("ATTENTION")), "")
+        return f"(fake model) You asked: {message.strip()} {attention.strip()}".strip()
+
+    async def stream(self, system: str, message: str) -> AsyncIterator[str]:
+        words = self._reply(system, message).split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.delay_seconds)
+            yield word if i == len(words) - 1 else word + " "
+
+    async def generate(self, system: str, message: str) -> str:
+        return "".join([text async for text in self.stream(system, message)])
+
+def create_chat_model(settings):
+    if settings.CHAT_MODEL_BACKEND == "fake":
+        return FakeChatModel(settings.CHAT_FAKE_DELAY_SECONDS)
+    return GeminiChatModel(settings.GEMINI_API_KEY, settings.CHAT_MODEL)
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_events(
+    model,
+    system: Optional[str],
+    message: str,
+    meta: Dict[str, Any],
+    cached: Optional[str] = None,
+    on_reply: Optional[Callable[[str], None]] = None,
+) -> AsyncIterator[str]:
+    """
+    The SSE body of one answer: `meta`, then `delta` events ({"text": ...}) as
+    the model produces text, then `done` with the full reply length, or
+    `error`. A cached reply is sent as a single delta. `on_reply` gets the
+    complete reply once the model finishes.
+    """
+    yield sse_event("meta", {**meta, "cached": cached is not None})
+    if cached is not None:
+        yield sse_event("delta", {"text": cached})
+        yield sse_event("done", {"chars": len(cached)})
+        return
+
+    parts = []
+    try:
+        async for text in model.stream(system, message):
+            parts.append(text)
+            yield sse_event("delta", {"text": text})
+    except Exception as e:
+        logger.error(f"Chat Error: {e}")
+        yield sse_event("error", {"error": str(e)})
+        return
+    reply = "".join(parts)
+    if on_reply and reply:
+        on_reply(reply)
+    yield sse_event("done", {"chars": len(reply)})
@@ -0,0 +1,107 @@
+"""
+Range reports over system_snapshots.
+
+`get_snapshot_metrics()` (infrastructure/supabase/functions/snapshot_metrics.sql)
+returns per-bucket and whole-range aggregates of every numeric series, computed
+in Postgres from each row's small `metrics` column. `summarize_history` turns
+that into the four report sections: restart trends and peak pods per
+deployment, queue depth percentiles and model rate limit utilization.
+"""
+from typing import Any, Dict, List, Optional
+
+# Bucket widths a report may use, smallest first
+BUCKET_SECONDS = (60, 300, 900, 3600, 6 * 3600, 86400)
+
+def choose_bucket_seconds(range_seconds: float, max_buckets: int) -> int:
+    """Smallest standard bucket that keeps the range within `max_buckets` buckets."""
+    for seconds in BUCKET_SECONDS:
+        if range_seconds / seconds <= max_buckets:
+            return seconds
+    return BUCKET_SECONDS[-1]
+
+def _split(series: Dict[str, Any], kind: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """{"<kind>:<name>:<field>": data} -> {name: {field: data}}"""
+    grouped: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for key, data in series.items():
+        prefix, _, rest = key.partition(":")
+        name, _, field = rest.rpartition(":")
+        if prefix == kind and name:
+            grouped.setdefault(name, {})[field] = data
+    return grouped
+
+def _ratio(value: Optional[float], limit: Optional[float]) -> Optional[float]:
+    return value / limit if value is not None and limit else None
+
+def _utilization(used: Optional[Dict[str, Any]], limit: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Average and peak use of a rate limit, overall and per bucket."""
+    if not used or not limit:
+        return {"avg": None, "peak": None, "trend": []}
+    limits = dict(zip(limit["t"], limit["max"]))
+    trend = [_ratio(peak, limits.get(t)) for t, peak in zip(used["t"], used["max"])]
+    peaks = [u for u in trend if u is not None]
+    return {
+        "avg": _ratio(used["total"]["avg"], limit["total"]["avg"]),
+        "peak": max(peaks) if peaks else None,
+        "trend": trend,
+    }
+
+def summarize_history(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Report sections from a get_snapshot_metrics() result."""
+    series = metrics.get("series") or {}
+
+    deployments = _split(series, "deployment")
+    restarts: List[Dict[str, Any]] = []
+    pods: List[Dict[str, Any]] = []
+    for name, fields in sorted(deployments.items()):
+        counted = fields.get("restarts")
+        if counted:
+            # Restart counts only grow while pods live; replaced pods can make the sum drop
+            first, last = counted["min"][0], counted["max"][-1]
+            restarts.append({
+                "deployment": name,
+                "start": first,
+                "end": last,
+                "increase": max(0, last - first),
+                "trend": counted["max"],
+            })
+        active = fields.get("active_pods")
+        if active:
+            peak_index = active["max"].index(max(active["max"]))
+            pods.append({
+                "deployment": name,
+                "peak": active["total"]["max"],
+                "peak_at": active["t"][peak_index],
+                "avg": active["total"]["avg"],
+                "trend": active["max"],
+            })
+
+    queues = []
+    for name, fields in sorted(_split(series, "queue").items()):
+        depth = fields.get("depth")
+        if depth:
+            total = depth["total"]
+            queues.append({"queue": name, "p50": total["p50"], "p95": total["p95"], "max": total["max"],
+                           "avg": total["avg"], "trend": depth["p95"]})
+
+    models = []
+    for name, fields in sorted(_split(series, "model").items()):
+        model = {"model": name}
+        for rate in ("rpm", "tpm"):
+            used, limit = fields.get(rate), fields.get(f"{rate}_max")
+            model[rate] = {
+                "avg": used["total"]["avg"] if used else None,
+                "peak": used["total"]["max"] if used else None,
+                "limit": limit["total"]["max"] if limit else None,
+                "utilization": _utilization(used, limit),
+            }
+        models.append(model)
+
+    return {
+        "start": metrics.get("start"),
+        "end": metrics.get("end"),
+        "bucket_seconds": metrics.get("bucket_seconds"),
+        "restarts": restarts,
+        "pods": pods,
+        "queues": queues,
+        "models": models,
+    }
@@ -0,0 +1,306 @@
+"""
+Rendering for /reports/progress-report and /reports/history.
+
+The render functions are pure functions of their inputs so they can run in a
+worker process. `ReportRenderer` owns that process pool, caches rendered
+reports by key and makes concurrent requests for the same key share one render.
+"""
+import asyncio
+import io
+import json
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+
+from api.services.history import summarize_history
+
+def render_progress_report(snapshot: Optional[Dict[str, Any]], logs: List[Dict[str, Any]],
+                           generated_at: datetime) -> bytes:
+    """Build the progress report PDF for a snapshot and the newest logs (newest first)."""
+    # Create PDF in memory
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    story = []
+    styles = getSampleStyleSheet()
+    
+    # Custom styles
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#FF6B6B'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#4ECDC4'),
+        spaceAfter=12,
+        spaceBefore=12
+    )
+    
+    # Title
+    story.append(Paragraph("Oracle Monitor System", title_style))
+    story.append(Paragraph("Progress & Health Report", title_style))
+    story.append(Paragraph(f"Generated: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
+    story.append(Spacer(1, 0.3*inch))
+    
+    if snapshot:
+        # Executive Summary
+        story.append(Paragraph("Executive Summary", heading_style))
+        
+        agent_count = len(snapshot.get("agents", []))
+        total_tasks = sum(len(agent.get("activity", {}).get("active_task_ids", [])) for agent in snapshot.get("agents", []))
+        queue_count = len(snapshot.get("queues", []))
+        total_queued = sum(len(queue.get("tasks", [])) for queue in snapshot.get("queues", []))
+        
+        summary_data = [
+            ["Metric", "Value"],
+            ["Active Agents", str(agent_count)],
+            ["Active Tasks", str(total_tasks)],
+            ["Message Queues", str(queue_count)],
+            ["Queued Tasks", str(total_queued)],
+            ["LLM Models", str(len(snapshot.get("litellm", [])))],
+        ]
+        
+        summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4ECDC4')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(summary_table)
+        story.append(Spacer(1, 0.2*inch))
+        
+        # Agent Details
+        story.append(Paragraph("Agent Observatory", heading_style))
+        for agent in snapshot.get("agents", []):
+            agent_name = agent.get("name", "Unknown")
+            agent_desc = agent.get("description", "No description")
+            active_tasks = len(agent.get("activity", {}).get("active_task_ids", []))
+            
+            story.append(Paragraph(f"<b>{agent_name}</b>", styles['Normal']))
+            story.append(Paragraph(f"{agent_desc}", styles['Normal']))
+            story.append(Paragraph(f"Active Tasks: {active_tasks}", styles['Normal']))
+            story.append(Spacer(1, 0.1*inch))
+        
+        story.append(PageBreak())
+        
+        # Workload Analysis
+        story.append(Paragraph("Infrastructure Workload", heading_style))
+        workload_data = [["Deployment", "Active Pods", "Max Pods", "Status"]]
+        
+        for workload in snapshot.get("workload", []):
+            deployment = workload.get("deployment_name", "Unknown")
+            active = workload.get("live", {}).get("active_pods", 0)
+            max_pods = workload.get("max_pods", 0)
+            status = "Healthy" if active > 0 else "Inactive"
+            workload_data.append([deployment, str(active), str(max_pods), status])
+        
+        workload_table = Table(workload_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+        workload_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#FF6B6B')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(workload_table)
+        story.append(Spacer(1, 0.2*inch))
+    
+    if logs:
+        story.append(PageBreak())
+        story.append(Paragraph("Recent Activity Logs", heading_style))
+        
+        log_data = [["Time", "Level", "Source", "Message"]]
+        for log in logs[:20]:  # Top 20 logs
+            timestamp = datetime.fromisoformat(log.get("timestamp", "")).strftime("%H:%M:%S")
+            level = log.get("level", "info").upper()
+            source = log.get("source", "unknown")
+            message = log.get("message", "")[:60] + "..." if len(log.get("message", "")) > 60 else log.get("message", "")
+            log_data.append([timestamp, level, source, message])
+        
+        log_table = Table(log_data, colWidths=[1*inch, 0.8*inch, 1.5*inch, 3.2*inch])
+        log_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#95E1D3')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ]))
+        story.append(log_table)
+    
+    # Build PDF
+    doc.build(story)
+    return buffer.getvalue()
+
+def _fmt(value: Optional[float], pattern: str = "{:.1f}") -> str:
+    return "-" if value is None else pattern.format(value)
+
+def _sparkline(values: List[Optional[float]], width: int = 24) -> str:
+    """Text trend of per-bucket values, downsampled to `width` characters."""
+    points = [v for v in values if v is not None]
+    if not points:
+        return ""
+    step = max(1, -(-len(values) // width))
+    columns = [max((v for v in values[i:i + step] if v is not None), default=None) for i in range(0, len(values), step)]
+    low, high = min(points), max(points)
+    marks = "_.-=+*#"
+    return "".join(" " if v is None else marks[int((v - low) / (high - low) * (len(marks) - 1)) if high > low else 0]
+                   for v in columns)
+
+def render_history_report(metrics: Dict[str, Any], generated_at: datetime) -> bytes:
+    """Build the range report PDF from a get_snapshot_metrics() result."""
+    summary = summarize_history(metrics)
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('HistoryTitle', parent=styles['Heading1'], fontSize=22,
+                                 textColor=colors.HexColor('#FF6B6B'), spaceAfter=20, alignment=TA_CENTER)
+    heading_style = ParagraphStyle('HistoryHeading', parent=styles['Heading2'], fontSize=16,
+                                   textColor=colors.HexColor('#4ECDC4'), spaceAfter=12, spaceBefore=12)
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4ECDC4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('FONTNAME', (-1, 1), (-1, -1), 'Courier'),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+    ])
+
+    def section(title: str, rows: List[List[str]], widths: List[float]):
+        story.append(Paragraph(title, heading_style))
+        if len(rows) == 1:
+            story.append(Paragraph("No data in this range.", styles['Normal']))
+            return
+        table = Table(rows, colWidths=[w*inch for w in widths])
+        table.setStyle(table_style)
+        story.append(table)
+
+    story = [
+        Paragraph("Oracle Monitor System", title_style),
+        Paragraph("Historical Report", title_style),
+        Paragraph(f"Range: {summary['start']} to {summary['end']}", styles['Normal']),
+        Paragraph(f"Bucket: {_fmt(summary['bucket_seconds'], '{:.0f}')}s, "
+                  f"generated: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']),
+        Spacer(1, 0.2*inch),
+    ]
+
+    section("Pod Restarts", [["Deployment", "Start", "End", "Increase", "Trend"]] + [
+        [r["deployment"], _fmt(r["start"], "{:.0f}"), _fmt(r["end"], "{:.0f}"), _fmt(r["increase"], "{:.0f}"),
+         _sparkline(r["trend"])] for r in summary["restarts"]
+    ], [2.2, 0.7, 0.7, 0.8, 2.3])
+    section("Peak Active Pods", [["Deployment", "Peak", "Peak At", "Average", "Trend"]] + [
+        [p["deployment"], _fmt(p["peak"], "{:.0f}"), str(p["peak_at"])[:16].replace("T", " "), _fmt(p["avg"]),
+         _sparkline(p["trend"])] for p in summary["pods"]
+    ], [2.0, 0.6, 1.3, 0.7, 2.1])
+    section("Queue Depth", [["Queue", "p50", "p95", "Max", "Average", "p95 Trend"]] + [
+        [q["queue"], _fmt(q["p50"], "{:.0f}"), _fmt(q["p95"], "{:.0f}"), _fmt(q["max"], "{:.0f}"), _fmt(q["avg"]),
+         _sparkline(q["trend"])] for q in summary["queues"]
+    ], [2.0, 0.6, 0.6, 0.6, 0.7, 2.2])
+
+    model_rows = [["Model", "Rate", "Average", "Peak", "Limit", "Avg Use", "Peak Use", "Trend"]]
+    for m in summary["models"]:
+        for rate in ("rpm", "tpm"):
+            r = m[rate]
+            model_rows.append([m["model"], rate.upper(), _fmt(r["avg"]), _fmt(r["peak"], "{:.0f}"),
+                               _fmt(r["limit"], "{:.0f}"), _fmt(r["utilization"]["avg"], "{:.0%}"),
+                               _fmt(r["utilization"]["peak"], "{:.0%}"), _sparkline(r["utilization"]["trend"], 16)])
+    section("Rate Limit Utilization", model_rows, [1.6, 0.5, 0.7, 0.6, 0.7, 0.7, 0.7, 1.5])
+
+    doc.build(story)
+    return buffer.getvalue()
+
+def render_history_json(metrics: Dict[str, Any], generated_at: datetime) -> bytes:
+    """The range report sections as JSON."""
+    summary = summarize_history(metrics)
+    summary["generated_at"] = generated_at.isoformat()
+    return json.dumps(summary).encode("utf-8")
+
+class ReportRenderer:
+    """
+    Renders reports in a pool of `max_workers` processes, so reportlab never
+    runs on the event loop and at most that many renders run at once.
+
+    Results are kept in an LRU of `cache_size` reports. While a key is being
+    produced, further requests for it await the same task instead of fetching
+    and rendering again.
+    """
+
+    def __init__(self, max_workers: int = 2, cache_size: int = 16):
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Any, bytes]" = OrderedDict()
+        self._inflight: Dict[Any, asyncio.Task] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers import only this module, not the API process and its threads
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def get(self, key: Any, load: Callable[[], Awaitable[Tuple]],
+                  render: Callable[..., bytes] = render_progress_report) -> bytes:
+        """
+        Report for `key`. On a miss, `load` (async) returns the arguments for
+        `render`, e.g. the snapshot and logs of a progress report; `render`
+        also gets the generation time.
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._produce(key, load, render))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded: one client disconnecting doesn't cancel the render the others wait on
+        return await asyncio.shield(task)
+
+    async def _produce(self, key: Any, load: Callable[[], Awaitable[Tuple]], render: Callable[..., bytes]) -> bytes:
+        loop = asyncio.get_running_loop()
+        args = await load()
+        pool = self._get_pool()
+        try:
+            report = await loop.run_in_executor(pool, render, *args, datetime.now())
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next request
+            if self._pool is pool:
+                self._pool = None
+            raise
+        self._cache[key] = report
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return report
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
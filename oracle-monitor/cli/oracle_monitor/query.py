@@ -1,9 +1,11 @@
 import os
+from functools import lru_cache
 from supabase import create_client, Client
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta, timezone
 
-# Helper to get supabase client
+# Helper to get supabase client; built once per process so its HTTP connections are reused
+@lru_cache(maxsize=1)
 def get_client() -> Optional[Client]:
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_KEY")
@@ -17,15 +19,9 @@ def get_latest_snapshot() -> Optional[Dict[str, Any]]:
         return {"error": "Supabase credentials missing"}
     
     try:
-        response = client.table("system_snapshots") \
-            .select("state") \
-            .order("timestamp", desc=True) \
-            .limit(1) \
-            .execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]["state"]
-        return None
+        # Resolved server-side so delta-encoded rows come back as full state
+        response = client.rpc("get_latest_snapshot").execute()
+        return response.data or None
     except Exception as e:
         return {"error": str(e)}
 
@@ -36,13 +32,9 @@ def get_snapshots_since(minutes: int) -> List[Dict[str, Any]]:
     
     cutoff = datetime.now(timezone.utc) - timedelta(minutes=minutes)
     try:
-        response = client.table("system_snapshots") \
-            .select("state") \
-            .gte("timestamp", cutoff.isoformat()) \
-            .order("timestamp", desc=True) \
-            .execute()
-        
-        return [item["state"] for item in response.data]
+        response = client.rpc("get_snapshots_since", {"p_since": cutoff.isoformat()}).execute()
+        # Replayed oldest first; callers expect newest first
+        return list(reversed(response.data or []))
     except Exception:
         return []
 
@@ -52,13 +44,7 @@ def get_snapshot_by_id(snapshot_id: str) -> Optional[Dict[str, Any]]:
         return None
         
     try:
-        response = client.table("system_snapshots") \
-            .select("state") \
-            .eq("snapshot_id", snapshot_id) \
-            .execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]["state"]
-        return None
+        response = client.rpc("get_snapshot", {"p_snapshot_id": snapshot_id}).execute()
+        return response.data or None
     except Exception:
         return None
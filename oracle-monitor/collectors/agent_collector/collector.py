@@ -1,17 +1,45 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import requests
 from collectors.base.collector import Collector
 from collectors.base.config import Config
 
 class AgentCollector(Collector):
+    """
+    Mirrors the API's agent registry locally and patches it from
+    /agents/changes, so each cycle only transfers agents that changed.
+    """
+
+    interval_seconds = 5.0
+    min_interval_seconds = 2.0
+    max_interval_seconds = 30.0
+
     def __init__(self):
         self.api_url = Config.AGENT_API_URL
+        self.session = requests.Session()
+
+        self._mirror: Dict[str, Dict[str, Any]] = {}
+        self._agents: List[Dict[str, Any]] = []
+        self._epoch: Optional[str] = None
+        self._version = 0
 
     def collect(self) -> List[Dict[str, Any]]:
-        try:
-            response = requests.get(f"{self.api_url}/agents/status", timeout=5)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error collecting agent status: {e}")
-            return []
+        # Raises when the API is unreachable, so the last good section is kept and marked stale
+        params = {"since": self._version}
+        if self._epoch:
+            params["epoch"] = self._epoch
+        response = self.session.get(f"{self.api_url}/agents/changes", params=params, timeout=5)
+        response.raise_for_status()
+        changes = response.json()
+
+        if changes["full"]:
+            self._mirror = {}
+        for agent in changes["upserts"]:
+            self._mirror[agent["name"]] = agent
+        for name in changes["removed"]:
+            self._mirror.pop(name, None)
+
+        if changes["full"] or changes["upserts"] or changes["removed"]:
+            self._agents = list(self._mirror.values())
+        self._epoch = changes["epoch"]
+        self._version = changes["version"]
+        return self._agents
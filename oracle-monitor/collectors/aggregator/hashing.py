@@ -0,0 +1,23 @@
+import hashlib
+import json
+from typing import Any, Dict
+
+def canonical_json(obj: Any) -> bytes:
+    """Key-sorted, whitespace-free JSON so equal content always serializes identically."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+def digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def content_hash(obj: Any) -> str:
+    """Stable 128-bit digest of a JSON-compatible value."""
+    return digest(canonical_json(obj))
+
+def state_hash(snapshot: Dict[str, Any], section_hashes: Dict[str, str]) -> str:
+    """
+    Digest of a snapshot's content, ignoring its id and timestamp. Sections are
+    represented by their own hashes, so this costs one small hash on top of them.
+    """
+    content = {key: value for key, value in snapshot.items() if key not in ("id", "timestamp")}
+    content.update(section_hashes)
+    return content_hash(content)
@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from collectors.aggregator.hashing import content_hash
+from collectors.base.collector import Collector
+from collectors.base.metrics import timed_collect
+
+class _Section:
+    """Schedule and latest result of one collector."""
+
+    def __init__(self, collector: Collector):
+        self.collector = collector
+        self.interval = collector.interval_seconds
+        self.next_run = 0.0
+        self.value: Any = []
+        self.hash: Optional[str] = None
+        self.collected_at: Optional[float] = None
+        self.failed = False
+        self.future: Optional[Future] = None
+        self.started = 0.0
+        self.runs = 0
+
+class CollectorScheduler:
+    """
+    Runs each collector on its own interval instead of one shared tick.
+
+    With `adaptive` on, a collector whose output changed is polled again
+    twice as soon (down to its min_interval_seconds) and one whose output
+    did not change backs off by a quarter (up to max_interval_seconds).
+    Only one call per collector is in flight at a time, so a slow source
+    is never hit with overlapping requests. Snapshots read `latest()`.
+    """
+
+    BACKOFF = 1.25
+
+    def __init__(self, collectors: Dict[str, Collector], adaptive: bool = True):
+        self.adaptive = adaptive
+        self._sections = {name: _Section(c) for name, c in collectors.items()}
+        # Re-entrant: a call that finishes before add_done_callback runs its callback inline
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._changed = threading.Event()
+        # One worker per collector: a hung source can never starve the others
+        self._executor = ThreadPoolExecutor(max_workers=len(collectors), thread_name_prefix="collector")
+        self._thread = threading.Thread(target=self._run, name="collector-scheduler", daemon=True)
+
+    def start(self, wait_seconds: Optional[float] = None):
+        """Start polling; optionally wait until every collector has answered once."""
+        self._thread.start()
+        if wait_seconds:
+            self._ready.wait(wait_seconds)
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            wait = None
+            with self._lock:
+                for name, section in self._sections.items():
+                    if section.future is not None:
+                        continue
+                    if now >= section.next_run:
+                        section.started = now
+                        section.future = self._executor.submit(timed_collect, name, section.collector)
+                        section.future.add_done_callback(lambda f, name=name: self._done(name, f))
+                    else:
+                        wait = section.next_run - now if wait is None else min(wait, section.next_run - now)
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def _done(self, name: str, future: Future):
+        now = time.monotonic()
+        with self._lock:
+            section = self._sections[name]
+            section.future = None
+            section.runs += 1
+            try:
+                value = future.result()
+            except Exception as e:
+                print(f"Error collecting {name}: {e}")
+                section.failed = True
+            else:
+                section.failed = False
+                digest = content_hash(value)
+                if self.adaptive and section.hash is not None:
+                    c = section.collector
+                    if digest != section.hash:
+                        section.interval = max(c.min_interval_seconds, section.interval / 2)
+                    else:
+                        section.interval = min(c.max_interval_seconds, section.interval * self.BACKOFF)
+                if digest != section.hash:
+                    self._changed.set()
+                section.value, section.hash, section.collected_at = value, digest, now
+            section.next_run = now + section.interval
+
+            if all(s.runs for s in self._sections.values()):
+                self._ready.set()
+        self._wake.set()
+
+    def latest(self) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Newest value of every section, plus the sections that are stale: never
+        collected, failed last time, or stuck in a call past their deadline.
+        """
+        now = time.monotonic()
+        values: Dict[str, Any] = {}
+        stale: List[str] = []
+        with self._lock:
+            for name, section in self._sections.items():
+                values[name] = section.value
+                overdue = section.future is not None and now - section.started > section.collector.deadline_seconds
+                if section.collected_at is None or section.failed or overdue:
+                    stale.append(name)
+        return values, stale
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Block until some section's output changed since the last call, or `timeout`."""
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+    def intervals(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(s.interval, 2) for name, s in self._sections.items()}
+
+    def shutdown(self):
+        self._stop.set()
+        self._wake.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,42 +1,139 @@
 from datetime import datetime, timezone
+import time
 import uuid
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeout
+from typing import Dict, Any, List, Tuple
 
 # Collectors
-from collectors.k8s_collector.collector import K8sCollector
+from collectors.base.collector import Collector
+from collectors.base.config import Config
+from collectors.base.metrics import SNAPSHOT_BYTES, VALIDATE_SECONDS, timed_collect
+from collectors.k8s_collector.sharded import build_workload_collector
 from collectors.litellm_collector.collector import LiteLLMCollector
 from collectors.queue_collector.kafka_collector import QueueCollector
 from collectors.agent_collector.collector import AgentCollector
+from collectors.aggregator.hashing import canonical_json, digest, state_hash
+from collectors.aggregator.scheduler import CollectorScheduler
 from collectors.aggregator.validator import validate_state
 
 class StateBuilder:
-    def __init__(self):
-        self.k8s = K8sCollector()
+    def __init__(self, concurrent: bool = Config.COLLECTOR_CONCURRENT, schedule: str = Config.COLLECTOR_SCHEDULE):
+        self.k8s = build_workload_collector()
         self.litellm = LiteLLMCollector()
         self.queue = QueueCollector()
         self.agent = AgentCollector()
 
+        # Snapshot section -> collector responsible for it
+        self.collectors: Dict[str, Collector] = {
+            "workload": self.k8s,
+            "litellm": self.litellm,
+            "queues": self.queue,
+            "agents": self.agent,
+        }
+
+        self.concurrent = concurrent
+        # Hashes of the last built snapshot: per section and over the whole state minus id/timestamp
+        self.section_hashes: Dict[str, str] = {}
+        self.content_hash = ""
+        # section -> (value, hash); unchanged sections are often the very same list object
+        self._hashed: Dict[str, Tuple[Any, str]] = {}
+        # Last value each collector returned in time; reused when a collector is late
+        self._last_good: Dict[str, Any] = {section: [] for section in self.collectors}
+        # Calls that overran their deadline and are still running in the pool
+        self._pending: Dict[str, Future] = {}
+        self._executor = None
+        # Scheduled mode: collectors poll on their own intervals and snapshots read the latest values
+        self.scheduler = None
+        if schedule == "scheduled":
+            self.scheduler = CollectorScheduler(self.collectors, adaptive=Config.COLLECTOR_ADAPTIVE)
+            self.scheduler.start(wait_seconds=max(c.deadline_seconds for c in self.collectors.values()))
+        elif concurrent:
+            # One worker per collector: a hung source can never starve the others
+            self._executor = ThreadPoolExecutor(
+                max_workers=len(self.collectors),
+                thread_name_prefix="collector"
+            )
+
+    def _collect_sequential(self) -> Tuple[Dict[str, Any], List[str]]:
+        sections: Dict[str, Any] = {}
+        stale: List[str] = []
+        for section, collector in self.collectors.items():
+            try:
+                sections[section] = timed_collect(section, collector)
+                self._last_good[section] = sections[section]
+            except Exception as e:
+                print(f"Error collecting {section}: {e}")
+                sections[section] = self._last_good[section]
+                stale.append(section)
+        return sections, stale
+
+    def _collect_concurrent(self) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Run every collector on the pool and wait for each one only until its own
+        deadline. Sections that miss it reuse the last good value and are reported
+        as stale, so the cycle is bounded by the slowest deadline.
+        """
+        started = time.monotonic()
+
+        futures: Dict[str, Future] = {}
+        for section, collector in self.collectors.items():
+            pending = self._pending.pop(section, None)
+            if pending is not None and not pending.done():
+                # Still busy with last cycle's call: wait on that one instead of
+                # stacking another request onto an already slow source.
+                futures[section] = pending
+                continue
+            if pending is not None and pending.exception() is None:
+                # A late result from last cycle is still fresher than the stale one
+                self._last_good[section] = pending.result()
+            futures[section] = self._executor.submit(timed_collect, section, collector)
+
+        sections: Dict[str, Any] = {}
+        stale: List[str] = []
+        for section, future in futures.items():
+            deadline = started + self.collectors[section].deadline_seconds
+            try:
+                sections[section] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                self._last_good[section] = sections[section]
+            except FutureTimeout:
+                print(f"Warning: {section} collector missed its deadline, reusing last value.")
+                self._pending[section] = future
+                sections[section] = self._last_good[section]
+                stale.append(section)
+            except Exception as e:
+                print(f"Error collecting {section}: {e}")
+                sections[section] = self._last_good[section]
+                stale.append(section)
+
+        return sections, stale
+
     def build_snapshot(self) -> Dict[str, Any]:
         snapshot_id = f"snapshot-{uuid.uuid4()}"
         timestamp = datetime.now(timezone.utc).isoformat()
 
-        # Collect data in parallel (conceptually, distinct calls here)
-        workload_state = self.k8s.collect()
-        litellm_state = self.litellm.collect()
-        queue_state = self.queue.collect()
-        agent_state = self.agent.collect()
+        if self.scheduler:
+            sections, stale = self.scheduler.latest()
+        elif self.concurrent:
+            sections, stale = self._collect_concurrent()
+        else:
+            sections, stale = self._collect_sequential()
+        stale = set(stale) | {section for section, c in self.collectors.items() if c.partial}
 
         snapshot = {
             "id": snapshot_id,
             "timestamp": timestamp,
-            "agents": agent_state,
-            "workload": workload_state,
-            "queues": queue_state,
-            "litellm": litellm_state
+            "agents": sections["agents"],
+            "workload": sections["workload"],
+            "queues": sections["queues"],
+            "litellm": sections["litellm"],
+            "stale_sections": sorted(stale)
         }
 
         # Validate
-        if not validate_state(snapshot):
+        started = time.perf_counter()
+        valid = validate_state(snapshot)
+        VALIDATE_SECONDS.observe(time.perf_counter() - started)
+        if not valid:
             print("Warning: Generated snapshot failed validation!")
             # In production, we might store it anyway with a flag, or discard it.
             # For now, we mimic the user guide's raising behavior or just return it with warning
@@ -44,5 +141,25 @@ class StateBuilder:
             # User guide says: raise ValueError("Built state doesn't match schema!")
             # I will follow the user guide.
             raise ValueError("Built state doesn't match schema!")
-        
+
+        self.section_hashes = {section: self._section_hash(section, sections[section]) for section in self.collectors}
+        self.content_hash = state_hash(snapshot, self.section_hashes)
         return snapshot
+
+    def _section_hash(self, section: str, value: Any) -> str:
+        cached = self._hashed.get(section)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        # Serialized once for both the hash and the size metric
+        data = canonical_json(value)
+        section_digest = digest(data)
+        self._hashed[section] = (value, section_digest)
+        SNAPSHOT_BYTES.set(len(data), section=section)
+        return section_digest
+
+    def shutdown(self):
+        """Release the collector pool without waiting on overdue calls."""
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,13 @@
 import jsonschema
 import json
 import os
+from typing import Any, Callable, Dict, Optional
+from collectors.aggregator.hashing import content_hash
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
 
 # Load schema once at module import
 SCHEMA_PATH = os.path.join(
@@ -18,16 +25,102 @@ except FileNotFoundError:
     print(f"WARNING: Schema file not found at {SCHEMA_PATH}")
     SCHEMA = {}
 
+# Top-level sections validated (and cached) independently
+SECTIONS = ("agents", "workload", "queues", "litellm")
+
+class SchemaError(Exception):
+    def __init__(self, message: str, path):
+        super().__init__(message)
+        self.message = message
+        self.path = list(path)
+
+def _compile(schema: Dict[str, Any]) -> Callable[[Any], None]:
+    """
+    Build a validation function once. Uses fastjsonschema's generated code when
+    installed, otherwise a pre-checked jsonschema validator instance. Formats are
+    not asserted, matching jsonschema.validate's default behaviour.
+    """
+    if fastjsonschema is not None:
+        compiled = fastjsonschema.compile(schema, use_default=False, use_formats=False)
+
+        def validate(instance):
+            try:
+                compiled(instance)
+            except fastjsonschema.JsonSchemaValueException as e:
+                # Drop the leading "data" element fastjsonschema puts on every path
+                raise SchemaError(e.message, (e.path or [])[1:])
+        return validate
+
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    validator = validator_cls(schema)
+
+    def validate(instance):
+        error = jsonschema.exceptions.best_match(validator.iter_errors(instance))
+        if error is not None:
+            raise SchemaError(error.message, error.path)
+    return validate
+
+class SnapshotValidator:
+    """
+    Validates snapshots section by section against a schema compiled once.
+
+    The envelope (id, timestamp, required keys, section types) is checked every
+    time. Each section is hashed and only re-validated when its content differs
+    from the last snapshot in which it passed. A section that is the very same
+    object as last time (cached or stale collector output) is not even hashed.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        properties = schema.get("properties", {})
+        envelope = dict(schema)
+        envelope["properties"] = {
+            name: ({"type": "array"} if name in SECTIONS else subschema)
+            for name, subschema in properties.items()
+        }
+        self._validate_envelope = _compile(envelope)
+
+        meta = {"$schema": schema["$schema"]} if "$schema" in schema else {}
+        self._validate_section = {
+            name: _compile({**meta, **properties[name]})
+            for name in SECTIONS if name in properties
+        }
+        self._passed_hashes: Dict[str, str] = {}
+        self._passed_objects: Dict[str, Any] = {}
+
+    def validate(self, state: Dict[str, Any]) -> Optional[SchemaError]:
+        """Return the first schema error found, or None if the state is valid."""
+        try:
+            self._validate_envelope(state)
+        except SchemaError as e:
+            return e
+
+        for name, validate_section in self._validate_section.items():
+            section = state[name]
+            if self._passed_objects.get(name) is section:
+                continue
+            digest = content_hash(section)
+            if self._passed_hashes.get(name) != digest:
+                try:
+                    validate_section(section)
+                except SchemaError as e:
+                    e.path = [name] + e.path
+                    return e
+                self._passed_hashes[name] = digest
+            self._passed_objects[name] = section
+        return None
+
+_validator = SnapshotValidator(SCHEMA) if SCHEMA else None
+
 def validate_state(state):
     """Validate state against Oracle schema"""
-    if not SCHEMA:
+    if _validator is None:
         print("Schema not loaded, skipping validation.")
         return False
-        
-    try:
-        jsonschema.validate(instance=state, schema=SCHEMA)
-        return True
-    except jsonschema.ValidationError as e:
-        print(f"❌ Validation failed: {e.message}")
-        print(f"   Path: {' -> '.join(str(p) for p in e.path)}")
+
+    error = _validator.validate(state)
+    if error is not None:
+        print(f"❌ Validation failed: {error.message}")
+        print(f"   Path: {' -> '.join(str(p) for p in error.path)}")
         return False
+    return True
@@ -1,13 +1,28 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict
+from collectors.base.config import Config
 
 class Collector(ABC):
     """Abstract base class for all data collectors."""
 
+    # Maximum time the StateBuilder waits for collect() in concurrent mode.
+    # Subclasses override this when their source is known to be slower/faster.
+    deadline_seconds: float = Config.COLLECTOR_DEADLINE_SECONDS
+
+    # Polling interval under the per-collector scheduler. With adaptive scheduling it
+    # moves between the min and max depending on how often the output changes.
+    interval_seconds: float = Config.COLLECTOR_INTERVAL_SECONDS
+    min_interval_seconds: float = 1.0
+    max_interval_seconds: float = 60.0
+
+    # True when the last collect() returned only part of its data; the section is listed as stale
+    partial: bool = False
+
     @abstractmethod
     def collect(self) -> Dict[str, Any]:
         """
         Collect data from the specific source.
-        Returns a dictionary representing the collected state.
+        Returns a dictionary representing the collected state. Raises when the
+        source fails, so the caller keeps the last good value and marks it stale.
         """
         pass
@@ -12,16 +12,84 @@ class Config:
     # Kafka
     KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
     KAFKA_TOPIC_TASKS = os.getenv("KAFKA_TOPIC_TASKS", "agent-tasks")
+    KAFKA_TOPIC_LOGS = os.getenv("KAFKA_TOPIC_LOGS", "agent-logs")
+    # How long partition and consumer-group metadata is reused before refreshing
+    KAFKA_METADATA_TTL_SECONDS = float(os.getenv("KAFKA_METADATA_TTL_SECONDS", "60"))
     
     # LiteLLM
     LITELLM_URL = os.getenv("LITELLM_URL", "http://localhost:4000")
     LITELLM_MASTER_KEY = os.getenv("LITELLM_MASTER_KEY")
+    # rpm/tpm are averaged over this rolling window of usage-counter samples
+    LITELLM_RATE_WINDOW_SECONDS = float(os.getenv("LITELLM_RATE_WINDOW_SECONDS", "60"))
+    LITELLM_MODEL_INFO_TTL_SECONDS = float(os.getenv("LITELLM_MODEL_INFO_TTL_SECONDS", "300"))
     
     # K8s
     # Assumes in-cluster config or KUBECONFIG if local
+    K8S_LIST_PAGE_SIZE = int(os.getenv("K8S_LIST_PAGE_SIZE", "500"))
+    # "poll" re-lists every cycle, "watch" serves collect() from an informer cache
+    K8S_COLLECTOR_MODE = os.getenv("K8S_COLLECTOR_MODE", "poll")
+    # Namespaces to observe, comma-separated; "<kube context>/<namespace>" targets another cluster
+    K8S_TARGETS = [t.strip() for t in os.getenv("K8S_TARGETS", "oracle-monitor").split(",") if t.strip()]
+    # Reported as `cluster` on workload entries collected without a kube context
+    K8S_CLUSTER_NAME = os.getenv("K8S_CLUSTER_NAME", "default")
+    K8S_WATCH_TIMEOUT_SECONDS = int(os.getenv("K8S_WATCH_TIMEOUT_SECONDS", "300"))
+    # metrics-server scrape interval; PodMetrics are not re-fetched more often than this
+    K8S_METRICS_RESOLUTION_SECONDS = float(os.getenv("K8S_METRICS_RESOLUTION_SECONDS", "15"))
+    K8S_METRICS_RETRY_SECONDS = float(os.getenv("K8S_METRICS_RETRY_SECONDS", "60"))
     
     # Agent API
     AGENT_API_URL = os.getenv("AGENT_API_URL", "http://localhost:8080")
     
     # Orchestrator
     COLLECTOR_INTERVAL_SECONDS = int(os.getenv("COLLECTOR_INTERVAL_SECONDS", "10"))
+    # Run collectors concurrently; each one gets its own deadline per cycle
+    COLLECTOR_CONCURRENT = os.getenv("COLLECTOR_CONCURRENT", "true").lower() == "true"
+    COLLECTOR_DEADLINE_SECONDS = float(os.getenv("COLLECTOR_DEADLINE_SECONDS", "8"))
+    # "scheduled" polls each collector on its own interval; "tick" collects everything every cycle
+    COLLECTOR_SCHEDULE = os.getenv("COLLECTOR_SCHEDULE", "scheduled")
+    # Shorten a collector's interval when its output changes, back off while it is stable
+    COLLECTOR_ADAPTIVE = os.getenv("COLLECTOR_ADAPTIVE", "true").lower() == "true"
+    # Scheduled mode only: publish a snapshot as soon as a section changes, but no more often than this.
+    # Defaults to COLLECTOR_INTERVAL_SECONDS, i.e. one snapshot per interval.
+    SNAPSHOT_MIN_INTERVAL_SECONDS = float(os.getenv("SNAPSHOT_MIN_INTERVAL_SECONDS", str(COLLECTOR_INTERVAL_SECONDS)))
+    
+    # Snapshot storage: "full" writes every state, "delta" writes keyframes plus merge patches
+    SNAPSHOT_STORAGE_MODE = os.getenv("SNAPSHOT_STORAGE_MODE", "full")
+    SNAPSHOT_KEYFRAME_INTERVAL = int(os.getenv("SNAPSHOT_KEYFRAME_INTERVAL", "30"))
+    # Store a state-less heartbeat row when nothing but id/timestamp changed since the last stored state
+    SNAPSHOT_DEDUPE = os.getenv("SNAPSHOT_DEDUPE", "true").lower() == "true"
+    # Snapshots are written by a background thread; failed batches spill here and are replayed
+    SNAPSHOT_WRITE_QUEUE_SIZE = int(os.getenv("SNAPSHOT_WRITE_QUEUE_SIZE", "100"))
+    SNAPSHOT_WRITE_BATCH_SIZE = int(os.getenv("SNAPSHOT_WRITE_BATCH_SIZE", "50"))
+    SNAPSHOT_WRITE_RETRY_SECONDS = float(os.getenv("SNAPSHOT_WRITE_RETRY_SECONDS", "5"))
+    SNAPSHOT_SPILL_DIR = os.getenv("SNAPSHOT_SPILL_DIR", "/tmp/oracle-monitor/spill")
+    
+    # Log collector: agent_logs rows are bulk-inserted per batch, offsets committed after each insert
+    LOG_BATCH_MAX_ROWS = int(os.getenv("LOG_BATCH_MAX_ROWS", "500"))
+    LOG_BATCH_MAX_LATENCY_MS = float(os.getenv("LOG_BATCH_MAX_LATENCY_MS", "200"))
+    # Failed inserts are retried after LOG_INSERT_RETRY_SECONDS, doubling up to LOG_INSERT_MAX_RETRY_SECONDS
+    LOG_INSERT_RETRY_SECONDS = float(os.getenv("LOG_INSERT_RETRY_SECONDS", "2"))
+    LOG_INSERT_MAX_RETRY_SECONDS = float(os.getenv("LOG_INSERT_MAX_RETRY_SECONDS", "60"))
+    # Number of flushes in which a row the database rejects is retried on its own before it is dropped
+    LOG_INSERT_MAX_ATTEMPTS = int(os.getenv("LOG_INSERT_MAX_ATTEMPTS", "3"))
+    # Consumers in the log-sync-group per log collector; "process" workers also spread across cores
+    LOG_COLLECTOR_WORKERS = int(os.getenv("LOG_COLLECTOR_WORKERS", "1"))
+    LOG_COLLECTOR_WORKER_MODE = os.getenv("LOG_COLLECTOR_WORKER_MODE", "thread")
+    
+    # Local memory-mapped ring of numeric series (pod usage, queue depth, model rpm/tpm)
+    TIMESERIES_ENABLED = os.getenv("TIMESERIES_ENABLED", "true").lower() == "true"
+    TIMESERIES_DIR = os.getenv("TIMESERIES_DIR", "/tmp/oracle-monitor/timeseries")
+    # Slots per series (8640 = 24h at a 10s interval) and the number of series kept
+    TIMESERIES_CAPACITY = int(os.getenv("TIMESERIES_CAPACITY", "8640"))
+    TIMESERIES_MAX_SERIES = int(os.getenv("TIMESERIES_MAX_SERIES", "1024"))
+    
+    # Prometheus-format self-metrics served by the snapshot collector at :<port>/metrics; 0 disables
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9102"))
+    
+    # Sharded K8s collection. Empty members: one process collects every target itself.
+    # Otherwise each member (collectors.shard) owns the targets the hash ring gives it and
+    # publishes them to workload_shards; the snapshot collector merges those rows.
+    COLLECTOR_SHARD_MEMBERS = [m.strip() for m in os.getenv("COLLECTOR_SHARD_MEMBERS", "").split(",") if m.strip()]
+    COLLECTOR_SHARD_ID = os.getenv("COLLECTOR_SHARD_ID", os.getenv("HOSTNAME", ""))
+    # A shard row older than this marks the workload section stale
+    COLLECTOR_SHARD_MAX_AGE_SECONDS = float(os.getenv("COLLECTOR_SHARD_MAX_AGE_SECONDS", "60"))
@@ -0,0 +1,209 @@
+"""
+Self-instrumentation for the collector process.
+
+A small stdlib-only take on the Prometheus client: counters, gauges and
+histograms with labels, rendered in the text exposition format by
+`start_metrics_server()`. Recording is a dict lookup plus a locked add, so it
+is cheap enough for every collect() call. All collector metrics are declared
+at the bottom of this module.
+"""
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """Read the value from `fn` at scrape time instead of on the hot path."""
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = dict(self._values)
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            try:
+                items[key] = fn()
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items.items()]
+
+# Seconds; covers a fast cache read up to a collector blowing through its deadline
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(counts), total[0]) for k, (counts, total) in self._series.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def start_metrics_server(port: int, registry: Optional[Registry] = None) -> ThreadingHTTPServer:
+    """Serve `registry` on http://0.0.0.0:<port>/metrics from a daemon thread."""
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+# Collector metrics
+COLLECT_SECONDS = REGISTRY.register(Histogram(
+    "oracle_collector_collect_seconds", "Duration of Collector.collect() calls.", ["collector"]))
+COLLECT_ERRORS = REGISTRY.register(Counter(
+    "oracle_collector_errors_total", "collect() calls that failed.", ["collector"]))
+MISSED_DEADLINES = REGISTRY.register(Counter(
+    "oracle_collector_missed_deadlines_total", "collect() calls that overran the collector's deadline.", ["collector"]))
+VALIDATE_SECONDS = REGISTRY.register(Histogram(
+    "oracle_snapshot_validate_seconds", "Schema validation time per snapshot."))
+SNAPSHOT_BYTES = REGISTRY.register(Gauge(
+    "oracle_snapshot_bytes", "Canonical JSON size of the last snapshot's sections.", ["section"]))
+SNAPSHOT_ROWS = REGISTRY.register(Counter(
+    "oracle_snapshot_rows_total", "Snapshot rows queued for storage, by kind.", ["kind"]))
+CYCLE_SECONDS = REGISTRY.register(Histogram(
+    "oracle_cycle_seconds", "End-to-end time to build, record and queue one snapshot."))
+INSERT_SECONDS = REGISTRY.register(Histogram(
+    "oracle_storage_insert_seconds", "Duration of each batched Supabase insert.", ["writer"]))
+INSERT_ERRORS = REGISTRY.register(Counter(
+    "oracle_storage_insert_errors_total", "Failed Supabase inserts.", ["writer"]))
+SPILLED_ROWS = REGISTRY.register(Counter(
+    "oracle_storage_spilled_rows_total", "Rows spilled to local disk.", ["writer"]))
+WRITE_QUEUE = REGISTRY.register(Gauge(
+    "oracle_storage_queue_rows", "Rows waiting in the write-behind queue.", ["writer"]))
+SPILL_SEGMENTS = REGISTRY.register(Gauge(
+    "oracle_storage_spill_segments", "Spill segments waiting to be replayed.", ["writer"]))
+
+def timed_collect(section: str, collector) -> Any:
+    """Call collector.collect(), recording its latency, errors and deadline overruns."""
+    started = time.perf_counter()
+    try:
+        return collector.collect()
+    except Exception:
+        COLLECT_ERRORS.inc(collector=section)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        COLLECT_SECONDS.observe(elapsed, collector=section)
+        if elapsed > collector.deadline_seconds:
+            MISSED_DEADLINES.inc(collector=section)
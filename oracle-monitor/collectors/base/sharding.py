@@ -0,0 +1,35 @@
+"""
+Deterministic assignment of collection targets to collector instances.
+
+Each member gets `vnodes` points on a hash ring and a target belongs to the
+first member point at or after the target's own hash. Every instance builds
+the same ring from the same membership list, so they agree on ownership
+without talking to each other, and adding or removing a member only moves
+about 1/N of the targets.
+"""
+import bisect
+import hashlib
+from typing import Dict, Iterable, List
+
+def _point(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+class HashRing:
+    def __init__(self, members: Iterable[str], vnodes: int = 64):
+        self.members = sorted(set(members))
+        if not self.members:
+            raise ValueError("HashRing needs at least one member")
+        ring = sorted((_point(f"{member}#{i}"), member) for member in self.members for i in range(vnodes))
+        self._points = [point for point, _ in ring]
+        self._owners = [member for _, member in ring]
+
+    def owner(self, key: str) -> str:
+        index = bisect.bisect_left(self._points, _point(key)) % len(self._points)
+        return self._owners[index]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """member -> sorted keys it owns; members owning nothing get an empty list."""
+        assignment: Dict[str, List[str]] = {member: [] for member in self.members}
+        for key in sorted(set(keys)):
+            assignment[self.owner(key)].append(key)
+        return assignment
@@ -1,64 +1,245 @@
-from typing import Dict, Any, List
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
 from kubernetes import client, config
+from kubernetes.utils import parse_quantity
 from collectors.base.collector import Collector
+from collectors.base.config import Config
+from collectors.k8s_collector.informer import Informer
 import os
 
+class PodLabelIndex:
+    """Inverted index of pods by (label, value) so selectors resolve without API calls."""
+
+    def __init__(self, pods: List[Any]):
+        self.pods = pods
+        self._by_label: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for i, pod in enumerate(pods):
+            for key, value in (pod.metadata.labels or {}).items():
+                self._by_label[(key, value)].append(i)
+
+    def match(self, match_labels: Optional[Dict[str, str]]) -> List[Any]:
+        """Return the pods carrying every label in match_labels, in list order."""
+        if not match_labels:
+            return []
+        postings = [self._by_label.get(item, []) for item in match_labels.items()]
+        # Walk the shortest posting list and check the remaining labels on each pod
+        shortest = min(postings, key=len)
+        matched = []
+        for i in shortest:
+            labels = self.pods[i].metadata.labels
+            if all(labels.get(k) == v for k, v in match_labels.items()):
+                matched.append(self.pods[i])
+        return matched
+
+def _iso(ts: Optional[datetime]) -> Optional[str]:
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.isoformat()
+
+def _latest(*timestamps: Optional[datetime]) -> Optional[datetime]:
+    present = [ts for ts in timestamps if ts is not None]
+    return max(present) if present else None
+
+def _pod_usage(pod_metrics: Dict[str, Any]) -> Tuple[float, float]:
+    """Sum container usage of one PodMetrics item into (millicores, MiB)."""
+    cpu = memory = 0.0
+    for container in pod_metrics.get("containers", []):
+        usage = container.get("usage", {})
+        cpu += float(parse_quantity(usage.get("cpu", "0")) * 1000)
+        memory += float(parse_quantity(usage.get("memory", "0"))) / (1024 * 1024)
+    return round(cpu, 2), round(memory, 2)
+
+def _rolled_out_at(dep) -> Optional[datetime]:
+    """Time the current ReplicaSet finished rolling out, per the Progressing condition."""
+    for cond in (dep.status.conditions if dep.status else None) or []:
+        if cond.type == "Progressing" and cond.reason == "NewReplicaSetAvailable":
+            return cond.last_update_time
+    return None
+
 class K8sCollector(Collector):
-    def __init__(self):
+    # Deployment specs rarely change; pod usage only moves at the metrics-server resolution
+    interval_seconds = 15.0
+    min_interval_seconds = 5.0
+    max_interval_seconds = 60.0
+
+    def __init__(self, namespace: str = "oracle-monitor", core_api=None, apps_api=None,
+                 mode: Optional[str] = None, metrics_api=None, cluster: Optional[str] = None):
+        """`cluster` is a kubeconfig context; None uses the in-cluster config or the current context."""
+        api_client = None
+        if core_api is None or apps_api is None:
+            if cluster:
+                try:
+                    api_client = config.new_client_from_config(context=cluster)
+                except Exception as e:
+                    print(f"Warning: Could not load kubeconfig context {cluster}: {e}")
+            else:
+                try:
+                    # Try loading in-cluster config first, then local kubeconfig
+                    config.load_incluster_config()
+                except config.ConfigException:
+                    try:
+                        config.load_kube_config()
+                    except Exception:
+                        print("Warning: Could not load Kubernetes config. K8s collector will return empty data.")
+
+        self.v1 = core_api or client.CoreV1Api(api_client)
+        self.apps_v1 = apps_api or client.AppsV1Api(api_client)
+        self.metrics_api = metrics_api or client.CustomObjectsApi(api_client)
+        self.namespace = namespace
+        self.cluster = cluster or Config.K8S_CLUSTER_NAME
+        self.page_size = Config.K8S_LIST_PAGE_SIZE
+
+        # pod name -> (cpu millicores, memory MiB, sample time) from metrics.k8s.io
+        self._pod_metrics: Dict[str, Tuple[float, float, Optional[str]]] = {}
+        self._metrics_signature: Optional[frozenset] = None
+        self.metrics_generation = 0
+        # Monotonic time before which a new PodMetrics fetch cannot return anything new
+        self._next_metrics_fetch = 0.0
+
+        self.mode = mode or Config.K8S_COLLECTOR_MODE
+        self.deployment_informer = None
+        self.pod_informer = None
+        # Workload built from the informer caches, keyed by their generations
+        self._cached_workload: List[Dict[str, Any]] = []
+        self._cached_generations: Optional[Tuple[int, int, int]] = None
+        if self.mode == "watch":
+            self.deployment_informer = Informer(
+                self.apps_v1.list_namespaced_deployment, self.namespace,
+                page_size=self.page_size, watch_timeout_seconds=Config.K8S_WATCH_TIMEOUT_SECONDS
+            )
+            self.pod_informer = Informer(
+                self.v1.list_namespaced_pod, self.namespace,
+                page_size=self.page_size, watch_timeout_seconds=Config.K8S_WATCH_TIMEOUT_SECONDS
+            )
+            self.deployment_informer.start()
+            self.pod_informer.start()
+
+    def _list_pods(self) -> List[Any]:
+        """List every pod in the namespace, following continue tokens for large namespaces."""
+        pods = []
+        continue_token = None
+        while True:
+            kwargs = {"limit": self.page_size}
+            if continue_token:
+                kwargs["_continue"] = continue_token
+            page = self.v1.list_namespaced_pod(self.namespace, **kwargs)
+            pods.extend(page.items)
+            continue_token = page.metadata._continue if page.metadata else None
+            if not continue_token:
+                return pods
+
+    def _refresh_pod_metrics(self):
+        """
+        Fetch PodMetrics for the whole namespace in one call and index them by pod name.
+
+        metrics-server only produces a new sample every resolution interval, so the
+        fetch is skipped until then, and a result with the same sample set as last
+        time is not re-parsed. If the metrics API is unavailable the last values are
+        kept and the fetch is retried later.
+        """
+        now = time.monotonic()
+        if now < self._next_metrics_fetch:
+            return
+
         try:
-            # Try loading in-cluster config first, then local kubeconfig
-            config.load_incluster_config()
-        except config.ConfigException:
-            try:
-                config.load_kube_config()
-            except Exception:
-                print("Warning: Could not load Kubernetes config. K8s collector will return empty data.")
-        
-        self.v1 = client.CoreV1Api()
-        self.apps_v1 = client.AppsV1Api()
-        self.namespace = "oracle-monitor"
+            response = self.metrics_api.list_namespaced_custom_object(
+                "metrics.k8s.io", "v1beta1", self.namespace, "pods"
+            )
+        except Exception as e:
+            print(f"Warning: Could not fetch pod metrics: {e}")
+            self._next_metrics_fetch = now + Config.K8S_METRICS_RETRY_SECONDS
+            return
+
+        self._next_metrics_fetch = now + Config.K8S_METRICS_RESOLUTION_SECONDS
+        items = response.get("items", [])
+        signature = frozenset((item["metadata"]["name"], item.get("timestamp")) for item in items)
+        if signature == self._metrics_signature:
+            return
+
+        pod_metrics = {}
+        for item in items:
+            cpu, memory = _pod_usage(item)
+            pod_metrics[item["metadata"]["name"]] = (cpu, memory, item.get("timestamp"))
+        self._pod_metrics = pod_metrics
+        self._metrics_signature = signature
+        self.metrics_generation += 1
+
+    def _informers_synced(self) -> bool:
+        return self.deployment_informer.has_synced() and self.pod_informer.has_synced()
 
     def collect(self) -> List[Dict[str, Any]]:
+        # Raises when the API server can't be listed, so the last good workload is kept and marked stale
+        self._refresh_pod_metrics()
+
+        if self.mode == "watch" and self._informers_synced():
+            return self._collect_from_cache()
+
+        deployments = self.apps_v1.list_namespaced_deployment(self.namespace).items
+        # One namespace-wide pod list instead of one selector query per deployment
+        pods = self._list_pods()
+        return self._build_workload(deployments, pods)
+
+    def _collect_from_cache(self) -> List[Dict[str, Any]]:
+        """Serve collect() from the informer caches, rebuilding only after a watch event or new metrics."""
+        generations = (
+            self.deployment_informer.generation,
+            self.pod_informer.generation,
+            self.metrics_generation,
+        )
+        if generations != self._cached_generations:
+            self._cached_workload = self._build_workload(
+                self.deployment_informer.items(), self.pod_informer.items()
+            )
+            self._cached_generations = generations
+        return self._cached_workload
+
+    def _build_workload(self, deployments: List[Any], pods: List[Any]) -> List[Dict[str, Any]]:
         workload_state = []
-        try:
-            deployments = self.apps_v1.list_namespaced_deployment(self.namespace)
-            
-            for dep in deployments.items:
-                dep_name = dep.metadata.name
-                
-                # Find pods for this deployment
-                label_selector = ",".join([f"{k}={v}" for k, v in dep.spec.selector.match_labels.items()])
-                pods = self.v1.list_namespaced_pod(self.namespace, label_selector=label_selector)
-                
-                pod_list = []
-                for pod in pods.items:
-                    # Calculate basic CPU/Mem usage (mocked here as metrics API needs metrics-server)
-                    # In a real scenario, we'd query the metrics API or Prometheus
-                    pod_data = {
-                        "pod_id": pod.metadata.name,
-                        "status": pod.status.phase,
-                        "memory": 0, # Placeholder
-                        "cpu": 0,    # Placeholder
-                        "restarts": sum(cs.restart_count for cs in pod.status.container_statuses) if pod.status.container_statuses else 0,
-                        "updated_at": "2024-01-01T00:00:00Z"
-                    }
-                    pod_list.append(pod_data)
-                
-                workload_state.append({
-                    "deployment_name": dep_name,
-                    "max_pods": dep.spec.replicas or 1,
-                    "live": {
-                        "active_pods": len(pod_list),
-                        "updated_at": "2024-01-01T00:00:00Z", # Placeholder
-                        "image": dep.spec.template.spec.containers[0].image,
-                        "rolled_out_at": "2024-01-01T00:00:00Z" # Placeholder
-                    },
-                    "pods": pod_list
-                })
-                
-        except Exception as e:
-            print(f"Error collecting K8s data: {e}")
-            # Return empty list on error to prevent crash
-            return []
+        now = datetime.now(timezone.utc).isoformat()
+        pod_index = PodLabelIndex(pods)
+
+        for dep in deployments:
+            dep_name = dep.metadata.name
+
+            # Find pods for this deployment
+            dep_pods = pod_index.match(dep.spec.selector.match_labels)
+
+            pod_list = []
+            for pod in dep_pods:
+                # Joined from the namespace-wide PodMetrics fetch; zero until metrics-server has a sample
+                cpu, memory, sampled_at = self._pod_metrics.get(pod.metadata.name, (0, 0, None))
+                conditions = pod.status.conditions or []
+                changed_at = _latest(*(c.last_transition_time for c in conditions)) \
+                    or pod.status.start_time or pod.metadata.creation_timestamp
+                pod_data = {
+                    "pod_id": pod.metadata.name,
+                    "status": pod.status.phase,
+                    "memory": memory,
+                    "cpu": cpu,
+                    "restarts": sum(cs.restart_count for cs in pod.status.container_statuses) if pod.status.container_statuses else 0,
+                    "updated_at": sampled_at or _iso(changed_at) or now
+                }
+                pod_list.append(pod_data)
+
+            dep_conditions = (dep.status.conditions if dep.status else None) or []
+            dep_updated_at = _latest(*(c.last_update_time for c in dep_conditions)) \
+                or dep.metadata.creation_timestamp
+            workload_state.append({
+                "deployment_name": dep_name,
+                "namespace": self.namespace,
+                "cluster": self.cluster,
+                "max_pods": dep.spec.replicas or 1,
+                "live": {
+                    "active_pods": len(pod_list),
+                    "updated_at": _iso(dep_updated_at) or now,
+                    "image": dep.spec.template.spec.containers[0].image,
+                    "rolled_out_at": _iso(_rolled_out_at(dep) or dep.metadata.creation_timestamp) or now
+                },
+                "pods": pod_list
+            })
 
         return workload_state
@@ -0,0 +1,128 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+HTTP_GONE = 410
+
+class Informer:
+    """
+    Keeps a local cache of one namespaced resource kind in sync with the API server.
+
+    The cache is seeded with a paged list, then kept current from a watch that
+    resumes from the last seen resourceVersion. When the server reports that
+    version as expired (410 Gone) the informer relists from scratch.
+    Readers only ever touch the in-memory cache.
+    """
+
+    def __init__(self, list_func: Callable, namespace: str, page_size: int = 500,
+                 watch_timeout_seconds: int = 300, backoff_seconds: float = 5.0):
+        self.list_func = list_func
+        self.namespace = namespace
+        self.page_size = page_size
+        self.watch_timeout_seconds = watch_timeout_seconds
+        self.backoff_seconds = backoff_seconds
+
+        self.resource_version: Optional[str] = None
+        # Bumped on every cache mutation so readers can cheaply detect changes
+        self.generation = 0
+
+        self._cache: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watch: Optional[watch.Watch] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"informer-{self.list_func.__name__}")
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def has_synced(self) -> bool:
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> bool:
+        return self._synced.wait(timeout)
+
+    def items(self) -> List[Any]:
+        with self._lock:
+            return list(self._cache.values())
+
+    def _relist(self):
+        objects = {}
+        continue_token = None
+        while True:
+            kwargs = {"limit": self.page_size}
+            if continue_token:
+                kwargs["_continue"] = continue_token
+            page = self.list_func(self.namespace, **kwargs)
+            for obj in page.items:
+                objects[obj.metadata.name] = obj
+            continue_token = page.metadata._continue
+            if not continue_token:
+                break
+
+        with self._lock:
+            self._cache = objects
+            self.resource_version = page.metadata.resource_version
+            self.generation += 1
+        self._synced.set()
+
+    def _watch_once(self):
+        self._watch = watch.Watch()
+        stream = self._watch.stream(
+            self.list_func,
+            self.namespace,
+            resource_version=self.resource_version,
+            timeout_seconds=self.watch_timeout_seconds,
+            allow_watch_bookmarks=True,
+        )
+        for event in stream:
+            if self._stopped.is_set():
+                return
+
+            event_type = event["type"]
+            if event_type == "ERROR":
+                status = event["raw_object"]
+                if status.get("code") == HTTP_GONE:
+                    self.resource_version = None
+                    return
+                raise ApiException(status=status.get("code"), reason=status.get("message"))
+
+            obj = event["object"]
+            if event_type == "BOOKMARK":
+                # Bookmarks carry only a newer resourceVersion to resume from
+                self.resource_version = obj["metadata"]["resourceVersion"] if isinstance(obj, dict) \
+                    else obj.metadata.resource_version
+                continue
+
+            with self._lock:
+                if event_type == "DELETED":
+                    self._cache.pop(obj.metadata.name, None)
+                else:
+                    self._cache[obj.metadata.name] = obj
+                self.resource_version = obj.metadata.resource_version
+                self.generation += 1
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self._watch_once()
+            except ApiException as e:
+                if e.status == HTTP_GONE:
+                    # Our resourceVersion fell out of the server's window: relist
+                    self.resource_version = None
+                    continue
+                print(f"Informer watch for {self.list_func.__name__} failed: {e}")
+                self._stopped.wait(self.backoff_seconds)
+            except Exception as e:
+                print(f"Informer watch for {self.list_func.__name__} failed: {e}")
+                self._stopped.wait(self.backoff_seconds)
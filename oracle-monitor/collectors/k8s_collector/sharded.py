@@ -0,0 +1,156 @@
+"""
+Workload collection across several namespaces and clusters.
+
+A target is "<namespace>" (in-cluster / current context) or
+"<kube context>/<namespace>". `MultiTargetCollector` runs one K8sCollector per
+target. When collection is sharded, every member of COLLECTOR_SHARD_MEMBERS
+runs `python -m collectors.shard` for the targets the hash ring assigns it and
+upserts its output into the `workload_shards` table; `ShardMerger` is the
+snapshot collector's workload section and merges those rows back into one list.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from collectors.base.collector import Collector
+from collectors.base.config import Config
+from collectors.base.metrics import COLLECT_ERRORS
+from collectors.k8s_collector.collector import K8sCollector
+
+def parse_target(target: str) -> Tuple[Optional[str], str]:
+    """'ctx/ns' -> ('ctx', 'ns'); 'ns' -> (None, 'ns'). Contexts may contain '/', namespaces can't."""
+    if "/" in target:
+        cluster, namespace = target.rsplit("/", 1)
+        return cluster, namespace
+    return None, target
+
+def _epoch(ts: str) -> float:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+
+class MultiTargetCollector(Collector):
+    interval_seconds = K8sCollector.interval_seconds
+    min_interval_seconds = K8sCollector.min_interval_seconds
+    max_interval_seconds = K8sCollector.max_interval_seconds
+
+    def __init__(self, targets: List[str], mode: Optional[str] = None):
+        self.targets = sorted(set(targets))
+        self.collectors: Dict[str, K8sCollector] = {}
+        for target in self.targets:
+            cluster, namespace = parse_target(target)
+            self.collectors[target] = K8sCollector(namespace=namespace, mode=mode, cluster=cluster)
+        # Targets are independent API servers/namespaces, so list them in parallel
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(8, len(self.targets))),
+                                            thread_name_prefix="k8s-target")
+        # Last workload each target returned; a failing target keeps it
+        self._last: Dict[str, List[Dict[str, Any]]] = {target: [] for target in self.targets}
+        self.failed: List[str] = []
+
+    @staticmethod
+    def _collect_target(collector: K8sCollector):
+        try:
+            return collector.collect()
+        except Exception as e:
+            return e
+
+    def collect_by_target(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Workload per target. A target whose collect() raised keeps its last
+        value, is counted under collector="workload:<target>" and is listed in
+        `failed`; raises only when every target failed.
+        """
+        parts = dict(zip(self.collectors, self._executor.map(self._collect_target, self.collectors.values())))
+        self.failed = []
+        for target, part in parts.items():
+            if isinstance(part, Exception):
+                print(f"Error collecting K8s data for {target}: {part}")
+                COLLECT_ERRORS.inc(collector=f"workload:{target}")
+                self.failed.append(target)
+            else:
+                self._last[target] = part
+        if self.failed and len(self.failed) == len(parts):
+            raise parts[self.failed[0]]
+        return dict(self._last)
+
+    def collect(self) -> List[Dict[str, Any]]:
+        workload = []
+        for part in self.collect_by_target().values():
+            workload.extend(part)
+        return workload
+
+    @property
+    def partial(self) -> bool:
+        # Some targets failed and contribute their last value; the snapshot lists workload as stale
+        return bool(self.failed)
+
+def merge_workloads(rows: List[Dict[str, Any]], targets: List[str], max_age_seconds: float,
+                    now: Optional[float] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Combine workload_shards rows (workload keyed by target) into one list.
+
+    Each target is taken from the freshest row that collected it, so a target
+    that moved during a membership change is neither lost nor doubled; a row
+    that lists it in `failed` is used only when no row collected it. Returns
+    the merged list and the targets with no successful collection newer than
+    `max_age_seconds`; those still contribute their last known data.
+    """
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    # target -> (collected, collected_at, row); successful collections sort above failed ones
+    best: Dict[str, Tuple[bool, float, Dict[str, Any]]] = {}
+    for row in rows:
+        collected_at = _epoch(row["collected_at"])
+        failed = set(row.get("failed") or [])
+        for target in row.get("targets") or []:
+            candidate = (target not in failed, collected_at, row)
+            if target not in best or candidate[:2] > best[target][:2]:
+                best[target] = candidate
+
+    merged: List[Dict[str, Any]] = []
+    missing: List[str] = []
+    for target in sorted(set(targets)):
+        entry = best.get(target)
+        if entry is None or not entry[0] or now - entry[1] > max_age_seconds:
+            missing.append(target)
+        if entry is not None:
+            merged.extend((entry[2].get("workload") or {}).get(target) or [])
+    return merged, missing
+
+class ShardMerger(Collector):
+    """The workload section when K8s collection is sharded: reads and merges workload_shards."""
+
+    interval_seconds = K8sCollector.interval_seconds
+    min_interval_seconds = K8sCollector.min_interval_seconds
+    max_interval_seconds = K8sCollector.max_interval_seconds
+
+    def __init__(self, members: List[str], targets: List[str], supabase=None):
+        if supabase is None:
+            from supabase import create_client
+            supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_ROLE_KEY or Config.SUPABASE_KEY)
+        self.supabase = supabase
+        self.members = sorted(set(members))
+        self.targets = sorted(set(targets))
+        self.missing: List[str] = []
+
+    def collect(self) -> List[Dict[str, Any]]:
+        # Raises when Supabase is unreachable, so the last merged value is kept and marked stale
+        rows = self.supabase.table("workload_shards") \
+            .select("shard_id, targets, failed, workload, collected_at") \
+            .in_("shard_id", self.members) \
+            .execute().data
+        workload, self.missing = merge_workloads(rows, self.targets, Config.COLLECTOR_SHARD_MAX_AGE_SECONDS)
+        if self.missing:
+            print(f"Warning: no fresh shard data for {', '.join(self.missing)}")
+        return workload
+
+    @property
+    def partial(self) -> bool:
+        # Some targets failed or have no fresh shard row; the snapshot lists workload as stale
+        return bool(self.missing)
+
+def build_workload_collector(supabase=None) -> Collector:
+    """Workload collector for the snapshot process, per the K8S_TARGETS / COLLECTOR_SHARD_* config."""
+    if Config.COLLECTOR_SHARD_MEMBERS:
+        return ShardMerger(Config.COLLECTOR_SHARD_MEMBERS, Config.K8S_TARGETS, supabase)
+    if len(Config.K8S_TARGETS) == 1:
+        cluster, namespace = parse_target(Config.K8S_TARGETS[0])
+        return K8sCollector(namespace=namespace, cluster=cluster)
+    return MultiTargetCollector(Config.K8S_TARGETS)
@@ -1,35 +1,162 @@
-from typing import Dict, Any, List
+import re
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from collectors.base.collector import Collector
 from collectors.base.config import Config
 
+# Prometheus counters LiteLLM exports on /metrics (names differ between LiteLLM releases)
+REQUEST_COUNTERS = ("litellm_requests_metric_total", "litellm_proxy_total_requests_metric_total")
+TOKEN_COUNTERS = ("litellm_total_tokens_total", "litellm_total_tokens_metric_total")
+
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def parse_model_counters(text: str) -> Dict[str, Tuple[float, float]]:
+    """Sum the request and token counters per `model` label: model -> (requests, tokens)."""
+    totals: Dict[str, List[float]] = {}
+    for line in text.splitlines():
+        if not line.startswith("litellm_"):
+            continue
+        match = _SAMPLE_RE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        if name in REQUEST_COUNTERS:
+            slot = 0
+        elif name in TOKEN_COUNTERS:
+            slot = 1
+        else:
+            continue
+        model = dict(_LABEL_RE.findall(labels or "")).get("model")
+        if not model:
+            continue
+        totals.setdefault(model, [0.0, 0.0])[slot] += float(value)
+    return {model: (r, t) for model, (r, t) in totals.items()}
+
+class RateWindow:
+    """
+    Ring buffer of (time, requests_total, tokens_total) samples for one model.
+
+    Rates are the counter increase across the samples still inside the window,
+    so each poll costs O(1) amortised instead of a rescan of the whole history.
+    """
+
+    def __init__(self, window_seconds: float, max_samples: int):
+        self.window_seconds = window_seconds
+        self.samples: deque = deque(maxlen=max_samples)
+
+    def add(self, ts: float, requests_total: float, tokens_total: float):
+        if self.samples and (requests_total < self.samples[-1][1] or tokens_total < self.samples[-1][2]):
+            # Counter went backwards: the proxy restarted, start a fresh window
+            self.samples.clear()
+        self.samples.append((ts, requests_total, tokens_total))
+        while self.samples and ts - self.samples[0][0] > self.window_seconds:
+            self.samples.popleft()
+
+    def per_minute(self) -> Tuple[float, float]:
+        """Return (rpm, tpm) over the current window."""
+        if len(self.samples) < 2:
+            return 0.0, 0.0
+        t0, r0, k0 = self.samples[0]
+        t1, r1, k1 = self.samples[-1]
+        elapsed = t1 - t0
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return round((r1 - r0) * 60 / elapsed, 2), round((k1 - k0) * 60 / elapsed, 2)
+
 class LiteLLMCollector(Collector):
-    def __init__(self):
-        self.base_url = Config.LITELLM_URL
+    # Rate data is what users watch live; poll it every few seconds
+    interval_seconds = 2.0
+    min_interval_seconds = 2.0
+    max_interval_seconds = 10.0
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = (base_url or Config.LITELLM_URL).rstrip("/")
         self.master_key = Config.LITELLM_MASTER_KEY
 
+        # One keep-alive connection pool for every poll
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        if self.master_key:
+            self.session.headers["Authorization"] = f"Bearer {self.master_key}"
+
+        self.window_seconds = Config.LITELLM_RATE_WINDOW_SECONDS
+        self._windows: Dict[str, RateWindow] = {}
+
+        # Model limits change rarely; /model/info is re-read once per TTL
+        self._models: List[Dict[str, Any]] = []
+        self._aliases: Dict[str, str] = {}
+        self._models_expires_at = 0.0
+
+    def _refresh_models(self):
+        if time.monotonic() < self._models_expires_at:
+            return
+
+        response = self.session.get(f"{self.base_url}/model/info", timeout=5)
+        response.raise_for_status()
+
+        models = {}
+        aliases = {}
+        for entry in response.json().get("data", []):
+            name = entry.get("model_name")
+            if not name:
+                continue
+            params = entry.get("litellm_params") or {}
+            info = entry.get("model_info") or {}
+            model = models.setdefault(name, {
+                "model": name,
+                "provider": info.get("litellm_provider") or params.get("model", "unknown").split("/")[0],
+                "rpm_max": 0,
+                "tpm_max": 0,
+            })
+            # A model group with several deployments gets the sum of their limits
+            model["rpm_max"] += params.get("rpm") or info.get("rpm") or 0
+            model["tpm_max"] += params.get("tpm") or info.get("tpm") or 0
+            if info.get("max_input_tokens"):
+                model["input_context"] = int(info["max_input_tokens"])
+            if info.get("max_output_tokens"):
+                model["output_context"] = int(info["max_output_tokens"])
+
+            # Usage counters may be labelled with either the public or the underlying name
+            aliases[name] = name
+            if params.get("model"):
+                aliases[params["model"]] = name
+
+        self._models = list(models.values())
+        self._aliases = aliases
+        self._models_expires_at = time.monotonic() + Config.LITELLM_MODEL_INFO_TTL_SECONDS
+
+    def _record_usage(self):
+        response = self.session.get(f"{self.base_url}/metrics", timeout=5)
+        response.raise_for_status()
+        now = time.monotonic()
+
+        usage: Dict[str, List[float]] = {}
+        for label, (requests_total, tokens_total) in parse_model_counters(response.text).items():
+            name = self._aliases.get(label, label)
+            totals = usage.setdefault(name, [0.0, 0.0])
+            totals[0] += requests_total
+            totals[1] += tokens_total
+
+        max_samples = int(self.window_seconds / max(self.min_interval_seconds, 1)) + 2
+        for name, (requests_total, tokens_total) in usage.items():
+            window = self._windows.get(name)
+            if window is None:
+                window = self._windows[name] = RateWindow(self.window_seconds, max_samples)
+            window.add(now, requests_total, tokens_total)
+
     def collect(self) -> List[Dict[str, Any]]:
-        # In a real implementation, we would call LiteLLM's /spend or /health endpoints
-        # For this demo, we'll mock the response or try a basic health check
-        
-        # Mock data structure matching schema
-        # In reality: requests.get(f"{self.base_url}/model/info", headers={"Authorization": f"Bearer {self.master_key}"})
-        
-        return [
-            {
-                "model": "gpt-4",
-                "provider": "openai",
-                "rpm": 10,
-                "rpm_max": 50,
-                "tpm": 5000,
-                "tpm_max": 90000
-            },
-            {
-                "model": "gpt-3.5-turbo",
-                "provider": "openai",
-                "rpm": 100,
-                "rpm_max": 500,
-                "tpm": 20000,
-                "tpm_max": 200000
-            }
-        ]
+        # Raises when LiteLLM is unreachable, so the last good section is kept and marked stale
+        self._refresh_models()
+        self._record_usage()
+
+        litellm_state = []
+        for model in self._models:
+            window = self._windows.get(model["model"])
+            rpm, tpm = window.per_minute() if window else (0.0, 0.0)
+            litellm_state.append({**model, "rpm": rpm, "tpm": tpm})
+        return litellm_state
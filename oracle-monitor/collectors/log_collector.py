@@ -1,75 +1,124 @@
-import os
 import json
 import time
 import logging
-from kafka import KafkaConsumer
+import multiprocessing
+import threading
+from kafka import KafkaConsumer, ConsumerRebalanceListener
 from supabase import create_client, Client
 from collectors.base.config import Config
+from collectors.storage.log_sink import BatchingLogSink, consume
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("LogCollector")
 
-def main():
-    # Initialize Supabase
+class FlushOnRevoke(ConsumerRebalanceListener):
+    """Store and commit a worker's in-flight batch before its partitions move to another worker."""
+
+    def __init__(self, sink: BatchingLogSink, worker_id: int):
+        self.sink = sink
+        self.worker_id = worker_id
+
+    def on_partitions_revoked(self, revoked):
+        if not self.sink.flush():
+            # Not committed, so the new owner re-reads these records
+            self.sink.discard()
+        logger.info(f"Worker {self.worker_id} released partitions {sorted(p.partition for p in revoked)}")
+
+    def on_partitions_assigned(self, assigned):
+        logger.info(f"Worker {self.worker_id} owns partitions {sorted(p.partition for p in assigned)}")
+
+def run_worker(worker_id: int, stop_event):
+    """One consumer in the log-sync-group with its own Supabase client and batching sink."""
     supabase_url = Config.SUPABASE_URL
     supabase_key = Config.SUPABASE_SERVICE_ROLE_KEY
     if not supabase_url or not supabase_key:
         logger.error("Supabase credentials missing!")
         return
-    
+
     supabase: Client = create_client(supabase_url, supabase_key)
-    logger.info("Connected to Supabase.")
 
     # Initialize Kafka
     kafka_servers = Config.KAFKA_BOOTSTRAP_SERVERS
-    topic = os.getenv("KAFKA_TOPIC_LOGS", "agent-logs")
-    
-    logger.info(f"Connecting to Kafka at {kafka_servers} for topic {topic}...")
-    
+    topic = Config.KAFKA_TOPIC_LOGS
+
+    logger.info(f"Worker {worker_id} connecting to Kafka at {kafka_servers} for topic {topic}...")
+
     consumer = None
-    while consumer is None:
+    while consumer is None and not stop_event.is_set():
         try:
             consumer = KafkaConsumer(
-                topic,
                 bootstrap_servers=kafka_servers,
                 auto_offset_reset='latest',
-                enable_auto_commit=True,
+                # Offsets are committed by the sink after each successful bulk insert
+                enable_auto_commit=False,
                 group_id='log-sync-group',
                 value_deserializer=lambda x: json.loads(x.decode('utf-8'))
             )
         except Exception as e:
             logger.error(f"Failed to connect to Kafka: {e}. Retrying in 5s...")
             time.sleep(5)
+    if consumer is None:
+        return
 
-    logger.info("Log Collector started. Waiting for logs...")
+    def insert(rows):
+        supabase.table("agent_logs").insert(rows).execute()
+        logger.info(f"Worker {worker_id} stored {len(rows)} log(s).")
 
-    try:
-        for message in consumer:
-            log_data = message.value
-            logger.info(f"Received log: {log_data.get('message', 'no message')}")
-            
-            # Map Kafka log to Supabase schema
-            # Kafka log likely has: level, message, source, timestamp
-            try:
-                data = {
-                    "level": log_data.get("level", "info"),
-                    "message": log_data.get("message", ""),
-                    "source": log_data.get("source", "unknown"),
-                    "timestamp": log_data.get("timestamp", None),
-                    "task_id": log_data.get("task_id", None)
-                }
-                
-                # Insert into Supabase
-                supabase.table("agent_logs").insert(data).execute()
-                
-            except Exception as e:
-                logger.error(f"Failed to insert log into Supabase: {e}")
+    def dead_letter(row, error):
+        logger.error(f"Worker {worker_id} dropped a log row the database keeps rejecting ({error}): {row}")
+
+    sink = BatchingLogSink(
+        insert=insert,
+        commit=consumer.commit,
+        max_rows=Config.LOG_BATCH_MAX_ROWS,
+        max_latency_seconds=Config.LOG_BATCH_MAX_LATENCY_MS / 1000,
+        max_attempts=Config.LOG_INSERT_MAX_ATTEMPTS,
+        dead_letter=dead_letter,
+    )
+    consumer.subscribe([topic], listener=FlushOnRevoke(sink, worker_id))
 
+    try:
+        consume(consumer, sink, retry_seconds=Config.LOG_INSERT_RETRY_SECONDS,
+                max_retry_seconds=Config.LOG_INSERT_MAX_RETRY_SECONDS, should_stop=stop_event.is_set)
     except KeyboardInterrupt:
-        logger.info("Stopping Log Collector...")
+        sink.flush()
     finally:
-        if consumer:
-            consumer.close()
+        consumer.close()
+
+def main():
+    workers = max(1, Config.LOG_COLLECTOR_WORKERS)
+    use_processes = Config.LOG_COLLECTOR_WORKER_MODE == "process"
+    logger.info(f"Log Collector starting {workers} worker(s) ({'processes' if use_processes else 'threads'})...")
+
+    if workers == 1:
+        try:
+            run_worker(0, threading.Event())
+        except KeyboardInterrupt:
+            pass
+        logger.info("Stopping Log Collector...")
+        return
+
+    # Workers share one consumer group, so Kafka spreads the topic's partitions across them
+    if use_processes:
+        stop_event = multiprocessing.Event()
+        pool = [multiprocessing.Process(target=run_worker, args=(i, stop_event), name=f"log-worker-{i}")
+                for i in range(workers)]
+    else:
+        stop_event = threading.Event()
+        pool = [threading.Thread(target=run_worker, args=(i, stop_event), name=f"log-worker-{i}", daemon=True)
+                for i in range(workers)]
+    for worker in pool:
+        worker.start()
+
+    try:
+        while any(worker.is_alive() for worker in pool):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    logger.info("Stopping Log Collector...")
+    stop_event.set()
+    for worker in pool:
+        worker.join(timeout=10)
 
 if __name__ == "__main__":
     main()
@@ -2,9 +2,14 @@ import time
 import json
 import os
 import sys
+import threading
 from supabase import create_client, Client
 from collectors.aggregator.state_builder import StateBuilder
 from collectors.base.config import Config
+from collectors.base.metrics import CYCLE_SECONDS, SNAPSHOT_ROWS, start_metrics_server
+from collectors.storage.rows import SnapshotRows
+from collectors.storage.timeseries import TimeSeriesStore
+from collectors.storage.writer import WriteBehind
 import logging
 
 # Ensure we can import from root
@@ -34,7 +39,35 @@ def main():
     # Path to schema
     schema_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema", "oracle_state.schema.json")
     
+    if Config.METRICS_PORT:
+        start_metrics_server(Config.METRICS_PORT)
+        logger.info(f"Serving collector metrics on :{Config.METRICS_PORT}/metrics")
+
     builder = StateBuilder()
+    rows = SnapshotRows(Config.SNAPSHOT_STORAGE_MODE, Config.SNAPSHOT_KEYFRAME_INTERVAL, Config.SNAPSHOT_DEDUPE)
+
+    timeseries = None
+    if Config.TIMESERIES_ENABLED:
+        timeseries = TimeSeriesStore(Config.TIMESERIES_DIR, Config.TIMESERIES_CAPACITY, Config.TIMESERIES_MAX_SERIES)
+
+    writer = None
+    # Set by the writer thread when it drops rows; the loop resets `rows` itself, never mid-encode
+    rows_lost = threading.Event()
+    if supabase:
+        # Inserts run on a background thread so a slow or failing Supabase never delays collection.
+        # Upsert keeps replays of spilled rows idempotent.
+        writer = WriteBehind(
+            insert=lambda rows: supabase.table("system_snapshots")
+                .upsert(rows, on_conflict="snapshot_id", ignore_duplicates=True)
+                .execute(),
+            spill_dir=Config.SNAPSHOT_SPILL_DIR,
+            max_queue=Config.SNAPSHOT_WRITE_QUEUE_SIZE,
+            batch_size=Config.SNAPSHOT_WRITE_BATCH_SIZE,
+            retry_seconds=Config.SNAPSHOT_WRITE_RETRY_SECONDS,
+            # Later rows may build on a lost one; start over from a full row
+            on_drop=lambda dropped: rows_lost.set(),
+            name="snapshot-writer",
+        )
     
     while True:
         try:
@@ -42,26 +75,43 @@ def main():
             logger.info(f"[{time.ctime()}] Collecting state...")
             
             snapshot = builder.build_snapshot()
+
+            if timeseries:
+                try:
+                    timeseries.append_snapshot(snapshot)
+                except Exception as e:
+                    logger.error(f"Error appending to time-series store: {e}")
             
-            if supabase:
-                data = {
-                    "snapshot_id": snapshot["id"],
-                    "timestamp": snapshot["timestamp"],
-                    "state": snapshot
-                }
-                # Use upsert or insert
-                supabase.table("system_snapshots").insert(data).execute()
-                logger.info(f"Snapshot {snapshot.get('id', 'unknown')} saved to Supabase.")
+            if writer:
+                if rows_lost.is_set():
+                    rows_lost.clear()
+                    rows.reset()
+                data = rows.encode(snapshot, builder.content_hash, builder.section_hashes)
+                writer.put(data)
+                SNAPSHOT_ROWS.inc(kind=data["kind"])
+                logger.info(f"Snapshot {snapshot.get('id', 'unknown')} queued for Supabase ({data['kind']}).")
             else:
                 logger.warning(f"Snapshot generated (Supabase not connected): {snapshot.get('id', 'unknown')}")
             
             # Sleep logic
             elapsed = time.time() - start_time
+            CYCLE_SECONDS.observe(elapsed)
             sleep_time = max(0, Config.COLLECTOR_INTERVAL_SECONDS - elapsed)
-            time.sleep(sleep_time)
+            if builder.scheduler and Config.SNAPSHOT_MIN_INTERVAL_SECONDS < Config.COLLECTOR_INTERVAL_SECONDS:
+                # Publish early once a section has new data, but keep at least the minimum spacing
+                min_sleep = max(0, Config.SNAPSHOT_MIN_INTERVAL_SECONDS - elapsed)
+                time.sleep(min_sleep)
+                builder.scheduler.wait_for_change(sleep_time - min_sleep)
+            else:
+                time.sleep(sleep_time)
             
         except KeyboardInterrupt:
             logger.info("Stopping collector...")
+            builder.shutdown()
+            if writer:
+                writer.close()
+            if timeseries:
+                timeseries.flush()
             break
         except Exception as e:
             logger.error(f"Error in collection loop: {e}")
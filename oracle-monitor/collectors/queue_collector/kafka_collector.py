@@ -1,37 +1,186 @@
-from typing import Dict, Any, List
-from kafka import KafkaAdminClient
-from kafka.cluster import ClusterMetadata
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from kafka import KafkaAdminClient, KafkaConsumer, TopicPartition
 from collectors.base.collector import Collector
 from collectors.base.config import Config
 
+# Every requirements file pins this version. kafka-python 3 renamed the consumer-group admin
+# calls (list_groups, list_group_offsets); the collector uses whichever set is installed.
+KAFKA_PYTHON_VERSION = "2.0.2"
+KAFKA_PYTHON_3 = hasattr(KafkaAdminClient, "list_group_offsets")
+
 class QueueCollector(Collector):
-    def __init__(self):
+    """
+    Reports per-partition depth and per-consumer-group lag for the task and log topics.
+
+    One admin client and one group-less consumer are kept for the life of the
+    collector. Partitions and each consumer group's coordinator are cached and
+    refreshed every KAFKA_METADATA_TTL_SECONDS, so a normal cycle costs one batched
+    end-offset lookup plus the committed-offset fetches for the watched partitions,
+    sent to the coordinators together, all through kafka-python's public API.
+    """
+
+    interval_seconds = 5.0
+    min_interval_seconds = 2.0
+    max_interval_seconds = 30.0
+
+    def __init__(self, topics: Optional[List[str]] = None):
         self.bootstrap_servers = Config.KAFKA_BOOTSTRAP_SERVERS
-        
+        self.topics = topics or [Config.KAFKA_TOPIC_TASKS, Config.KAFKA_TOPIC_LOGS]
+
+        self.admin: Optional[KafkaAdminClient] = None
+        self.consumer: Optional[KafkaConsumer] = None
+
+        # Cached cluster metadata
+        self._partitions: List[TopicPartition] = []
+        # group_id -> node id of the broker coordinating it
+        self._coordinators: Dict[str, int] = {}
+        self._metadata_expires_at = 0.0
+
+        # kafka-python 2 fetches one group per call; these keep the calls in flight together
+        self._fetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="kafka-offsets")
+
+    def _connect(self):
+        if self.admin is None:
+            self.admin = KafkaAdminClient(
+                bootstrap_servers=self.bootstrap_servers,
+                client_id="oracle-queue-collector"
+            )
+        if self.consumer is None:
+            # No group_id: only used for offset lookups, never joins or commits
+            self.consumer = KafkaConsumer(
+                bootstrap_servers=self.bootstrap_servers,
+                client_id="oracle-queue-collector",
+                enable_auto_commit=False
+            )
+
+    def _disconnect(self):
+        for conn in (self.consumer, self.admin):
+            try:
+                if conn is not None:
+                    conn.close()
+            except Exception:
+                pass
+        self.admin = None
+        self.consumer = None
+        self._metadata_expires_at = 0.0
+
+    def _list_groups(self, broker_id: int) -> List[str]:
+        """Consumer groups coordinated by `broker_id`."""
+        if KAFKA_PYTHON_3:
+            return [group["group_id"] for group in self.admin.list_groups(broker_ids=[broker_id])]
+        return [group_id for group_id, _ in self.admin.list_consumer_groups(broker_ids=[broker_id])]
+
+    def _refresh_metadata(self):
+        """Refresh topic partitions and each consumer group's coordinator once per TTL."""
+        if time.monotonic() < self._metadata_expires_at:
+            return
+
+        partitions = []
+        for topic in self.topics:
+            for partition in sorted(self.consumer.partitions_for_topic(topic) or []):
+                partitions.append(TopicPartition(topic, partition))
+
+        # Each broker lists the groups it coordinates, which saves a coordinator lookup per group and cycle
+        coordinators = {}
+        for broker in self.admin.describe_cluster()["brokers"]:
+            broker_id = broker.get("broker_id", broker.get("node_id"))
+            for group_id in self._list_groups(broker_id):
+                coordinators[group_id] = broker_id
+
+        self._coordinators = dict(sorted(coordinators.items()))
+        self._partitions = partitions
+        self._metadata_expires_at = time.monotonic() + Config.KAFKA_METADATA_TTL_SECONDS
+
+    def _fetch_offsets(self) -> Dict[str, Dict[TopicPartition, Any]]:
+        """Committed offsets of every known group for the watched partitions."""
+        if KAFKA_PYTHON_3:
+            # One OffsetFetch per coordinator covering all of its groups (per group on brokers before 3.0)
+            return self.admin.list_group_offsets({group_id: self._partitions for group_id in self._coordinators})
+
+        futures = {
+            group_id: self._fetch_executor.submit(self.admin.list_consumer_group_offsets, group_id,
+                                                  group_coordinator_id=coordinator, partitions=self._partitions)
+            for group_id, coordinator in self._coordinators.items()
+        }
+        # Let every fetch finish before raising, so none is still using the admin client when it is closed
+        wait(futures.values())
+        return {group_id: future.result() for group_id, future in futures.items()}
+
+    def _committed_offsets(self) -> Dict[str, Dict[TopicPartition, int]]:
+        """Committed offsets on the watched topics for every known group."""
+        if not self._coordinators or not self._partitions:
+            return {}
+        committed = {}
+        for group_id, offsets in self._fetch_offsets().items():
+            # -1: the group has no offset for that partition
+            group_offsets = {tp: meta.offset for tp, meta in offsets.items() if meta.offset >= 0}
+            if group_offsets:
+                committed[group_id] = group_offsets
+        return committed
+
     def collect(self) -> List[Dict[str, Any]]:
         queues = []
         try:
-            # In a real implementation we would check consumer lag or topic depth
-            # kafka-python doesn't make it super easy to get "queue depth" without consuming
-            # For this demo, we will return a placeholder or investigate admin client
-            
-            # Simulated data
-            queues.append({
-                "name": "agent-tasks",
-                "tasks": [
-                    {
-                        "id": "task-mock-1",
-                        "priority": {"level": "high", "waiting_since_mins": 5},
-                        "invoked_by": "agent-a",
-                        "waiting_since_mins": 5,
-                        "submitted_at": "2024-01-01T00:00:00Z" # Required by schema
-                    }
-                ],
-                "updated_at": "2024-01-01T00:00:00Z" # Required by schema
-            })
-            
-        except Exception as e:
-            print(f"Error collecting Queue data: {e}")
-            return []
-            
+            self._connect()
+            self._refresh_metadata()
+
+            # One ListOffsets request per partition leader covers every partition
+            end_offsets = self.consumer.end_offsets(self._partitions) if self._partitions else {}
+            committed = self._committed_offsets()
+            updated_at = datetime.now(timezone.utc).isoformat()
+
+            groups_by_topic: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for group_id, offsets in sorted(committed.items()):
+                per_topic: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+                for tp, offset in sorted(offsets.items()):
+                    per_topic[tp.topic].append({
+                        "partition": tp.partition,
+                        "committed": offset,
+                        "lag": max(0, end_offsets.get(tp, offset) - offset)
+                    })
+                for topic, partitions in per_topic.items():
+                    groups_by_topic[topic].append({
+                        "group_id": group_id,
+                        "lag": sum(p["lag"] for p in partitions),
+                        "partitions": partitions
+                    })
+
+            # Topics nobody consumes yet: everything still retained is pending
+            unconsumed = [tp for tp in self._partitions if tp.topic not in groups_by_topic]
+            begin_offsets = self.consumer.beginning_offsets(unconsumed) if unconsumed else {}
+
+            for topic in self.topics:
+                partitions = [
+                    {"partition": tp.partition, "end_offset": end_offsets.get(tp, 0)}
+                    for tp in self._partitions if tp.topic == topic
+                ]
+                groups = groups_by_topic.get(topic, [])
+                if groups:
+                    # Messages the slowest consumer group has yet to process
+                    depth = max(g["lag"] for g in groups)
+                else:
+                    depth = sum(
+                        end_offsets.get(tp, 0) - begin_offsets.get(tp, 0)
+                        for tp in self._partitions if tp.topic == topic
+                    )
+                queues.append({
+                    "name": topic,
+                    # Individual task payloads are not read here; that would mean consuming the topic
+                    "tasks": [],
+                    "depth": depth,
+                    "partitions": partitions,
+                    "consumer_groups": groups,
+                    "updated_at": updated_at
+                })
+
+        except Exception:
+            # Drop the clients so the next cycle reconnects from scratch; the caller keeps
+            # the last good section and marks it stale
+            self._disconnect()
+            raise
+
         return queues
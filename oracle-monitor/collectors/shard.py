@@ -0,0 +1,62 @@
+"""
+One member of a sharded K8s collection.
+
+Collects the K8S_TARGETS that the hash ring over COLLECTOR_SHARD_MEMBERS
+assigns to COLLECTOR_SHARD_ID and upserts the result, keyed by target, into
+workload_shards every interval. The snapshot collector merges the rows.
+"""
+import time
+import logging
+from datetime import datetime, timezone
+from supabase import create_client, Client
+from collectors.base.config import Config
+from collectors.base.sharding import HashRing
+from collectors.k8s_collector.sharded import MultiTargetCollector
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("ShardCollector")
+
+def main():
+    shard_id = Config.COLLECTOR_SHARD_ID
+    members = Config.COLLECTOR_SHARD_MEMBERS
+    if not members or shard_id not in members:
+        logger.error(f"COLLECTOR_SHARD_ID {shard_id!r} is not in COLLECTOR_SHARD_MEMBERS {members}")
+        return
+
+    url = Config.SUPABASE_URL
+    key = Config.SUPABASE_SERVICE_ROLE_KEY or Config.SUPABASE_KEY
+    if not url or not key:
+        logger.error("Supabase credentials missing!")
+        return
+    supabase: Client = create_client(url, key)
+
+    targets = HashRing(members).assign(Config.K8S_TARGETS)[shard_id]
+    logger.info(f"Shard {shard_id} of {len(members)} owns {len(targets)} target(s): {', '.join(targets) or '-'}")
+    collector = MultiTargetCollector(targets)
+
+    while True:
+        try:
+            start_time = time.time()
+            workload = collector.collect_by_target()
+            row = {
+                "shard_id": shard_id,
+                "members": members,
+                "targets": targets,
+                "workload": workload,
+                # collected_at doesn't apply to these; their workload is the last collected
+                "failed": collector.failed,
+                "collected_at": datetime.now(timezone.utc).isoformat(),
+            }
+            # Each shard overwrites its own row; only the latest collection matters
+            supabase.table("workload_shards").upsert(row, on_conflict="shard_id").execute()
+            elapsed = time.time() - start_time
+            time.sleep(max(0, Config.COLLECTOR_INTERVAL_SECONDS - elapsed))
+        except KeyboardInterrupt:
+            logger.info("Stopping shard collector...")
+            break
+        except Exception as e:
+            logger.error(f"Error in shard loop: {e}")
+            time.sleep(5)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Keyframe + delta encoding for system_snapshots rows.
+
+Every Nth snapshot is stored in full (a keyframe). The ones in between store
+only a JSON merge patch (RFC 7386) against the previous snapshot. Entity lists
+are keyed by identity before diffing, so a changed pod becomes a patch on that
+pod instead of a rewrite of the whole workload list.
+
+The same keyed form and patch rules are implemented in SQL
+(infrastructure/supabase/functions/snapshot_deltas.sql) so any reader can
+rebuild a snapshot server-side. Keep both in sync.
+"""
+from typing import Any, Dict, List, Optional
+
+# Section -> field identifying each entry
+KEYED_SECTIONS = {
+    "agents": "name",
+    "workload": "deployment_name",
+    "queues": "name",
+    "litellm": "model",
+}
+POD_KEY = "pod_id"
+
+def workload_key(deployment: Dict[str, Any]) -> Optional[str]:
+    """
+    "<cluster>/<namespace>/<deployment_name>", skipping empty parts: deployment
+    names are only unique within a namespace of one cluster.
+    """
+    if not deployment.get("deployment_name"):
+        return None
+    return "/".join(str(deployment[k]) for k in ("cluster", "namespace", "deployment_name") if deployment.get(k))
+
+def _keyed(items: List[Dict[str, Any]], key: str) -> Dict[str, Any]:
+    # Entries without an identity fall back to their position
+    return {str(item.get(key) or f"#{i}"): item for i, item in enumerate(items or [])}
+
+def to_keyed(state: Dict[str, Any]) -> Dict[str, Any]:
+    keyed = dict(state)
+    for section, key in KEYED_SECTIONS.items():
+        entries = state.get(section) or []
+        if section == "workload":
+            keyed[section] = {workload_key(w) or f"#{i}": {**w, "pods": _keyed(w.get("pods"), POD_KEY)}
+                              for i, w in enumerate(entries)}
+        else:
+            keyed[section] = _keyed(entries, key)
+    return keyed
+
+def from_keyed(keyed: Dict[str, Any]) -> Dict[str, Any]:
+    state = dict(keyed)
+    for section in KEYED_SECTIONS:
+        entries = list((keyed.get(section) or {}).values())
+        if section == "workload":
+            entries = [{**w, "pods": list((w.get("pods") or {}).values())} for w in entries]
+        state[section] = entries
+    return state
+
+def merge_patch(old: Any, new: Any) -> Any:
+    """
+    Smallest RFC 7386 patch turning `old` into `new`. Removed keys become null,
+    so null-valued fields can't be represented (the schema has none).
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return new
+    patch = {key: None for key in old if key not in new}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            patch[key] = merge_patch(old[key], value)
+    return patch
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+def reconstruct(keyframe_state: Dict[str, Any], deltas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Rebuild a snapshot from its keyframe's state and the ordered deltas after it."""
+    keyed = to_keyed(keyframe_state)
+    for delta in deltas:
+        keyed = apply_merge_patch(keyed, delta)
+    return from_keyed(keyed)
+
+class DeltaEncoder:
+    """Turns consecutive snapshots into system_snapshots rows: keyframes and deltas."""
+
+    def __init__(self, keyframe_interval: int):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._keyframe_id: Optional[str] = None
+        self._previous: Optional[Dict[str, Any]] = None
+        self._since_keyframe = 0
+
+    def reset(self):
+        """Force the next row to be a keyframe, e.g. after a row could not be stored."""
+        self._previous = None
+
+    def encode(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        keyed = to_keyed(snapshot)
+        row = {
+            "snapshot_id": snapshot["id"],
+            "timestamp": snapshot["timestamp"],
+        }
+
+        if self._previous is None or self._since_keyframe >= self.keyframe_interval - 1:
+            self._keyframe_id = snapshot["id"]
+            self._since_keyframe = 0
+            row.update({"kind": "keyframe", "keyframe_id": snapshot["id"], "state": snapshot, "delta": None})
+        else:
+            self._since_keyframe += 1
+            row.update({
+                "kind": "delta",
+                "keyframe_id": self._keyframe_id,
+                "state": None,
+                "delta": merge_patch(self._previous, keyed),
+            })
+
+        self._previous = keyed
+        return row
@@ -0,0 +1,183 @@
+"""
+Batching sink between the agent-logs Kafka consumer and the agent_logs table.
+
+Rows are buffered and written with one bulk insert when the buffer reaches
+`max_rows` or its oldest row is `max_latency_seconds` old. Consumer offsets
+are committed only after that insert succeeds, so a failed insert is
+retried (or redelivered after a restart) instead of being skipped:
+delivery is at-least-once.
+
+Only failures known to be caused by the rows themselves (a data exception,
+a constraint violation, a request body PostgREST can't parse) split the
+batch in halves until the offending rows are isolated; the rest is stored,
+and a row that keeps failing alone for `max_attempts` flushes is dropped.
+Every other failure is treated as transient: the whole batch is retried with
+exponential backoff for as long as it lasts, and no offset is committed.
+"""
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+Row = Dict[str, Any]
+
+# SQLSTATE classes caused by the values inserted: data exception (bad format, out of range),
+# integrity constraint violation (not null, unique, check, foreign key)
+ROW_ERROR_SQLSTATE_CLASSES = ("22", "23")
+# PostgREST rejecting the request body itself (invalid JSON)
+ROW_ERROR_PGRST_CODES = ("PGRST102",)
+
+def is_row_error(error: Exception) -> bool:
+    """
+    Whether an insert error is caused by the rows, so retrying them unchanged
+    can't succeed. PostgREST errors carry a SQLSTATE or a PGRST code in `code`;
+    anything not listed here is retried as transient.
+    """
+    if isinstance(error, (TypeError, ValueError)):
+        # The rows can't be serialized
+        return True
+    code = str(getattr(error, "code", None) or "")
+    if code.startswith("PGRST"):
+        return code in ROW_ERROR_PGRST_CODES
+    return len(code) == 5 and code[:2] in ROW_ERROR_SQLSTATE_CLASSES
+
+def to_log_row(log_data: Dict[str, Any]) -> Row:
+    """Map a Kafka log message (level, message, source, timestamp, task_id) to an agent_logs row."""
+    return {
+        "level": log_data.get("level", "info"),
+        "message": log_data.get("message", ""),
+        "source": log_data.get("source", "unknown"),
+        "timestamp": log_data.get("timestamp", None),
+        "task_id": log_data.get("task_id", None)
+    }
+
+class BatchingLogSink:
+    def __init__(
+        self,
+        insert: Callable[[List[Row]], Any],
+        commit: Callable[[], Any],
+        max_rows: int = 500,
+        max_latency_seconds: float = 0.2,
+        max_attempts: int = 3,
+        dead_letter: Optional[Callable[[Row, Exception], Any]] = None,
+    ):
+        self.insert = insert
+        self.commit = commit
+        self.max_rows = max(1, max_rows)
+        self.max_latency_seconds = max_latency_seconds
+        self.max_attempts = max(1, max_attempts)
+        # Gets each dropped row and its last error; the default just logs it
+        self.dead_letter = dead_letter or (lambda row, e: print(f"Dropping log row {row}: {e}"))
+        self.dropped = 0
+
+        self.buffer: List[Row] = []
+        self._oldest: Optional[float] = None
+        # id(row) -> failed inserts of that row on its own
+        self._attempts: Dict[int, int] = {}
+
+    def add(self, row: Row):
+        if not self.buffer:
+            self._oldest = time.monotonic()
+        self.buffer.append(row)
+
+    def room(self) -> int:
+        return max(0, self.max_rows - len(self.buffer))
+
+    def time_until_flush(self) -> Optional[float]:
+        """Seconds until the buffer is due; None when it is empty."""
+        if not self.buffer:
+            return None
+        if len(self.buffer) >= self.max_rows:
+            return 0.0
+        return max(0.0, self._oldest + self.max_latency_seconds - time.monotonic())
+
+    def due(self) -> bool:
+        return self.time_until_flush() == 0.0
+
+    def discard(self):
+        """Drop the buffer without committing; the records will be redelivered."""
+        self.buffer = []
+        self._oldest = None
+        self._attempts = {}
+
+    def _store(self, rows: List[Row]) -> List[Row]:
+        """Insert `rows`, splitting around rows the database rejects. Returns the rows still to retry."""
+        try:
+            self.insert(rows)
+            return []
+        except Exception as e:
+            error = e
+        if not is_row_error(error):
+            return rows
+        if len(rows) > 1:
+            middle = len(rows) // 2
+            return self._store(rows[:middle]) + self._store(rows[middle:])
+
+        row = rows[0]
+        attempts = self._attempts.get(id(row), 0) + 1
+        if attempts < self.max_attempts:
+            self._attempts[id(row)] = attempts
+            return rows
+        self._attempts.pop(id(row), None)
+        self.dropped += 1
+        self.dead_letter(row, error)
+        return []
+
+    def flush(self) -> bool:
+        """
+        Insert the buffer, then commit offsets. False on failure: the rows that
+        weren't stored stay buffered and nothing is committed.
+        """
+        if not self.buffer:
+            return True
+        pending = self._store(self.buffer)
+        # Only rows still buffered keep a count; stored rows' ids can be reused
+        self._attempts = {id(row): self._attempts[id(row)] for row in pending if id(row) in self._attempts}
+        if pending:
+            print(f"Error inserting {len(pending)} of {len(self.buffer)} log(s), will retry")
+            self.buffer = pending
+            return False
+
+        self.discard()
+        try:
+            self.commit()
+        except Exception as e:
+            # Rows are stored; worst case they are redelivered and stored again
+            print(f"Error committing log offsets: {e}")
+        return True
+
+def _buffer(consumer, sink: BatchingLogSink, records):
+    """Add polled records while the sink has room; rewind each partition to its first record that didn't fit."""
+    for partition, messages in records.items():
+        for message in messages:
+            if not sink.room():
+                consumer.seek(partition, message.offset)
+                break
+            sink.add(to_log_row(message.value))
+
+def consume(consumer, sink: BatchingLogSink, retry_seconds: float = 2.0, idle_poll_seconds: float = 1.0,
+            should_stop: Callable[[], bool] = lambda: False, max_retry_seconds: float = 60.0):
+    """
+    Poll `consumer` into `sink` until `should_stop()`. Never holds more than
+    `sink.max_rows` polled records, so committing the consumer's position
+    after a flush covers exactly what was inserted. Failed flushes are retried
+    after `retry_seconds`, doubling up to `max_retry_seconds`.
+    """
+    while not should_stop():
+        wait = sink.time_until_flush()
+        room = sink.room()
+        if room:
+            timeout = idle_poll_seconds if wait is None else wait
+            _buffer(consumer, sink, consumer.poll(timeout_ms=int(timeout * 1000), max_records=room))
+
+        if sink.due() and not sink.flush():
+            delay = retry_seconds
+            # Stop fetching but keep polling so the consumer stays in its group
+            while not should_stop():
+                consumer.pause(*consumer.assignment())
+                # A rebalance inside poll can hand over unpaused partitions; what doesn't fit is re-read later
+                _buffer(consumer, sink, consumer.poll(timeout_ms=int(delay * 1000)))
+                if sink.flush():
+                    break
+                delay = min(delay * 2, max(retry_seconds, max_retry_seconds))
+            consumer.resume(*consumer.assignment())
+
+    sink.flush()
@@ -0,0 +1,64 @@
+"""
+Turns built snapshots into system_snapshots rows.
+
+A snapshot whose content hash (everything but id and timestamp) matches the
+last stored one becomes a heartbeat row: no state, just a reference to the
+row holding that content. Otherwise the row is a full state ("full" mode) or
+a keyframe/delta from DeltaEncoder ("delta" mode). The SQL readers in
+infrastructure/supabase/functions/snapshot_deltas.sql resolve all three kinds.
+
+State rows also carry `metrics`, the snapshot's deployment, queue and model
+series (summary_metrics), which get_snapshot_metrics() aggregates over a time
+range without rebuilding any state. Heartbeats share their ref row's metrics.
+
+Every row carries the same columns so mixed kinds can be inserted in one batch.
+"""
+from typing import Any, Dict, Optional
+from collectors.storage.delta import DeltaEncoder
+from collectors.storage.timeseries import summary_metrics
+
+class SnapshotRows:
+    def __init__(self, mode: str = "full", keyframe_interval: int = 30, dedupe: bool = True):
+        self.dedupe = dedupe
+        self.delta = DeltaEncoder(keyframe_interval) if mode == "delta" else None
+        # Last row that holds state (full, keyframe or delta), and its content hash
+        self._ref_id: Optional[str] = None
+        self._ref_keyframe_id: Optional[str] = None
+        self._ref_hash: Optional[str] = None
+
+    def reset(self):
+        """Start over from a full row or keyframe, e.g. after a row was lost."""
+        self._ref_id = self._ref_keyframe_id = self._ref_hash = None
+        if self.delta:
+            self.delta.reset()
+
+    def encode(self, snapshot: Dict[str, Any], content_hash: str, section_hashes: Dict[str, str]) -> Dict[str, Any]:
+        row = {
+            "snapshot_id": snapshot["id"],
+            "timestamp": snapshot["timestamp"],
+            "content_hash": content_hash,
+            "section_hashes": section_hashes,
+            "ref_snapshot_id": None,
+        }
+
+        if self.dedupe and self._ref_id and content_hash == self._ref_hash:
+            row.update({
+                "kind": "heartbeat",
+                "keyframe_id": self._ref_keyframe_id,
+                "ref_snapshot_id": self._ref_id,
+                "state": None,
+                "delta": None,
+                "metrics": None,
+            })
+            return row
+
+        if self.delta:
+            row.update(self.delta.encode(snapshot))
+        else:
+            row.update({"kind": "keyframe", "keyframe_id": snapshot["id"], "state": snapshot, "delta": None})
+        row["metrics"] = summary_metrics(snapshot)
+
+        self._ref_id = snapshot["id"]
+        self._ref_keyframe_id = row["keyframe_id"]
+        self._ref_hash = content_hash
+        return row
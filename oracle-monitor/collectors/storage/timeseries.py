@@ -0,0 +1,302 @@
+"""
+Local columnar ring store for the numeric series in each snapshot.
+
+Every series (pod cpu/memory/restarts, deployment active_pods/restarts,
+queue depth, model rpm/tpm and their limits) owns one column of a
+memory-mapped float32 matrix with `capacity` rows (slots) of `max_series`
+columns, next to a float64 array of slot timestamps. Each snapshot writes
+one contiguous row, so a tick dirties a few pages instead of one per series,
+and the oldest row is overwritten once the ring is full. Disk use is fixed
+and a range query is a numpy slice instead of a walk over JSON snapshots.
+
+Missing values are NaN. A column whose series has not been written for a
+whole lap of the ring is handed to the next new series (pods come and go).
+
+Query from a shell next to the collector:
+    python -m collectors.storage.timeseries series "pod:*"
+    python -m collectors.storage.timeseries query "model:*:rpm" --minutes 60 --agg max
+"""
+import argparse
+import fnmatch
+import json
+import os
+import time
+import warnings
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from collectors.storage.delta import workload_key
+
+AGGREGATES = {
+    "mean": np.nanmean,
+    "min": np.nanmin,
+    "max": np.nanmax,
+    "sum": np.nansum,
+    "p95": lambda a, axis=None: np.nanpercentile(a, 95, axis=axis),
+}
+
+def _epoch(ts: str) -> float:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+
+def snapshot_metrics(snapshot: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten the numeric fields of a snapshot into series name -> value."""
+    metrics = {}
+    for deployment in snapshot.get("workload") or []:
+        # "<cluster>/<namespace>/<name>": the same deployment can run in several namespaces and clusters
+        name = workload_key(deployment)
+        live = deployment.get("live") or {}
+        if name and live.get("active_pods") is not None:
+            metrics[f"deployment:{name}:active_pods"] = live["active_pods"]
+        restarts = None
+        for pod in deployment.get("pods") or []:
+            pod_id = pod.get("pod_id")
+            for field in ("cpu", "memory", "restarts"):
+                if pod_id and pod.get(field) is not None:
+                    metrics[f"pod:{pod_id}:{field}"] = pod[field]
+            if pod.get("restarts") is not None:
+                restarts = (restarts or 0) + pod["restarts"]
+        if name and restarts is not None:
+            metrics[f"deployment:{name}:restarts"] = restarts
+    for queue in snapshot.get("queues") or []:
+        if queue.get("name"):
+            depth = queue.get("depth")
+            metrics[f"queue:{queue['name']}:depth"] = len(queue.get("tasks") or []) if depth is None else depth
+    for model in snapshot.get("litellm") or []:
+        for field in ("rpm", "tpm", "rpm_max", "tpm_max"):
+            if model.get("model") and model.get(field) is not None:
+                metrics[f"model:{model['model']}:{field}"] = model[field]
+    return metrics
+
+def summary_metrics(snapshot: Dict[str, Any]) -> Dict[str, float]:
+    """
+    The per-deployment, queue and model series of a snapshot, without per-pod
+    ones. Stored with each system_snapshots row for server-side range reports.
+    """
+    return {name: value for name, value in snapshot_metrics(snapshot).items() if not name.startswith("pod:")}
+
+class TimeSeriesStore:
+    def __init__(self, directory: str, capacity: int = 8640, max_series: int = 1024, readonly: bool = False):
+        self.directory = directory
+        self.readonly = readonly
+        self._index_path = os.path.join(directory, "series.json")
+        meta_path = os.path.join(directory, "meta.json")
+
+        if os.path.exists(meta_path):
+            # An existing store keeps the shape it was created with
+            with open(meta_path) as f:
+                meta = json.load(f)
+            capacity, max_series = meta["capacity"], meta["max_series"]
+            # Stores written before the row layout keep one contiguous block per series
+            by_series = meta.get("layout") != "rows"
+            create = False
+        elif readonly:
+            raise FileNotFoundError(f"No time-series store in {directory}")
+        else:
+            os.makedirs(directory, exist_ok=True)
+            by_series = False
+            create = True
+        self.capacity = capacity
+        self.max_series = max_series
+
+        def column(name, dtype, shape, fill):
+            path = os.path.join(directory, name)
+            if create:
+                array = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+                array[:] = fill
+                return array
+            return np.memmap(path, dtype=dtype, mode="r" if readonly else "r+", shape=shape)
+
+        # Slots written so far; the next slot is count % capacity
+        self._count = column("count.bin", np.int64, (1,), 0)
+        self.times = column("times.bin", np.float64, (capacity,), np.nan)
+        if by_series and not readonly:
+            self._to_rows(os.path.join(directory, "values.bin"), meta_path, capacity, max_series)
+            by_series = False
+        if by_series:
+            # Read-only over the old layout: a transposed view has the same [slot, column] indexing
+            self.values = column("values.bin", np.float32, (max_series, capacity), np.nan).T
+        else:
+            self.values = column("values.bin", np.float32, (capacity, max_series), np.nan)
+        # Slot count at each column's last write, used to recycle columns of vanished series
+        self._last_write = column("last_write.bin", np.int64, (max_series,), -1)
+
+        if create:
+            self._flush()
+            with open(meta_path, "w") as f:
+                json.dump({"capacity": capacity, "max_series": max_series, "layout": "rows"}, f)
+        self._columns: Dict[str, int] = {}
+        self._index_mtime = None
+        self._load_index()
+
+    @staticmethod
+    def _to_rows(path: str, meta_path: str, capacity: int, max_series: int):
+        """Rewrite a per-series values file as one row per slot."""
+        old = np.memmap(path, dtype=np.float32, mode="r", shape=(max_series, capacity))
+        new = np.memmap(path + ".tmp", dtype=np.float32, mode="w+", shape=(capacity, max_series))
+        new[:] = old.T
+        new.flush()
+        del old, new
+        os.replace(path + ".tmp", path)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"capacity": capacity, "max_series": max_series, "layout": "rows"}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @property
+    def count(self) -> int:
+        return int(self._count[0])
+
+    def _load_index(self):
+        try:
+            mtime = os.path.getmtime(self._index_path)
+        except OSError:
+            return
+        if mtime != self._index_mtime:
+            with open(self._index_path) as f:
+                self._columns = json.load(f)
+            self._index_mtime = mtime
+
+    def _save_index(self):
+        with open(self._index_path + ".tmp", "w") as f:
+            json.dump(self._columns, f)
+        os.replace(self._index_path + ".tmp", self._index_path)
+
+    def _allocate(self, name: str) -> Optional[int]:
+        used = set(self._columns.values())
+        if len(used) < self.max_series:
+            col = next(c for c in range(self.max_series) if c not in used)
+        else:
+            # Reuse the least recently written column if its series has left the ring entirely
+            col = int(np.argmin(self._last_write))
+            if self._last_write[col] > self.count - self.capacity:
+                return None
+            self._columns = {n: c for n, c in self._columns.items() if c != col}
+        self.values[:, col] = np.nan
+        self._last_write[col] = self.count
+        self._columns[name] = col
+        return col
+
+    def append(self, timestamp: float, metrics: Dict[str, float]):
+        """Write one slot: the timestamp plus every metric, NaN for series not in `metrics`."""
+        count = self.count
+        slot = count % self.capacity
+
+        allocated = False
+        cols, vals = [], []
+        for name, value in metrics.items():
+            col = self._columns.get(name)
+            if col is None:
+                col = self._allocate(name)
+                if col is None:
+                    print(f"Time-series store full ({self.max_series} series), dropping {name}")
+                    continue
+                allocated = True
+            cols.append(col)
+            vals.append(value)
+        if allocated:
+            self._save_index()
+
+        # Built in memory and written as one contiguous row
+        row = np.full(self.max_series, np.nan, dtype=np.float32)
+        if cols:
+            cols = np.asarray(cols)
+            row[cols] = vals
+            self._last_write[cols] = count
+        self.values[slot] = row
+        self.times[slot] = timestamp
+        # Published last, so a reader never sees a half-written slot as valid
+        self._count[0] = count + 1
+
+    def append_snapshot(self, snapshot: Dict[str, Any]):
+        self.append(_epoch(snapshot["timestamp"]), snapshot_metrics(snapshot))
+
+    def _flush(self):
+        for array in (self._count, self.times, self.values, self._last_write):
+            array.flush()
+
+    def flush(self):
+        if not self.readonly:
+            self._flush()
+
+    def series(self, pattern: str = "*") -> List[str]:
+        """Series names matching a glob, e.g. "pod:*:cpu" or "model:gpt-4:*"."""
+        self._load_index()
+        return sorted(fnmatch.filter(self._columns, pattern))
+
+    def _slots(self, start: Optional[float], end: Optional[float]) -> np.ndarray:
+        """Slot indices in time order whose timestamps fall within [start, end]."""
+        count = self.count
+        if count <= self.capacity:
+            slots = np.arange(count)
+        else:
+            head = count % self.capacity
+            slots = np.concatenate([np.arange(head, self.capacity), np.arange(head)])
+        times = self.times[slots]
+        lo = 0 if start is None else np.searchsorted(times, start, side="left")
+        hi = len(slots) if end is None else np.searchsorted(times, end, side="right")
+        return slots[lo:hi]
+
+    def range(self, name: str, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, values) of one series between start and end (epoch seconds)."""
+        self._load_index()
+        slots = self._slots(start, end)
+        col = self._columns.get(name)
+        if col is None:
+            return self.times[slots], np.full(len(slots), np.nan, dtype=np.float32)
+        return self.times[slots], self.values[slots, col]
+
+    def aggregate(self, pattern: str, start: Optional[float] = None, end: Optional[float] = None,
+                  how: str = "mean") -> Dict[str, float]:
+        """One aggregate per series matching `pattern`, computed over a single 2-D block."""
+        names = self.series(pattern)
+        slots = self._slots(start, end)
+        if not names or not len(slots):
+            return {}
+        block = self.values[np.ix_(slots, [self._columns[n] for n in names])]
+        with warnings.catch_warnings():
+            # Series with no value in the window come back NaN and are left out
+            warnings.simplefilter("ignore", RuntimeWarning)
+            result = AGGREGATES[how](block, axis=0)
+        return {name: float(value) for name, value in zip(names, result) if not np.isnan(value)}
+
+    def resample(self, name: str, step_seconds: float, start: Optional[float] = None,
+                 end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean of one series per `step_seconds` bucket: (bucket start times, means)."""
+        times, values = self.range(name, start, end)
+        keep = ~np.isnan(values)
+        times, values = times[keep], values[keep]
+        if not len(times):
+            return np.array([]), np.array([])
+        origin = times[0] if start is None else start
+        buckets = ((times - origin) // step_seconds).astype(np.int64)
+        sums = np.bincount(buckets, weights=values)
+        counts = np.bincount(buckets)
+        filled = counts > 0
+        return origin + np.nonzero(filled)[0] * step_seconds, sums[filled] / counts[filled]
+
+def main():
+    from collectors.base.config import Config
+
+    parser = argparse.ArgumentParser(description="Query the collector's local time-series store")
+    parser.add_argument("--dir", default=Config.TIMESERIES_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    series_cmd = sub.add_parser("series", help="list series names")
+    series_cmd.add_argument("pattern", nargs="?", default="*")
+    query_cmd = sub.add_parser("query", help="aggregate series matching a glob")
+    query_cmd.add_argument("pattern")
+    query_cmd.add_argument("--minutes", type=float, default=60)
+    query_cmd.add_argument("--agg", choices=sorted(AGGREGATES), default="mean")
+    args = parser.parse_args()
+
+    store = TimeSeriesStore(args.dir, readonly=True)
+    if args.command == "series":
+        for name in store.series(args.pattern):
+            print(name)
+    else:
+        since = time.time() - args.minutes * 60
+        for name, value in store.aggregate(args.pattern, start=since, how=args.agg).items():
+            print(f"{name}\t{value:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Write-behind persistence for collector output.
+
+`put()` never blocks: rows go onto a bounded in-memory queue that a
+background thread drains in batches. When an insert fails, or the queue is
+full because the backend is stuck, rows are spilled to append-only JSONL
+segments on local disk and replayed oldest-first once inserts succeed again.
+
+Spill segments are named after the sequence number of their first row, so
+listing them in name order is replay order. Replayed rows may reach the
+backend twice (a segment is retried whole if it fails halfway), so the
+insert function should be idempotent, e.g. an upsert that ignores
+duplicates.
+"""
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from collectors.base.metrics import INSERT_ERRORS, INSERT_SECONDS, SPILL_SEGMENTS, SPILLED_ROWS, WRITE_QUEUE
+
+Row = Dict[str, Any]
+
+_STOP = object()
+
+class WriteBehind:
+    def __init__(
+        self,
+        insert: Callable[[List[Row]], Any],
+        spill_dir: str,
+        max_queue: int = 100,
+        batch_size: int = 50,
+        retry_seconds: float = 5.0,
+        on_drop: Optional[Callable[[List[Row]], Any]] = None,
+        name: str = "write-behind",
+    ):
+        self.insert = insert
+        self.spill_dir = spill_dir
+        self.batch_size = max(1, batch_size)
+        self.retry_seconds = retry_seconds
+        # Called with rows that could neither be stored nor spilled
+        self.on_drop = on_drop
+        self.name = name
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        # Microsecond-based so segments left by a previous run still sort first
+        self._seq = itertools.count(time.time_ns() // 1000)
+        # Guards segment creation so the writer never lists a half-written file
+        self._spill_lock = threading.Lock()
+        self._next_retry = 0.0
+
+        os.makedirs(spill_dir, exist_ok=True)
+        # Read at scrape time, nothing is recorded per row
+        WRITE_QUEUE.set_function(self._queue.qsize, writer=name)
+        SPILL_SEGMENTS.set_function(lambda: len(self.spilled_segments()), writer=name)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, row: Row):
+        """Hand a row to the writer thread; returns immediately."""
+        item = (next(self._seq), row)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # The writer is stuck on the backend. Move everything queued, then this row,
+            # to disk so that nothing newer can overtake it.
+            items = self._drain()
+            items.append(item)
+            self._spill(items, new_segment=True)
+
+    def spilled_segments(self) -> List[str]:
+        return sorted(f for f in os.listdir(self.spill_dir) if f.endswith(".jsonl"))
+
+    def close(self, timeout: float = 10.0):
+        """Flush what is queued (to the backend or to disk) and stop the writer thread."""
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            self._spill(self._drain(), new_segment=True)
+            self._queue.put_nowait(_STOP)
+        self._thread.join(timeout)
+
+    def _drain(self) -> List[Any]:
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is _STOP:
+                # Keep the stop request for the writer thread
+                self._queue.put_nowait(_STOP)
+                return items
+            items.append(item)
+
+    def _take(self, timeout: float) -> Optional[List[Any]]:
+        """Block for the first row, then take whatever else is ready. None means stop."""
+        try:
+            first = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        if first is _STOP:
+            return None
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put_nowait(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            backlog = bool(self.spilled_segments())
+            batch = self._take(timeout=1.0)
+            stopping = batch is None
+            batch = batch or []
+
+            if backlog:
+                # Keep order: new rows go behind the spilled ones
+                if batch:
+                    self._spill(batch, new_segment=False)
+                if time.monotonic() >= self._next_retry:
+                    self._replay()
+            elif batch:
+                try:
+                    self._insert([row for _, row in batch])
+                except Exception as e:
+                    print(f"Error writing {len(batch)} row(s), spilling to disk: {e}")
+                    self._spill(batch, new_segment=True)
+                    self._next_retry = time.monotonic() + self.retry_seconds
+
+            if stopping:
+                return
+
+    def _insert(self, rows: List[Row]):
+        for start in range(0, len(rows), self.batch_size):
+            started = time.perf_counter()
+            try:
+                self.insert(rows[start:start + self.batch_size])
+            except Exception:
+                INSERT_ERRORS.inc(writer=self.name)
+                raise
+            finally:
+                INSERT_SECONDS.observe(time.perf_counter() - started, writer=self.name)
+
+    def _spill(self, items: List[Any], new_segment: bool):
+        if not items:
+            return
+        lines = "".join(json.dumps(row, default=str) + "\n" for _, row in items)
+        with self._spill_lock:
+            try:
+                # Append to the newest segment that started before these rows
+                first_seq = items[0][0]
+                older = [s for s in self.spilled_segments() if int(s.split(".")[0]) <= first_seq]
+                if older and not new_segment:
+                    with open(os.path.join(self.spill_dir, older[-1]), "a") as f:
+                        f.write(lines)
+                else:
+                    path = os.path.join(self.spill_dir, f"{first_seq:020d}.jsonl")
+                    with open(path + ".tmp", "w") as f:
+                        f.write(lines)
+                    os.replace(path + ".tmp", path)
+                SPILLED_ROWS.inc(len(items), writer=self.name)
+            except OSError as e:
+                print(f"Error spilling {len(items)} row(s), dropping them: {e}")
+                if self.on_drop:
+                    self.on_drop([row for _, row in items])
+
+    def _replay(self):
+        for segment in self.spilled_segments():
+            path = os.path.join(self.spill_dir, segment)
+            with open(path) as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            try:
+                self._insert(rows)
+            except Exception as e:
+                print(f"Backend still unavailable, {len(rows)} spilled row(s) kept: {e}")
+                self._next_retry = time.monotonic() + self.retry_seconds
+                return
+            with self._spill_lock:
+                os.remove(path)
+            print(f"Replayed {len(rows)} spilled row(s) from {segment}")
@@ -36,13 +36,23 @@ const ChatWidget = () => {
         setMessages(prev => [...prev, { role: 'user', content: userMsg }]);
         setLoading(true);
 
-        const response = await api.queryChatbot(userMsg);
+        // Tokens are appended to the last message as they arrive; the spinner shows until the first one
+        let received = '';
+        const ok = await api.streamChatbot(userMsg, (text) => {
+            if (!received) {
+                setLoading(false);
+                setMessages(prev => [...prev, { role: 'assistant', content: text }]);
+            } else {
+                setMessages(prev => [...prev.slice(0, -1), { role: 'assistant', content: received + text }]);
+            }
+            received += text;
+        });
 
         setLoading(false);
-        if (response) {
-            setMessages(prev => [...prev, { role: 'assistant', content: response.reply }]);
-        } else {
+        if (!ok && !received) {
             setMessages(prev => [...prev, { role: 'assistant', content: "Sorry, I couldn't reach the Oracle API. Please check your backend connection." }]);
+        } else if (!ok) {
+            setMessages(prev => [...prev.slice(0, -1), { role: 'assistant', content: received + " [answer interrupted]" }]);
         }
     };
 
@@ -11,7 +11,10 @@ export function QueuePanel({ queues }: QueuePanelProps) {
 
   return (
     <div className="space-y-4">
-      {queues.map((queue) => (
+      {queues.map((queue) => {
+        // Broker-reported depth when available, otherwise the tasks we know about
+        const pending = queue.depth ?? queue.tasks.length;
+        return (
         <div key={queue.name} className="bg-card rounded-2xl p-5 border border-border hover:border-border-strong transition-colors">
           {/* Queue Header */}
           <div className="flex items-center justify-between mb-4 pb-3 border-b border-border">
@@ -28,13 +31,13 @@ export function QueuePanel({ queues }: QueuePanelProps) {
             {/* Task Count Badge */}
             <div className={cn(
               "px-2.5 py-1 rounded-lg text-xs font-bold border",
-              queue.tasks.length > 5 
+              pending > 5 
                 ? "bg-primary/20 text-primary border-primary/30 animate-pulse" 
-                : queue.tasks.length > 0
+                : pending > 0
                 ? "bg-secondary/20 text-secondary border-secondary/30"
                 : "bg-foreground/5 text-muted-deep border-border"
             )}>
-              {queue.tasks.length} pending
+              {pending} pending
             </div>
           </div>
 
@@ -101,7 +104,8 @@ export function QueuePanel({ queues }: QueuePanelProps) {
             </button>
           )}
         </div>
-      ))}
+        );
+      })}
     </div>
   );
 }
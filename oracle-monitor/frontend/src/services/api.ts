@@ -6,19 +6,15 @@ export const api = {
      * Fetch the most recent system snapshot
      */
     async getLatestSnapshot(): Promise<SystemSnapshot | null> {
-        const { data, error } = await supabase
-            .from('system_snapshots')
-            .select('*')
-            .order('timestamp', { ascending: false })
-            .limit(1)
-            .single();
+        // Resolved server-side so delta-encoded rows come back as full state
+        const { data, error } = await supabase.rpc('get_latest_snapshot');
 
         if (error) {
             console.error('Error fetching snapshot:', error);
             return null;
         }
 
-        return data.state as SystemSnapshot;
+        return (data as SystemSnapshot) ?? null;
     },
 
     /**
@@ -30,9 +26,17 @@ export const api = {
             .on(
                 'postgres_changes',
                 { event: 'INSERT', schema: 'public', table: 'system_snapshots' },
-                (payload) => {
-                    if (payload.new && (payload.new as any).state) {
-                        callback((payload.new as any).state as SystemSnapshot);
+                async (payload) => {
+                    const row = payload.new as any;
+                    if (!row) return;
+                    if (row.state) {
+                        callback(row.state as SystemSnapshot);
+                        return;
+                    }
+                    // Delta rows carry no state; rebuild it server-side
+                    const { data } = await supabase.rpc('get_snapshot', { p_snapshot_id: row.snapshot_id });
+                    if (data) {
+                        callback(data as SystemSnapshot);
                     }
                 }
             )
@@ -84,6 +88,53 @@ export const api = {
         }
     },
 
+    /**
+     * Stream an answer from /chat/stream (server-sent events over a POST fetch).
+     * Calls onDelta with each chunk of text as it arrives. Resolves to true once
+     * the answer is complete, false if the stream failed or ended early.
+     */
+    async streamChatbot(message: string, onDelta: (text: string) => void): Promise<boolean> {
+        try {
+            const response = await fetch('http://localhost:8000/chat/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ message }),
+            });
+
+            if (!response.ok || !response.body) {
+                throw new Error(`API Error: ${response.statusText}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) return false;
+                buffer += decoder.decode(value, { stream: true });
+
+                // Events are separated by a blank line: "event: <name>\ndata: <json>\n\n"
+                let boundary: number;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    const event = frame.match(/^event: (.*)$/m)?.[1];
+                    const data = frame.match(/^data: (.*)$/m)?.[1];
+                    if (!data) continue;
+                    const payload = JSON.parse(data);
+                    if (event === 'delta') onDelta(payload.text);
+                    else if (event === 'done') return true;
+                    else if (event === 'error') throw new Error(payload.error);
+                }
+            }
+        } catch (error) {
+            console.error('Error streaming chatbot answer:', error);
+            return false;
+        }
+    },
+
     /**
      * Initiate a new task via the backend API
      */
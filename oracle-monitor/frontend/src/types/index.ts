@@ -27,6 +27,8 @@ export interface Task {
 
 export interface Workload {
   deployment_name: string;
+  namespace?: string;
+  cluster?: string;
   max_pods: number;
   live: {
     active_pods: number;
@@ -53,6 +55,13 @@ export interface Pod {
 export interface Queue {
   name: string;
   tasks: QueueTask[];
+  depth?: number;
+  partitions?: { partition: number; end_offset: number }[];
+  consumer_groups?: {
+    group_id: string;
+    lag: number;
+    partitions?: { partition: number; committed: number; lag: number }[];
+  }[];
   updated_at: string;
 }
 
@@ -105,4 +114,5 @@ export interface LogEntry {
 export interface ChatResponse {
   reply: string;
   context_used: boolean;
+  cached?: boolean;
 }
@@ -1,9 +1,11 @@
 #!/bin/bash
 # Script to create Kafka topics
 # Usage: ./infrastructure/kafka/topics.sh
+# AGENT_LOGS_PARTITIONS sets how many log collector workers can consume agent-logs in parallel
 
 # Name of the container from docker-compose.yml
 KAFKA_CONTAINER="oracle-monitor-kafka-1"
+AGENT_LOGS_PARTITIONS="${AGENT_LOGS_PARTITIONS:-6}"
 
 # Check if container is running
 if ! docker ps | grep -q "$KAFKA_CONTAINER"; then
@@ -23,8 +25,19 @@ echo "Creating 'agent-logs' topic..."
 docker exec $KAFKA_CONTAINER kafka-topics --create --if-not-exists \
     --bootstrap-server localhost:9092 \
     --replication-factor 1 \
-    --partitions 1 \
+    --partitions "$AGENT_LOGS_PARTITIONS" \
     --topic agent-logs
 
+# Topics created by an older version of this script have a single partition
+CURRENT_PARTITIONS=$(docker exec $KAFKA_CONTAINER kafka-topics --describe \
+    --bootstrap-server localhost:9092 --topic agent-logs | grep -c "Partition: ")
+if [ "$CURRENT_PARTITIONS" -lt "$AGENT_LOGS_PARTITIONS" ]; then
+    echo "Increasing 'agent-logs' partitions from $CURRENT_PARTITIONS to $AGENT_LOGS_PARTITIONS..."
+    docker exec $KAFKA_CONTAINER kafka-topics --alter \
+        --bootstrap-server localhost:9092 \
+        --partitions "$AGENT_LOGS_PARTITIONS" \
+        --topic agent-logs
+fi
+
 echo "Kafka topics verification:"
 docker exec $KAFKA_CONTAINER kafka-topics --list --bootstrap-server localhost:9092
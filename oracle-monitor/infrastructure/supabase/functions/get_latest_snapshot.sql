@@ -1,8 +1,9 @@
 CREATE OR REPLACE FUNCTION get_latest_snapshot()
 RETURNS JSONB AS $$
 BEGIN
+    -- Resolved through get_snapshot() so delta rows return their full state
     RETURN (
-        SELECT state
+        SELECT get_snapshot(snapshot_id)
         FROM system_snapshots
         ORDER BY timestamp DESC
         LIMIT 1
@@ -0,0 +1,182 @@
+-- Server-side reconstruction of delta-encoded snapshots.
+-- Mirrors collectors/storage/delta.py: entity lists are keyed by identity, deltas are
+-- RFC 7386 JSON merge patches applied in timestamp order on top of their keyframe.
+-- Heartbeat rows (collectors/storage/rows.py) return the state of ref_snapshot_id
+-- under their own id and timestamp.
+
+CREATE OR REPLACE FUNCTION jsonb_merge_patch(target JSONB, patch JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    result JSONB;
+    k TEXT;
+    v JSONB;
+BEGIN
+    IF patch IS NULL OR jsonb_typeof(patch) <> 'object' THEN
+        RETURN patch;
+    END IF;
+
+    IF target IS NULL OR jsonb_typeof(target) <> 'object' THEN
+        result := '{}'::jsonb;
+    ELSE
+        result := target;
+    END IF;
+
+    FOR k, v IN SELECT * FROM jsonb_each(patch) LOOP
+        IF jsonb_typeof(v) = 'null' THEN
+            result := result - k;
+        ELSE
+            result := jsonb_set(result, ARRAY[k], jsonb_merge_patch(result -> k, v));
+        END IF;
+    END LOOP;
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION snapshot_keyed_list(items JSONB, key TEXT)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(COALESCE(e ->> key, '#' || (i - 1)), e), '{}'::jsonb)
+    FROM jsonb_array_elements(COALESCE(items, '[]'::jsonb)) WITH ORDINALITY AS t(e, i)
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION snapshot_unkeyed_list(items JSONB)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_agg(value ORDER BY key), '[]'::jsonb)
+    FROM jsonb_each(COALESCE(items, '{}'::jsonb))
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Same as workload_key() in delta.py: deployment names are only unique within a namespace of one cluster
+CREATE OR REPLACE FUNCTION snapshot_workload_key(w JSONB)
+RETURNS TEXT AS $$
+    SELECT CASE WHEN COALESCE(w ->> 'deployment_name', '') <> ''
+                THEN concat_ws('/', NULLIF(w ->> 'cluster', ''), NULLIF(w ->> 'namespace', ''), w ->> 'deployment_name')
+           END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION snapshot_to_keyed(s JSONB)
+RETURNS JSONB AS $$
+    SELECT s || jsonb_build_object(
+        'agents', snapshot_keyed_list(s -> 'agents', 'name'),
+        'workload', (
+            SELECT COALESCE(jsonb_object_agg(COALESCE(snapshot_workload_key(w), '#' || (i - 1)),
+                                             w || jsonb_build_object('pods', snapshot_keyed_list(w -> 'pods', 'pod_id'))),
+                            '{}'::jsonb)
+            FROM jsonb_array_elements(COALESCE(s -> 'workload', '[]'::jsonb)) WITH ORDINALITY AS t(w, i)
+        ),
+        'queues', snapshot_keyed_list(s -> 'queues', 'name'),
+        'litellm', snapshot_keyed_list(s -> 'litellm', 'model')
+    )
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION snapshot_from_keyed(k JSONB)
+RETURNS JSONB AS $$
+    SELECT k || jsonb_build_object(
+        'agents', snapshot_unkeyed_list(k -> 'agents'),
+        'workload', (
+            SELECT COALESCE(jsonb_agg(w.value || jsonb_build_object('pods', snapshot_unkeyed_list(w.value -> 'pods')) ORDER BY w.key), '[]'::jsonb)
+            FROM jsonb_each(COALESCE(k -> 'workload', '{}'::jsonb)) AS w
+        ),
+        'queues', snapshot_unkeyed_list(k -> 'queues'),
+        'litellm', snapshot_unkeyed_list(k -> 'litellm')
+    )
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Full state of one snapshot, whether stored as a keyframe or a delta
+CREATE OR REPLACE FUNCTION get_snapshot(p_snapshot_id TEXT)
+RETURNS JSONB AS $$
+DECLARE
+    target system_snapshots%ROWTYPE;
+    keyed JSONB;
+    patch JSONB;
+BEGIN
+    SELECT * INTO target FROM system_snapshots WHERE snapshot_id = p_snapshot_id;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    IF target.kind = 'keyframe' THEN
+        RETURN target.state;
+    END IF;
+    IF target.kind = 'heartbeat' THEN
+        RETURN get_snapshot(target.ref_snapshot_id)
+            || jsonb_build_object('id', target.snapshot_id, 'timestamp', to_jsonb(target.timestamp));
+    END IF;
+
+    SELECT snapshot_to_keyed(state) INTO keyed
+    FROM system_snapshots
+    WHERE snapshot_id = target.keyframe_id;
+    IF keyed IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    FOR patch IN
+        SELECT delta FROM system_snapshots
+        WHERE keyframe_id = target.keyframe_id
+          AND kind = 'delta'
+          AND timestamp <= target.timestamp
+        ORDER BY timestamp
+    LOOP
+        keyed := jsonb_merge_patch(keyed, patch);
+    END LOOP;
+
+    RETURN snapshot_from_keyed(keyed);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- State as of a point in time: the newest snapshot taken at or before p_at
+CREATE OR REPLACE FUNCTION get_snapshot_at(p_at TIMESTAMPTZ)
+RETURNS JSONB AS $$
+    SELECT get_snapshot(snapshot_id)
+    FROM system_snapshots
+    WHERE timestamp <= p_at
+    ORDER BY timestamp DESC
+    LIMIT 1
+$$ LANGUAGE sql STABLE;
+
+-- Every snapshot since p_since, oldest first, replaying each keyframe chain once
+CREATE OR REPLACE FUNCTION get_snapshots_since(p_since TIMESTAMPTZ)
+RETURNS SETOF JSONB AS $$
+DECLARE
+    r system_snapshots%ROWTYPE;
+    keyed JSONB;
+    current JSONB;
+    start_at TIMESTAMPTZ;
+BEGIN
+    -- Rewind to the keyframe that the first snapshot in range builds on
+    SELECT kf.timestamp INTO start_at
+    FROM system_snapshots s
+    JOIN system_snapshots kf ON kf.snapshot_id = COALESCE(s.keyframe_id, s.snapshot_id)
+    WHERE s.timestamp >= p_since
+    ORDER BY s.timestamp
+    LIMIT 1;
+    IF start_at IS NULL THEN
+        RETURN;
+    END IF;
+
+    FOR r IN SELECT * FROM system_snapshots WHERE timestamp >= start_at ORDER BY timestamp LOOP
+        IF r.kind = 'keyframe' THEN
+            current := r.state;
+            keyed := NULL;
+        ELSIF current IS NULL AND keyed IS NULL THEN
+            -- Chain starts before the range and its keyframe is gone
+            CONTINUE;
+        ELSIF r.kind = 'delta' THEN
+            -- Keyed form is only built once a chain actually has deltas
+            keyed := jsonb_merge_patch(COALESCE(keyed, snapshot_to_keyed(current)), r.delta);
+            current := NULL;
+        ELSIF r.kind <> 'heartbeat' THEN
+            CONTINUE;
+        END IF;
+
+        IF r.timestamp >= p_since THEN
+            -- Rebuilt lazily: a run of heartbeats shares one reconstruction
+            IF current IS NULL THEN
+                current := snapshot_from_keyed(keyed);
+            END IF;
+            IF r.kind = 'heartbeat' THEN
+                RETURN NEXT current || jsonb_build_object('id', r.snapshot_id, 'timestamp', to_jsonb(r.timestamp));
+            ELSE
+                RETURN NEXT current;
+            END IF;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql STABLE;
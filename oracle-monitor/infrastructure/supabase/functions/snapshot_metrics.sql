@@ -0,0 +1,136 @@
+-- Downsampled aggregates over the metrics column of system_snapshots (migrations/009_snapshot_metrics.sql).
+-- Reports over days or weeks read one small flat object per row and aggregate it in SQL, so neither
+-- Postgres nor the API has to rebuild or ship full snapshot states.
+
+-- Same series as summary_metrics() in collectors/storage/timeseries.py
+CREATE OR REPLACE FUNCTION snapshot_summary_metrics(s JSONB)
+RETURNS JSONB AS $$
+    WITH deployments AS (
+        -- "<cluster>/<namespace>/<name>" (functions/snapshot_deltas.sql)
+        SELECT w, snapshot_workload_key(w) AS name
+        FROM jsonb_array_elements(COALESCE(s -> 'workload', '[]'::jsonb)) AS w
+        WHERE COALESCE(w ->> 'deployment_name', '') <> ''
+    )
+    SELECT COALESCE(jsonb_object_agg(m.key, m.value), '{}'::jsonb)
+    FROM (
+        SELECT 'deployment:' || name || ':active_pods' AS key, w -> 'live' -> 'active_pods' AS value
+        FROM deployments
+        WHERE jsonb_typeof(w -> 'live' -> 'active_pods') = 'number'
+        UNION ALL
+        SELECT 'deployment:' || d.name || ':restarts', to_jsonb(sum((p ->> 'restarts')::numeric))
+        FROM deployments d
+        CROSS JOIN LATERAL jsonb_array_elements(CASE WHEN jsonb_typeof(d.w -> 'pods') = 'array'
+                                                     THEN d.w -> 'pods' ELSE '[]'::jsonb END) AS p
+        WHERE jsonb_typeof(p -> 'restarts') = 'number'
+        GROUP BY d.name
+        UNION ALL
+        SELECT 'queue:' || (q ->> 'name') || ':depth',
+               CASE WHEN jsonb_typeof(q -> 'depth') = 'number' THEN q -> 'depth'
+                    WHEN jsonb_typeof(q -> 'tasks') = 'array' THEN to_jsonb(jsonb_array_length(q -> 'tasks'))
+                    ELSE '0'::jsonb END
+        FROM jsonb_array_elements(COALESCE(s -> 'queues', '[]'::jsonb)) AS q
+        WHERE COALESCE(q ->> 'name', '') <> ''
+        UNION ALL
+        SELECT 'model:' || (l ->> 'model') || ':' || f, l -> f
+        FROM jsonb_array_elements(COALESCE(s -> 'litellm', '[]'::jsonb)) AS l
+        CROSS JOIN unnest(ARRAY['rpm', 'tpm', 'rpm_max', 'tpm_max']) AS f
+        WHERE COALESCE(l ->> 'model', '') <> '' AND jsonb_typeof(l -> f) = 'number'
+    ) m
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Fill metrics for state rows since p_since that predate the column; returns the number of rows updated
+CREATE OR REPLACE FUNCTION backfill_snapshot_metrics(p_since TIMESTAMPTZ)
+RETURNS INTEGER AS $$
+    WITH filled AS (
+        UPDATE system_snapshots s
+        SET metrics = snapshot_summary_metrics(r.state)
+        FROM get_snapshots_since(p_since) AS r(state)
+        WHERE s.snapshot_id = r.state ->> 'id'
+          AND s.kind <> 'heartbeat'
+          AND s.metrics IS NULL
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM filled
+$$ LANGUAGE sql VOLATILE;
+
+-- Aggregates of every series (or those matching one of the LIKE patterns in p_series) between p_start
+-- and p_end, in p_bucket wide buckets aligned to p_start, plus the same aggregates over the whole range.
+-- Returned as one object with a column of values per aggregate:
+--   {"start", "end", "bucket_seconds",
+--    "series": {"<series>": {"t": [bucket starts], "n", "avg", "min", "max", "p50", "p95": [...],
+--                            "total": {"n", "avg", "min", "max", "p50", "p95"}}}}
+-- Percentiles are nearest-rank. Samples are first counted per distinct value: pod counts, restarts and
+-- queue depths repeat a lot, so the ranking works on far fewer rows than there are samples.
+CREATE OR REPLACE FUNCTION get_snapshot_metrics(
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ,
+    p_bucket INTERVAL,
+    p_series TEXT[] DEFAULT NULL
+)
+RETURNS JSONB AS $$
+    WITH counts AS (
+        SELECT m.key AS series, date_bin(p_bucket, s.timestamp, p_start) AS bucket, m.value::float8 AS value,
+               count(*) AS c
+        FROM system_snapshots s
+        -- Heartbeats are a primary key lookup of their ref row's metrics
+        CROSS JOIN LATERAL jsonb_each_text(CASE WHEN s.kind = 'heartbeat'
+            THEN (SELECT ref.metrics FROM system_snapshots ref WHERE ref.snapshot_id = s.ref_snapshot_id)
+            ELSE s.metrics END) AS m
+        WHERE s.timestamp >= p_start AND s.timestamp < p_end
+          AND (p_series IS NULL OR m.key LIKE ANY (p_series))
+        GROUP BY 1, 2, 3
+    ),
+    bucket_ranks AS (
+        SELECT series, bucket, value, c,
+               sum(c) OVER (PARTITION BY series, bucket ORDER BY value) AS cum,
+               sum(c) OVER (PARTITION BY series, bucket) AS n
+        FROM counts
+    ),
+    buckets AS (
+        SELECT series, bucket, max(n) AS n, sum(value * c) / max(n) AS avg, min(value) AS min, max(value) AS max,
+               min(value) FILTER (WHERE cum >= 0.5 * n) AS p50,
+               min(value) FILTER (WHERE cum >= 0.95 * n) AS p95
+        FROM bucket_ranks
+        GROUP BY series, bucket
+    ),
+    total_ranks AS (
+        SELECT series, value, c,
+               sum(c) OVER (PARTITION BY series ORDER BY value) AS cum,
+               sum(c) OVER (PARTITION BY series) AS n
+        FROM (SELECT series, value, sum(c) AS c FROM counts GROUP BY series, value) v
+    ),
+    totals AS (
+        SELECT series, jsonb_build_object(
+                   'n', max(n), 'avg', sum(value * c) / max(n), 'min', min(value), 'max', max(value),
+                   'p50', min(value) FILTER (WHERE cum >= 0.5 * n),
+                   'p95', min(value) FILTER (WHERE cum >= 0.95 * n)
+               ) AS total
+        FROM total_ranks
+        GROUP BY series
+    ),
+    per_series AS (
+        SELECT series, jsonb_build_object(
+                   't', jsonb_agg(bucket ORDER BY bucket),
+                   'n', jsonb_agg(n ORDER BY bucket),
+                   'avg', jsonb_agg(avg ORDER BY bucket),
+                   'min', jsonb_agg(min ORDER BY bucket),
+                   'max', jsonb_agg(max ORDER BY bucket),
+                   'p50', jsonb_agg(p50 ORDER BY bucket),
+                   'p95', jsonb_agg(p95 ORDER BY bucket)
+               ) AS data
+        FROM buckets
+        GROUP BY series
+    )
+    SELECT jsonb_build_object(
+        'start', p_start,
+        'end', p_end,
+        'bucket_seconds', extract(epoch FROM p_bucket),
+        'series', COALESCE((
+            SELECT jsonb_object_agg(p.series, p.data || jsonb_build_object('total', t.total))
+            FROM per_series p
+            JOIN totals t USING (series)
+        ), '{}'::jsonb)
+    )
+$$ LANGUAGE sql STABLE
+-- Keeps the value counts of a week-long range in memory instead of spilling hash batches to disk
+SET work_mem = '64MB';
@@ -0,0 +1,11 @@
+-- Keyframe + delta snapshot storage.
+-- Keyframe rows keep the full state. Delta rows leave state NULL and store a JSON merge patch
+-- against the previous snapshot of the same keyframe chain (see functions/snapshot_deltas.sql).
+-- Existing rows are full snapshots and become keyframes.
+
+ALTER TABLE system_snapshots ALTER COLUMN state DROP NOT NULL;
+ALTER TABLE system_snapshots ADD COLUMN IF NOT EXISTS kind TEXT NOT NULL DEFAULT 'keyframe';
+ALTER TABLE system_snapshots ADD COLUMN IF NOT EXISTS keyframe_id TEXT;
+ALTER TABLE system_snapshots ADD COLUMN IF NOT EXISTS delta JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_snapshots_keyframe ON system_snapshots (keyframe_id, timestamp);
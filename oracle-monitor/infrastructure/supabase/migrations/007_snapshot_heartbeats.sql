@@ -0,0 +1,10 @@
+-- Content hashes and heartbeat rows.
+-- A heartbeat row (kind = 'heartbeat') records a snapshot whose content, apart from id and timestamp,
+-- equals an earlier row: state and delta are NULL and ref_snapshot_id points at the row holding the state.
+-- get_snapshot() and friends (functions/snapshot_deltas.sql) resolve heartbeats transparently.
+
+ALTER TABLE system_snapshots ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE system_snapshots ADD COLUMN IF NOT EXISTS section_hashes JSONB;
+ALTER TABLE system_snapshots ADD COLUMN IF NOT EXISTS ref_snapshot_id TEXT;
+
+COMMENT ON COLUMN system_snapshots.kind IS 'keyframe (full state), delta (merge patch) or heartbeat (unchanged since ref_snapshot_id)';
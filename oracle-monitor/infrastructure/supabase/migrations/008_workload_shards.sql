@@ -0,0 +1,15 @@
+-- Sharded K8s collection.
+-- Each member of COLLECTOR_SHARD_MEMBERS (collectors/shard.py) upserts one row with the workload of the
+-- targets ("<namespace>" or "<kube context>/<namespace>") it owns, keyed by target. The snapshot
+-- collector merges the rows into the workload section of system_snapshots.
+
+CREATE TABLE IF NOT EXISTS workload_shards (
+    shard_id TEXT PRIMARY KEY,
+    members TEXT[] NOT NULL,
+    targets TEXT[] NOT NULL,
+    workload JSONB NOT NULL,
+    collected_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Written and read with the service role only
+ALTER TABLE workload_shards ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,10 @@
+-- Numeric series per snapshot, for range reports.
+-- State rows (keyframe and delta) carry the snapshot's deployment, queue and model series as a flat
+-- {"<series>": value} object (collectors/storage/timeseries.py summary_metrics); heartbeat rows leave it
+-- NULL and share the metrics of ref_snapshot_id. get_snapshot_metrics() (functions/snapshot_metrics.sql)
+-- aggregates this column over a time range without reconstructing any state.
+-- Rows written before this migration can be filled with backfill_snapshot_metrics().
+
+ALTER TABLE system_snapshots ADD COLUMN IF NOT EXISTS metrics JSONB;
+
+COMMENT ON COLUMN system_snapshots.metrics IS 'Series name -> value (deployment:<ns>/<name>:active_pods|restarts, queue:<name>:depth, model:<name>:rpm|tpm|rpm_max|tpm_max); NULL on heartbeat rows';
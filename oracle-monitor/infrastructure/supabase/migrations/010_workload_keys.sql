@@ -0,0 +1,124 @@
+-- Workload entries are identified by "<cluster>/<namespace>/<deployment_name>" instead of the deployment
+-- name alone, which merged same-named deployments of different namespaces or clusters. This applies to the
+-- keyed form that deltas patch (functions/snapshot_deltas.sql snapshot_workload_key) and to the deployment
+-- series in the metrics column ("deployment:<cluster>/<namespace>/<name>:<field>").
+-- Stored rows are rewritten to the new keys: each delta's workload patch is rekeyed by walking its chain in
+-- the old keyed form, and each state row's deployment series are renamed after the deployments in that
+-- snapshot. Self-contained, so it doesn't matter whether the functions were reapplied first.
+
+CREATE FUNCTION pg_temp.workload_key(w JSONB)
+RETURNS TEXT AS $$
+    SELECT CASE WHEN COALESCE(w ->> 'deployment_name', '') <> ''
+                THEN concat_ws('/', NULLIF(w ->> 'cluster', ''), NULLIF(w ->> 'namespace', ''), w ->> 'deployment_name')
+           END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION pg_temp.keyed_list(items JSONB, key TEXT)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(COALESCE(e ->> key, '#' || (i - 1)), e), '{}'::jsonb)
+    FROM jsonb_array_elements(COALESCE(items, '[]'::jsonb)) WITH ORDINALITY AS t(e, i)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- The workload section keyed the old way, by deployment_name
+CREATE FUNCTION pg_temp.old_keyed_workload(s JSONB)
+RETURNS JSONB AS $$
+    SELECT pg_temp.keyed_list((
+        SELECT COALESCE(jsonb_agg(w || jsonb_build_object('pods', pg_temp.keyed_list(w -> 'pods', 'pod_id')) ORDER BY i), '[]'::jsonb)
+        FROM jsonb_array_elements(COALESCE(s -> 'workload', '[]'::jsonb)) WITH ORDINALITY AS t(w, i)
+    ), 'deployment_name')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION pg_temp.merge_patch(target JSONB, patch JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    result JSONB;
+    k TEXT;
+    v JSONB;
+BEGIN
+    IF patch IS NULL OR jsonb_typeof(patch) <> 'object' THEN
+        RETURN patch;
+    END IF;
+    result := CASE WHEN jsonb_typeof(target) = 'object' THEN target ELSE '{}'::jsonb END;
+    FOR k, v IN SELECT * FROM jsonb_each(patch) LOOP
+        IF jsonb_typeof(v) = 'null' THEN
+            result := result - k;
+        ELSE
+            result := jsonb_set(result, ARRAY[k], pg_temp.merge_patch(result -> k, v));
+        END IF;
+    END LOOP;
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- "deployment:<namespace>/<name>:<field>" -> "deployment:<cluster>/<namespace>/<name>:<field>" for the
+-- deployments in `workload` (an array of entries)
+CREATE FUNCTION pg_temp.rename_series(metrics JSONB, workload JSONB)
+RETURNS JSONB AS $$
+    WITH names AS (
+        SELECT DISTINCT ON (old_name) old_name, new_name
+        FROM (
+            SELECT CASE WHEN COALESCE(w ->> 'namespace', '') <> ''
+                        THEN (w ->> 'namespace') || '/' || (w ->> 'deployment_name')
+                        ELSE w ->> 'deployment_name' END AS old_name,
+                   pg_temp.workload_key(w) AS new_name
+            FROM jsonb_array_elements(COALESCE(workload, '[]'::jsonb)) AS w
+            WHERE COALESCE(w ->> 'deployment_name', '') <> ''
+        ) n
+    )
+    SELECT COALESCE(jsonb_object_agg(COALESCE('deployment:' || n.new_name || ':' || substring(m.key FROM ':([^:]+)$'),
+                                              m.key), m.value), '{}'::jsonb)
+    FROM jsonb_each(metrics) AS m
+    LEFT JOIN names n ON m.key LIKE 'deployment:%'
+                     AND substring(m.key FROM '^deployment:(.*):[^:]+$') = n.old_name
+$$ LANGUAGE sql IMMUTABLE;
+
+DO $$
+DECLARE
+    r RECORD;
+    chain TEXT;
+    workload JSONB;
+    patch JSONB;
+    rekeyed JSONB;
+    entity JSONB;
+    k TEXT;
+    v JSONB;
+BEGIN
+    FOR r IN
+        SELECT snapshot_id, kind, keyframe_id, state, delta, metrics
+        FROM system_snapshots
+        WHERE kind IN ('keyframe', 'delta')
+        ORDER BY COALESCE(keyframe_id, snapshot_id), timestamp
+    LOOP
+        IF r.kind = 'keyframe' THEN
+            chain := r.snapshot_id;
+            workload := pg_temp.old_keyed_workload(r.state);
+        ELSIF r.keyframe_id IS DISTINCT FROM chain THEN
+            -- Keyframe is gone: the row can't be reconstructed either way
+            CONTINUE;
+        ELSE
+            patch := r.delta -> 'workload';
+            IF jsonb_typeof(patch) = 'object' THEN
+                rekeyed := '{}'::jsonb;
+                FOR k, v IN SELECT * FROM jsonb_each(patch) LOOP
+                    -- A removed entry is named after its last state, an added or changed one after its new state
+                    entity := CASE WHEN jsonb_typeof(v) = 'null' THEN workload -> k
+                                   ELSE pg_temp.merge_patch(workload -> k, v) END;
+                    rekeyed := rekeyed || jsonb_build_object(COALESCE(pg_temp.workload_key(entity), k), v);
+                END LOOP;
+                UPDATE system_snapshots SET delta = jsonb_set(delta, '{workload}', rekeyed)
+                WHERE snapshot_id = r.snapshot_id;
+                workload := pg_temp.merge_patch(workload, patch);
+            END IF;
+        END IF;
+
+        IF r.metrics IS NOT NULL THEN
+            UPDATE system_snapshots
+            SET metrics = pg_temp.rename_series(r.metrics, (SELECT COALESCE(jsonb_agg(value), '[]'::jsonb)
+                                                              FROM jsonb_each(COALESCE(workload, '{}'::jsonb))))
+            WHERE snapshot_id = r.snapshot_id;
+        END IF;
+    END LOOP;
+END;
+$$;
+
+COMMENT ON COLUMN system_snapshots.metrics IS 'Series name -> value (deployment:<cluster>/<namespace>/<name>:active_pods|restarts, queue:<name>:depth, model:<name>:rpm|tpm|rpm_max|tpm_max); NULL on heartbeat rows';
@@ -0,0 +1,7 @@
+-- Targets a shard failed to collect in its latest cycle.
+-- Their entry in workload is the last data collected for them, not fresh data, so the snapshot collector
+-- prefers another row that collected them and otherwise lists workload in stale_sections.
+
+ALTER TABLE workload_shards ADD COLUMN IF NOT EXISTS failed TEXT[] NOT NULL DEFAULT '{}';
+
+COMMENT ON COLUMN workload_shards.failed IS 'Targets whose collection failed at collected_at; workload holds their last collected data';
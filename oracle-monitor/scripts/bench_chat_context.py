@@ -0,0 +1,105 @@
+"""
+Size and build time of the /chat/query snapshot context at 10 to 5000
+agents and pods.
+
+Compares the previous context (`json.dumps(indent=2)` cut at 30,000
+characters) with build_context. Each fleet has four problems planted at the
+end of their lists: a failed agent task, a crash-looping pod, a backed-up
+queue and a saturated model. "found" counts how many of them the context
+still mentions. Tokens are estimated as characters / 4.
+
+Usage: python scripts/bench_chat_context.py [--repeat 20] [--question "why are pods restarting?"]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.chat_context import build_context
+
+TS = "2024-01-01T00:00:00+00:00"
+PLANTED = ("agent-broken", "deployment-broken-0", "queue-backlog", "gpt-4-saturated")
+
+
+def make_snapshot(n):
+    pods_per_dep = 10
+    snapshot = {
+        "id": "snapshot-bench",
+        "timestamp": TS,
+        "agents": [
+            {
+                "name": f"agent-{i}",
+                "description": f"Agent number {i}, handles its share of incoming tasks",
+                "deployment_name": f"agent-{i % 50}-deployment",
+                "max_parallel_invocations": 4,
+                "models": ["gpt-4"],
+                "activity": {
+                    "active_task_ids": [{"id": f"task-{i}", "started_on": TS, "status": "running"}],
+                    "updated_at": TS,
+                },
+            }
+            for i in range(n)
+        ],
+        "workload": [
+            {
+                "deployment_name": f"deployment-{d}",
+                "namespace": "agents",
+                "max_pods": pods_per_dep * 2,
+                "live": {"active_pods": pods_per_dep, "updated_at": TS, "image": "agent:latest", "rolled_out_at": TS},
+                "pods": [
+                    {"pod_id": f"deployment-{d}-{p}", "status": "Running", "cpu": 25.0, "memory": 64.0,
+                     "restarts": 0, "updated_at": TS}
+                    for p in range(pods_per_dep)
+                ],
+            }
+            for d in range(max(1, n // pods_per_dep))
+        ],
+        "queues": [{"name": f"queue-{q}", "tasks": [{"id": f"q{q}-t{t}", "waiting_since_mins": 1} for t in range(3)]}
+                   for q in range(max(1, n // 100))],
+        "litellm": [{"model": f"model-{m}", "provider": "openai", "rpm": 1, "rpm_max": 50, "tpm": 10, "tpm_max": 90000}
+                    for m in range(max(1, n // 200))],
+    }
+    snapshot["agents"].append({
+        "name": "agent-broken", "deployment_name": "agent-broken-deployment", "models": ["gpt-4"],
+        "activity": {"active_task_ids": [{"id": "task-x", "started_on": TS, "status": "failed"}], "updated_at": TS},
+    })
+    snapshot["workload"].append({
+        "deployment_name": "deployment-broken", "namespace": "agents", "max_pods": 2,
+        "live": {"active_pods": 1, "updated_at": TS},
+        "pods": [{"pod_id": "deployment-broken-0", "status": "CrashLoopBackOff", "cpu": 0, "memory": 0, "restarts": 12}],
+    })
+    snapshot["queues"].append({"name": "queue-backlog", "tasks": [{"id": f"b{t}", "waiting_since_mins": 40}
+                                                                  for t in range(80)]})
+    snapshot["litellm"].append({"model": "gpt-4-saturated", "rpm": 49, "rpm_max": 50, "tpm": 10, "tpm_max": 90000})
+    return snapshot
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--question", default="How is the system doing?")
+    args = parser.parse_args()
+
+    print(f"question: {args.question!r}")
+    print(f"{'agents/pods':>12} {'':>8} {'tokens':>8} {'found':>6} {'ms':>7}")
+    for n in (10, 100, 1000, 5000):
+        snapshot = make_snapshot(n)
+        legacy, legacy_ms = timed(lambda: json.dumps(snapshot, indent=2)[:30000], args.repeat)
+        compact, compact_ms = timed(lambda: build_context(snapshot, args.question), args.repeat)
+        for label, text, ms in (("legacy", legacy, legacy_ms), ("compact", compact, compact_ms)):
+            found = sum(1 for name in PLANTED if name in text)
+            print(f"{n:>12} {label:>8} {len(text) // 4:>8} {found:>4}/{len(PLANTED)} {ms:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Perceived latency of concurrent chats against a local fake model stream.
+
+Serves two routes with uvicorn on localhost, both backed by FakeChatModel
+(one word every --delay seconds):
+- "blocking" reproduces the previous /chat/query: the generation runs
+  synchronously inside the async route, so the answer comes back whole and
+  concurrent chats queue behind each other on the event loop.
+- "streaming" is /chat/stream's stream_events: the model is awaited, and
+  each word goes out as an SSE delta.
+
+For --clients concurrent chats, reports time to first token and time to the
+complete answer (median and worst).
+
+Usage: python scripts/bench_chat_stream.py [--clients 8] [--words 40] [--delay 0.02]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from api.services.chat_model import FakeChatModel, stream_events
+
+PORT = 18124
+URL = f"http://127.0.0.1:{PORT}"
+
+
+def make_app(model: FakeChatModel):
+    app = FastAPI()
+
+    @app.post("/blocking")
+    async def blocking():
+        # What a synchronous client call inside an async route does to the loop
+        words = model.reply.split(" ")
+        for _ in words:
+            time.sleep(model.delay_seconds)
+        return {"reply": model.reply}
+
+    @app.post("/streaming")
+    async def streaming():
+        return StreamingResponse(stream_events(model, "", "", {"context_used": True}), media_type="text/event-stream")
+
+    return app
+
+
+async def one_chat(client: httpx.AsyncClient, path: str):
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", f"{URL}{path}") as response:
+        async for chunk in response.aiter_text():
+            if first is None and ("event: delta" in chunk or path == "/blocking"):
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def run(path: str, clients: int):
+    async with httpx.AsyncClient(timeout=120) as client:
+        return await asyncio.gather(*(one_chat(client, path) for _ in range(clients)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--words", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    model = FakeChatModel(args.delay, " ".join(f"word{i}" for i in range(args.words)))
+    server = uvicorn.Server(uvicorn.Config(make_app(model), port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    print(f"{args.clients} concurrent chats, {args.words} words at {args.delay * 1000:.0f} ms each")
+    print(f"{'':>10} {'first token p50':>16} {'worst':>8} {'full answer p50':>16} {'worst':>8}   (s)")
+    for path in ("/blocking", "/streaming"):
+        results = asyncio.run(run(path, args.clients))
+        firsts, totals = [r[0] for r in results], [r[1] for r in results]
+        print(f"{path[1:]:>10} {statistics.median(firsts):>16.2f} {max(firsts):>8.2f} "
+              f"{statistics.median(totals):>16.2f} {max(totals):>8.2f}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Cost of one heartbeat round for N co-located agents against the real
+/agents routes (served by uvicorn on localhost, memory registry).
+
+Compares the previous per-agent heartbeat (full payload, new connection per
+request) with HeartbeatCoalescer (one batched request of changed fields over
+a keep-alive session). Reports wall time, requests and bytes sent per round.
+
+Usage: python scripts/bench_heartbeats.py [--agents 1000] [--rounds 3]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import uvicorn
+from fastapi import FastAPI
+
+from agents.base.heartbeat import HeartbeatCoalescer
+from api.routes import agents as agent_routes
+
+PORT = 18123
+URL = f"http://127.0.0.1:{PORT}"
+
+
+class BenchAgent:
+    def __init__(self, name: str):
+        self.name = name
+        self.deployment_name = f"{name}-deployment"
+
+    def payload(self):
+        return {
+            "name": self.name,
+            "deployment_name": self.deployment_name,
+            "description": f"{self.name} agent",
+            "models": [],
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def heartbeat_state(self):
+        return {"deployment_name": self.deployment_name}
+
+    def register(self):
+        requests.post(f"{URL}/agents/register", json=self.payload()).raise_for_status()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    app = FastAPI()
+    app.include_router(agent_routes.router, prefix="/agents")
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    fleet = [BenchAgent(f"bench-{i}") for i in range(args.agents)]
+    for agent in fleet:
+        agent.register()
+
+    sent = 0
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for agent in fleet:
+            body = json.dumps(agent.payload())
+            sent += len(body)
+            requests.post(f"{URL}/agents/heartbeat", data=body,
+                          headers={"Content-Type": "application/json"}).raise_for_status()
+    single = (time.perf_counter() - start) / args.rounds
+    print(f"per-agent posts: {single * 1000:>8.1f} ms/round  {args.agents} requests  {sent // args.rounds:>8} bytes")
+
+    coalescer = HeartbeatCoalescer(URL, interval_seconds=3600)
+    post = coalescer.session.post
+    sizes = []
+
+    def measured_post(url, **kwargs):
+        sizes.append(len(json.dumps(kwargs["json"])))
+        return post(url, **kwargs)
+
+    coalescer.session.post = measured_post
+    for agent in fleet:
+        coalescer.add(agent)
+    # First round carries every field; later rounds only names
+    coalescer.flush()
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        coalescer.flush()
+    batched = (time.perf_counter() - start) / args.rounds
+    print(f"coalesced batch: {batched * 1000:>8.1f} ms/round  1 request  {sizes[-1]:>8} bytes "
+          f"(first round {sizes[0]})  {single / batched:.0f}x")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
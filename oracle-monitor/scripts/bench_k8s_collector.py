@@ -0,0 +1,116 @@
+"""
+Benchmark K8sCollector against an in-process stand-in for the kube API.
+
+Compares the old per-deployment pod listing (N+1 calls) with the single
+namespace-wide list + label index, as the number of deployments grows.
+
+Usage: python scripts/bench_k8s_collector.py [--latency-ms 5] [--pods-per-deployment 3]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors.k8s_collector.collector import K8sCollector
+
+
+STARTED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_pod(dep_name, i):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=f"{dep_name}-{i}", labels={"app": dep_name, "tier": "agent"},
+                                 creation_timestamp=STARTED),
+        status=SimpleNamespace(phase="Running", container_statuses=[SimpleNamespace(restart_count=0)],
+                               conditions=[], start_time=STARTED),
+    )
+
+
+def make_deployment(dep_name, replicas):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=dep_name, creation_timestamp=STARTED),
+        status=SimpleNamespace(conditions=[]),
+        spec=SimpleNamespace(
+            replicas=replicas,
+            selector=SimpleNamespace(match_labels={"app": dep_name}),
+            template=SimpleNamespace(spec=SimpleNamespace(containers=[SimpleNamespace(image="agent:latest")])),
+        ),
+    )
+
+
+class FakeKubeAPI:
+    """Serves CoreV1Api, AppsV1Api and metrics.k8s.io calls; every call costs one simulated round trip."""
+
+    def __init__(self, deployments, pods_per_deployment, latency_s):
+        self.latency_s = latency_s
+        self.calls = 0
+        self.deployments = [make_deployment(f"agent-{d}", pods_per_deployment) for d in range(deployments)]
+        self.pods = [make_pod(dep.metadata.name, i) for dep in self.deployments for i in range(pods_per_deployment)]
+
+    def _round_trip(self):
+        self.calls += 1
+        time.sleep(self.latency_s)
+
+    def list_namespaced_deployment(self, namespace, **kwargs):
+        self._round_trip()
+        return SimpleNamespace(items=self.deployments, metadata=SimpleNamespace(_continue=None))
+
+    def list_namespaced_pod(self, namespace, label_selector=None, limit=None, _continue=None):
+        self._round_trip()
+        pods = self.pods
+        if label_selector:
+            wanted = dict(pair.split("=", 1) for pair in label_selector.split(","))
+            pods = [p for p in pods if all(p.metadata.labels.get(k) == v for k, v in wanted.items())]
+        start = int(_continue or 0)
+        end = start + limit if limit else len(pods)
+        token = str(end) if end < len(pods) else None
+        return SimpleNamespace(items=pods[start:end], metadata=SimpleNamespace(_continue=token))
+
+    def list_namespaced_custom_object(self, group, version, namespace, plural):
+        self._round_trip()
+        return {"items": [
+            {"metadata": {"name": p.metadata.name}, "timestamp": "2024-01-01T00:00:00Z",
+             "containers": [{"name": "agent", "usage": {"cpu": "25000000n", "memory": "65536Ki"}}]}
+            for p in self.pods
+        ]}
+
+
+def collect_per_deployment(api, namespace):
+    """The previous N+1 strategy, kept here only as the baseline."""
+    deployments = api.list_namespaced_deployment(namespace)
+    total = 0
+    for dep in deployments.items:
+        selector = ",".join(f"{k}={v}" for k, v in dep.spec.selector.match_labels.items())
+        total += len(api.list_namespaced_pod(namespace, label_selector=selector).items)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--pods-per-deployment", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'deployments':>12} {'strategy':>16} {'api calls':>10} {'latency ms':>11}")
+    for deployments in (5, 25, 100, 250):
+        api = FakeKubeAPI(deployments, args.pods_per_deployment, args.latency_ms / 1000)
+        start = time.perf_counter()
+        collect_per_deployment(api, "bench")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{deployments:>12} {'per-deployment':>16} {api.calls:>10} {elapsed:>11.1f}")
+
+        api = FakeKubeAPI(deployments, args.pods_per_deployment, args.latency_ms / 1000)
+        collector = K8sCollector(namespace="bench", core_api=api, apps_api=api, metrics_api=api)
+        start = time.perf_counter()
+        workload = collector.collect()
+        elapsed = (time.perf_counter() - start) * 1000
+        assert sum(len(w["pods"]) for w in workload) == len(api.pods)
+        print(f"{deployments:>12} {'label-index':>16} {api.calls:>10} {elapsed:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Throughput of the log collector's write path against a local stand-in for
+the agent_logs table.
+
+The stand-in is an HTTP server that accepts PostgREST-style inserts (one row
+or a JSON array) with a fixed per-request latency. Logs come from an
+in-memory consumer, so Kafka itself is not measured. Compares one insert per
+message (the previous loop) with BatchingLogSink.
+
+Usage: python scripts/bench_log_sink.py [--logs 5000] [--latency-ms 5] [--max-rows 500]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from collectors.storage.log_sink import BatchingLogSink, consume, to_log_row
+
+
+class FakeLogTable:
+    def __init__(self, latency_seconds: float):
+        self.rows = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        table = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(latency_seconds)
+                with table.lock:
+                    table.rows += len(body) if isinstance(body, list) else 1
+                    table.requests += 1
+                self.send_response(201)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.url = f"http://{host}:{port}/rest/v1/agent_logs"
+
+
+class FakeConsumer:
+    """Hands out pre-built log messages like KafkaConsumer.poll and counts commits."""
+
+    def __init__(self, n):
+        self.messages = [
+            SimpleNamespace(value={"level": "info", "message": f"step {i} done", "source": f"agent-{i % 8}",
+                                   "timestamp": "2024-01-01T00:00:00+00:00", "task_id": f"task-{i // 10}"})
+            for i in range(n)
+        ]
+        self.position = 0
+        self.committed = 0
+        self.paused = False
+
+    def poll(self, timeout_ms=0, max_records=500):
+        if self.paused:
+            return {}
+        batch = self.messages[self.position:self.position + max_records]
+        self.position += len(batch)
+        return {"agent-logs-0": batch} if batch else {}
+
+    def commit(self):
+        self.committed = self.position
+
+    def assignment(self):
+        return {"agent-logs-0"}
+
+    def pause(self, *partitions):
+        self.paused = True
+
+    def resume(self, *partitions):
+        self.paused = False
+
+    def __iter__(self):
+        while self.position < len(self.messages):
+            self.position += 1
+            yield self.messages[self.position - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logs", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--max-rows", type=int, default=500)
+    args = parser.parse_args()
+
+    session = requests.Session()
+
+    table = FakeLogTable(args.latency_ms / 1000)
+    consumer = FakeConsumer(args.logs)
+    start = time.perf_counter()
+    for message in consumer:
+        session.post(table.url, json=to_log_row(message.value)).raise_for_status()
+    per_message = time.perf_counter() - start
+    print(f"per-message insert: {args.logs / per_message:>9.0f} logs/s  ({table.requests} requests)")
+
+    table = FakeLogTable(args.latency_ms / 1000)
+    consumer = FakeConsumer(args.logs)
+    sink = BatchingLogSink(
+        insert=lambda rows: session.post(table.url, json=rows).raise_for_status(),
+        commit=consumer.commit,
+        max_rows=args.max_rows,
+    )
+    start = time.perf_counter()
+    consume(consumer, sink, should_stop=lambda: consumer.position >= args.logs and not sink.buffer)
+    batched = time.perf_counter() - start
+    assert table.rows == args.logs and consumer.committed == args.logs
+    print(f"batching sink:      {args.logs / batched:>9.0f} logs/s  ({table.requests} requests)  "
+          f"{per_message / batched:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
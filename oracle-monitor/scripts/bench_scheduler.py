@@ -0,0 +1,128 @@
+"""
+Source load and freshness: one shared tick vs the per-collector scheduler.
+
+Stand-in collectors mimic the real ones: LiteLLM rates change every call,
+queue depth changes now and then, agents and deployments almost never. All
+intervals are scaled down (default 1 s of real time = 100 s simulated) so
+the run is short. Reports calls per source, snapshots written, and how old
+the LiteLLM data in the latest snapshot is on average over time (what a
+dashboard sees). "scheduled+2s" publishes as soon as a section changes, at
+most every 2 s (SNAPSHOT_MIN_INTERVAL_SECONDS=2).
+
+Usage: python scripts/bench_scheduler.py [--simulated-seconds 600] [--scale 0.01]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors.aggregator.scheduler import CollectorScheduler
+from collectors.base.collector import Collector
+from collectors.litellm_collector.collector import LiteLLMCollector
+from collectors.k8s_collector.collector import K8sCollector
+from collectors.queue_collector.kafka_collector import QueueCollector
+from collectors.agent_collector.collector import AgentCollector
+
+
+def fake(real, change_probability, scale, latency):
+    """A collector with `real`'s intervals (scaled) whose output changes with the given probability."""
+
+    class Fake(Collector):
+        interval_seconds = real.interval_seconds * scale
+        min_interval_seconds = real.min_interval_seconds * scale
+        max_interval_seconds = real.max_interval_seconds * scale
+        deadline_seconds = real.deadline_seconds * scale
+
+        def __init__(self):
+            self.calls = 0
+            self.version = 0
+            # id(returned list) -> when it was collected; the lists are kept alive so ids stay unique
+            self.collected_at = {}
+            self.returned = []
+            self.lock = threading.Lock()
+            self.rng = random.Random(real.__name__)
+
+        def collect(self):
+            time.sleep(latency)
+            with self.lock:
+                self.calls += 1
+                if self.rng.random() < change_probability:
+                    self.version += 1
+                value = [{"version": self.version}]
+                self.returned.append(value)
+                self.collected_at[id(value)] = time.monotonic()
+                return value
+
+    return Fake()
+
+
+def make_collectors(scale, latency):
+    return {
+        "litellm": fake(LiteLLMCollector, 1.0, scale, latency),
+        "queues": fake(QueueCollector, 0.3, scale, latency),
+        "agents": fake(AgentCollector, 0.02, scale, latency),
+        "workload": fake(K8sCollector, 0.02, scale, latency),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--simulated-seconds", type=float, default=600)
+    parser.add_argument("--scale", type=float, default=0.01)
+    parser.add_argument("--tick", type=float, default=10, help="snapshot interval in simulated seconds")
+    args = parser.parse_args()
+
+    duration = args.simulated_seconds * args.scale
+    tick = args.tick * args.scale
+    min_spacing = 2 * args.scale
+    latency = 0.05 * args.scale
+
+    results = {}
+    for mode in ("tick", "scheduled", "scheduled+2s"):
+        collectors = make_collectors(args.scale, latency)
+        scheduler = None
+        if mode != "tick":
+            scheduler = CollectorScheduler(collectors)
+            scheduler.start(wait_seconds=1)
+
+        # (snapshot time, collection time of its litellm section)
+        published = []
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            started = time.monotonic()
+            if scheduler:
+                sections, _ = scheduler.latest()
+            else:
+                sections = {name: c.collect() for name, c in collectors.items()}
+            litellm = collectors["litellm"]
+            published.append((time.monotonic(), litellm.collected_at[id(sections["litellm"])]))
+
+            elapsed = time.monotonic() - started
+            if mode == "scheduled+2s":
+                time.sleep(max(0, min_spacing - elapsed))
+                scheduler.wait_for_change(tick - max(elapsed, min_spacing))
+            else:
+                time.sleep(max(0, tick - elapsed))
+        if scheduler:
+            scheduler.shutdown()
+
+        # Age of the latest snapshot's litellm data, averaged over time between publications
+        weighted = 0.0
+        for (t0, c0), (t1, _) in zip(published, published[1:]):
+            weighted += (t1 - t0) * ((t0 - c0) + (t1 - t0) / 2)
+        age = weighted / (published[-1][0] - published[0][0]) / args.scale
+        results[mode] = ({name: c.calls for name, c in collectors.items()}, len(published), age)
+
+    names = list(results["tick"][0])
+    print(f"{'mode':>13} " + " ".join(f"{n:>9}" for n in names) + f" {'calls':>6} {'snapshots':>10} {'litellm age':>12}")
+    for mode, (calls, snapshots, age) in results.items():
+        print(f"{mode:>13} " + " ".join(f"{calls[n]:>9}" for n in names)
+              + f" {sum(calls.values()):>6} {snapshots:>10} {age:>11.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare stored bytes for full vs keyframe+delta snapshot rows.
+
+Simulates a run of snapshots where a few pods and agents change each cycle,
+encodes them both ways, checks that every delta row reconstructs to the
+original state, and prints the total row size.
+
+Usage: python scripts/bench_snapshot_storage.py [--cycles 60] [--interval 30]
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors.storage.delta import DeltaEncoder, reconstruct, to_keyed
+from scripts.bench_validator import make_snapshot
+
+
+def simulate(n, cycles, seed=0):
+    rng = random.Random(seed)
+    snapshot = make_snapshot(n)
+    for cycle in range(cycles):
+        snapshot = copy.deepcopy(snapshot)
+        ts = f"2024-01-01T00:{cycle // 6:02d}:{cycle % 6 * 10:02d}+00:00"
+        snapshot["id"] = f"snapshot-{cycle}"
+        snapshot["timestamp"] = ts
+        # A handful of pods report new usage, one agent picks up a task
+        for dep in rng.sample(snapshot["workload"], min(3, len(snapshot["workload"]))):
+            pod = rng.choice(dep["pods"])
+            pod["cpu"] = round(rng.uniform(5, 90), 1)
+            pod["updated_at"] = ts
+        agent = rng.choice(snapshot["agents"])
+        agent["activity"]["active_task_ids"] = [{"id": f"task-{cycle}", "started_on": ts, "status": "running"}]
+        agent["activity"]["updated_at"] = ts
+        snapshot["litellm"][0]["rpm"] = cycle
+        yield snapshot
+
+
+def row_bytes(row):
+    return len(json.dumps(row, separators=(",", ":")))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=60)
+    parser.add_argument("--interval", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'agents/pods':>12} {'full KB':>9} {'delta KB':>9} {'ratio':>6}")
+    for n in (10, 100, 1000):
+        encoder = DeltaEncoder(args.interval)
+        full_total = delta_total = 0
+        keyframe, deltas = None, []
+        for snapshot in simulate(n, args.cycles):
+            full_total += row_bytes({"snapshot_id": snapshot["id"], "timestamp": snapshot["timestamp"], "state": snapshot})
+            row = encoder.encode(snapshot)
+            delta_total += row_bytes(row)
+
+            if row["kind"] == "keyframe":
+                keyframe, deltas = row["state"], []
+            else:
+                deltas.append(row["delta"])
+                # New entries may come back in a different list position; compare in keyed form
+                assert to_keyed(reconstruct(keyframe, deltas)) == to_keyed(snapshot)
+
+        print(f"{n:>12} {full_total / 1024:>9.1f} {delta_total / 1024:>9.1f} {full_total / delta_total:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
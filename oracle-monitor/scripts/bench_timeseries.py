@@ -0,0 +1,93 @@
+"""
+Range/aggregate queries: walking JSON snapshots vs the local time-series store.
+
+Builds `--hours` of snapshots at a 10s interval, loads them into a
+TimeSeriesStore in a temp directory, then asks both paths for the mean cpu
+of every pod and the max rpm per model over the last hour. The JSON walk
+starts from snapshots already in memory, so the Supabase round trip the CLI
+and reports pay today is not even counted.
+
+Usage: python scripts/bench_timeseries.py [--hours 6] [--pods 300]
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors.storage.timeseries import TimeSeriesStore, _epoch
+from scripts.bench_validator import make_snapshot
+
+INTERVAL = 10
+
+
+def build_snapshots(hours, pods):
+    rng = random.Random(0)
+    base = make_snapshot(pods)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    snapshots = []
+    for i in range(int(hours * 3600 / INTERVAL)):
+        snapshot = copy.deepcopy(base)
+        snapshot["timestamp"] = (start + timedelta(seconds=i * INTERVAL)).isoformat()
+        for deployment in snapshot["workload"]:
+            for pod in deployment["pods"]:
+                pod["cpu"] = round(rng.uniform(5, 90), 1)
+        snapshot["litellm"][0]["rpm"] = rng.randint(0, 50)
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def walk(snapshots, since):
+    cpu, rpm = {}, {}
+    for snapshot in snapshots:
+        if _epoch(snapshot["timestamp"]) < since:
+            continue
+        for deployment in snapshot["workload"]:
+            for pod in deployment["pods"]:
+                cpu.setdefault(pod["pod_id"], []).append(pod["cpu"])
+        for model in snapshot["litellm"]:
+            rpm[model["model"]] = max(rpm.get(model["model"], 0), model["rpm"])
+    return {pod: sum(v) / len(v) for pod, v in cpu.items()}, rpm
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=6)
+    parser.add_argument("--pods", type=int, default=300)
+    args = parser.parse_args()
+
+    snapshots = build_snapshots(args.hours, args.pods)
+    since = _epoch(snapshots[-1]["timestamp"]) - 3600
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TimeSeriesStore(directory, capacity=len(snapshots), max_series=args.pods * 3 + 64)
+        start = time.perf_counter()
+        for snapshot in snapshots:
+            store.append_snapshot(snapshot)
+        append_ms = (time.perf_counter() - start) * 1000 / len(snapshots)
+
+        print(f"{len(snapshots)} snapshots, {args.pods} pods: append {append_ms:.2f} ms/snapshot")
+        print("mean cpu per pod + max rpm per model:")
+        for label, window_start in (("last hour", since), (f"last {args.hours:g}h", None)):
+            start = time.perf_counter()
+            walked_cpu, walked_rpm = walk(snapshots, window_start or 0)
+            walk_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            cpu = store.aggregate("pod:*:cpu", start=window_start)
+            rpm = store.aggregate("model:*:rpm", start=window_start, how="max")
+            store_ms = (time.perf_counter() - start) * 1000
+
+            for pod, value in walked_cpu.items():
+                assert abs(cpu[f"pod:{pod}:cpu"] - value) < 1e-3
+            assert rpm["model:gpt-4:rpm"] == walked_rpm["gpt-4"]
+            print(f"  {label:>10}: JSON walk {walk_ms:>7.1f} ms, store {store_ms:>5.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark snapshot validation at 10/100/1000 agents and pods.
+
+Compares the previous per-snapshot `jsonschema.validate` call with the
+compiled SnapshotValidator: a cold run (every section checked), a run
+where only the litellm section changed, an unchanged snapshot rebuilt as
+new objects (sections hashed, not validated), and an unchanged snapshot
+whose sections are the same objects (neither hashed nor validated).
+
+Usage: python scripts/bench_validator.py [--repeat 20]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jsonschema
+
+from collectors.aggregator.validator import SCHEMA, SnapshotValidator
+
+TS = "2024-01-01T00:00:00+00:00"
+
+
+def make_snapshot(n):
+    pods_per_dep = 10
+    return {
+        "id": "snapshot-bench",
+        "timestamp": TS,
+        "agents": [
+            {
+                "name": f"agent-{i}",
+                "deployment_name": f"agent-{i % 50}-deployment",
+                "models": ["gpt-4"],
+                "activity": {
+                    "active_task_ids": [{"id": f"task-{i}", "started_on": TS, "status": "running"}],
+                    "updated_at": TS,
+                },
+            }
+            for i in range(n)
+        ],
+        "workload": [
+            {
+                "deployment_name": f"deployment-{d}",
+                "max_pods": pods_per_dep,
+                "live": {"active_pods": pods_per_dep, "updated_at": TS, "image": "agent:latest", "rolled_out_at": TS},
+                "pods": [
+                    {"pod_id": f"deployment-{d}-{p}", "status": "Running", "cpu": 25.0, "memory": 64.0,
+                     "restarts": 0, "updated_at": TS}
+                    for p in range(pods_per_dep)
+                ],
+            }
+            for d in range(max(1, n // pods_per_dep))
+        ],
+        "queues": [{"name": "agent-tasks", "tasks": [], "depth": 0, "updated_at": TS}],
+        "litellm": [{"model": "gpt-4", "provider": "openai", "rpm": 1, "rpm_max": 50, "tpm": 10, "tpm_max": 90000}],
+    }
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'agents/pods':>12} {'jsonschema':>11} {'cold':>7} {'1 changed':>10} "
+          f"{'equal copy':>11} {'same object':>12}   (ms/snapshot)")
+    for n in (10, 100, 1000):
+        snapshot = make_snapshot(n)
+
+        legacy = timed(lambda: jsonschema.validate(instance=snapshot, schema=SCHEMA), args.repeat)
+
+        # Cold: a new validator each time so no section hash is cached (compilation excluded)
+        validators = [SnapshotValidator(SCHEMA) for _ in range(args.repeat)]
+        start = time.perf_counter()
+        for v in validators:
+            assert v.validate(snapshot) is None
+        cold = (time.perf_counter() - start) * 1000 / args.repeat
+
+        validator = SnapshotValidator(SCHEMA)
+        validator.validate(snapshot)
+
+        # Collectors build fresh lists every cycle, so equal content arrives as new objects
+        copies = [copy.deepcopy(snapshot) for _ in range(args.repeat)]
+        for i, changed in enumerate(copies):
+            changed["litellm"][0]["rpm"] = i + 2
+        start = time.perf_counter()
+        for changed in copies:
+            assert validator.validate(changed) is None
+        one_changed = (time.perf_counter() - start) * 1000 / args.repeat
+
+        copies = [copy.deepcopy(snapshot) for _ in range(args.repeat)]
+        start = time.perf_counter()
+        for same in copies:
+            assert validator.validate(same) is None
+        equal_copy = (time.perf_counter() - start) * 1000 / args.repeat
+
+        # Cached or stale collector output is passed through as the same list object
+        same_object = timed(lambda: validator.validate(snapshot), args.repeat)
+
+        print(f"{n:>12} {legacy:>11.2f} {cold:>7.2f} {one_changed:>10.2f} {equal_copy:>11.2f} {same_object:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Local HTTP stand-in for the LiteLLM proxy.
+
+Serves /model/info and a Prometheus /metrics page whose request and token
+counters grow at a fixed rate, so LiteLLMCollector can be exercised without
+a real proxy or provider keys.
+
+Usage:
+    python scripts/fake_litellm.py --port 4001             # serve until Ctrl+C
+    python scripts/fake_litellm.py --port 4001 --check     # poll it with the collector and print rpm/tpm
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODELS = [
+    # (model_name, underlying model, rpm limit, tpm limit, requests/min, tokens per request)
+    ("gpt-4", "openai/gpt-4", 50, 90000, 30, 600),
+    ("gpt-3.5-turbo", "openai/gpt-3.5-turbo", 500, 200000, 240, 400),
+]
+
+
+class FakeLiteLLM:
+    def __init__(self, port: int):
+        self.started = time.monotonic()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real proxy
+
+            def do_GET(self):
+                if self.path == "/model/info":
+                    body = json.dumps({"data": fake.model_info()}).encode()
+                    content_type = "application/json"
+                elif self.path == "/metrics":
+                    body = fake.metrics().encode()
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def model_info(self):
+        return [
+            {
+                "model_name": name,
+                "litellm_params": {"model": model, "rpm": rpm, "tpm": tpm},
+                "model_info": {"litellm_provider": model.split("/")[0], "max_input_tokens": 128000},
+            }
+            for name, model, rpm, tpm, _, _ in MODELS
+        ]
+
+    def metrics(self) -> str:
+        minutes = (time.monotonic() - self.started) / 60
+        lines = ["# TYPE litellm_requests_metric_total counter"]
+        for name, model, _, _, per_min, _ in MODELS:
+            lines.append(f'litellm_requests_metric_total{{model="{name}",api_key_alias="bench"}} {per_min * minutes:.3f}')
+        lines.append("# TYPE litellm_total_tokens_total counter")
+        for name, model, _, _, per_min, tokens in MODELS:
+            lines.append(f'litellm_total_tokens_total{{model="{model}"}} {per_min * tokens * minutes:.3f}')
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=4001)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    fake = FakeLiteLLM(args.port).start()
+    print(f"Fake LiteLLM listening on {fake.url}")
+    if not args.check:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            fake.stop()
+        return
+
+    from collectors.litellm_collector.collector import LiteLLMCollector
+
+    collector = LiteLLMCollector(base_url=fake.url)
+    for _ in range(5):
+        for model in collector.collect():
+            print(f"{model['model']:>15} rpm={model['rpm']:>7} / {model['rpm_max']:<5} "
+                  f"tpm={model['tpm']:>9} / {model['tpm_max']}")
+        time.sleep(1)
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import pytest
+
+from api.services import chat_context
+from api.services.chat_context import AnswerCache, build_context, content_hash, relevant_sections
+
+def _pod(pod_id, status="Running", restarts=0, updated_at="2026-01-01T00:00:00Z"):
+    return {"pod_id": pod_id, "status": status, "restarts": restarts, "cpu": 10, "updated_at": updated_at}
+
+def _snapshot(**overrides):
+    snapshot = {
+        "id": "snapshot-1",
+        "timestamp": "2026-01-01T00:00:00Z",
+        "stale_sections": [],
+        "agents": [{"name": "research-agent", "activity": {"active_task_ids": []},
+                    "updated_at": "2026-01-01T00:00:00Z"}],
+        "workload": [
+            {"deployment_name": "api", "namespace": "prod", "max_pods": 4, "live": {"active_pods": 2},
+             "pods": [_pod("api-1"), _pod("api-2", status="CrashLoopBackOff", restarts=7)]},
+            {"deployment_name": "web", "namespace": "prod", "max_pods": 4, "live": {"active_pods": 1},
+             "pods": [_pod("web-1")]},
+        ],
+        "queues": [{"name": "agent-tasks", "depth": 3, "tasks": [], "updated_at": "2026-01-01T00:00:00Z"}],
+        "litellm": [{"model": "gpt-4", "rpm": 95, "rpm_max": 100, "tpm": 10, "tpm_max": 1000}],
+    }
+    snapshot.update(overrides)
+    return snapshot
+
+def test_relevant_sections_follow_keywords():
+    assert relevant_sections("Why is the pod crashing?") == ["workload"]
+    assert relevant_sections("queue backlog and token limits") == ["queues", "litellm"]
+    assert relevant_sections("How is everything?") == list(chat_context.SECTIONS)
+
+def test_context_lists_unhealthy_entities_first():
+    context = build_context(_snapshot(), "status of the deployments")
+    lines = context.splitlines()
+    attention = lines.index("ATTENTION (2):")
+    assert "deployment prod/api: 1 unhealthy pod(s): api-2 status CrashLoopBackOff, 7 restarts" in lines[attention + 1]
+    assert lines[attention + 2].startswith("- model gpt-4: rpm 95/100")
+    # Only the workload section is serialized, unhealthy deployment first, without updated_at noise
+    header = lines.index("workload (2), one JSON object per line:")
+    assert '"deployment_name":"api"' in lines[header + 1]
+    assert '"deployment_name":"web"' in lines[header + 2]
+    assert "updated_at" not in context
+    assert "Sections not included for this question: agents, queues, litellm" in context
+
+def test_context_reports_stale_sections():
+    context = build_context(_snapshot(stale_sections=["queues"]), "queues?")
+    assert "Stale (last good value, collector behind): queues" in context
+
+def test_context_counts_what_did_not_fit():
+    workload = [{"deployment_name": f"d{i}", "namespace": "prod", "pods": [_pod(f"d{i}-{j}") for j in range(3)]}
+                for i in range(200)]
+    context = build_context(_snapshot(workload=workload), "pods", max_chars=2000)
+    assert len(context) < 2500
+    assert "more workload omitted for length" in context
+
+def test_context_caps_healthy_pods():
+    pods = [_pod(f"p{i}") for i in range(chat_context.MAX_HEALTHY_PODS + 5)]
+    context = build_context(_snapshot(workload=[{"deployment_name": "big", "pods": pods}]), "pods")
+    assert '"healthy_pods_omitted":5' in context
+
+def test_context_without_snapshot():
+    assert build_context(None, "anything") == "No system data available."
+
+def test_content_hash_ignores_ids_timestamps_and_noise():
+    first = _snapshot(stale_sections=["queues", "agents"])
+    second = _snapshot(id="snapshot-2", timestamp="2026-01-01T00:01:00Z", stale_sections=["agents", "queues"])
+    second["agents"][0]["updated_at"] = "2026-01-01T00:01:00Z"
+    second["workload"][0]["pods"][0]["updated_at"] = "2026-01-01T00:01:00Z"
+    assert content_hash(first) == content_hash(second)
+
+def test_content_hash_changes_with_content():
+    changed = _snapshot()
+    changed["queues"][0]["depth"] = 4
+    assert content_hash(changed) != content_hash(_snapshot())
+    assert content_hash(_snapshot(stale_sections=["queues"])) != content_hash(_snapshot())
+
+def test_answer_cache_normalizes_questions():
+    cache = AnswerCache()
+    cache.put("h1", "Is the API healthy?", "yes")
+    assert cache.get("h1", "  is the   api healthy ") == "yes"
+    assert cache.get("h2", "Is the API healthy?") is None
+
+def test_answer_cache_evicts_least_recently_used():
+    cache = AnswerCache(max_size=2)
+    cache.put("h", "a", "1")
+    cache.put("h", "b", "2")
+    assert cache.get("h", "a") == "1"
+    cache.put("h", "c", "3")
+    assert cache.get("h", "b") is None
+    assert cache.get("h", "a") == "1" and cache.get("h", "c") == "3"
+
+def test_answer_cache_expires_entries(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(chat_context.time, "monotonic", lambda: clock[0])
+    cache = AnswerCache(ttl_seconds=60)
+    cache.put("h", "q", "answer")
+    clock[0] += 59
+    assert cache.get("h", "q") == "answer"
+    clock[0] += 2
+    assert cache.get("h", "q") is None
@@ -0,0 +1,82 @@
+from collectors.storage.delta import (
+    DeltaEncoder, apply_merge_patch, from_keyed, merge_patch, reconstruct, to_keyed, workload_key,
+)
+
+def _snapshot(i, workload=None, agents=None):
+    return {
+        "id": f"snapshot-{i}",
+        "timestamp": f"2026-01-01T00:00:{i:02d}+00:00",
+        "agents": agents or [],
+        "workload": workload or [],
+        "queues": [{"name": "agent-tasks", "depth": i}],
+        "litellm": [],
+        "stale_sections": [],
+    }
+
+def _deployment(name, namespace="default", cluster=None, pods=()):
+    deployment = {"deployment_name": name, "namespace": namespace, "pods": [{"pod_id": p, "cpu": 1} for p in pods]}
+    if cluster:
+        deployment["cluster"] = cluster
+    return deployment
+
+def test_merge_patch_is_minimal():
+    old = {"a": 1, "b": {"c": 2, "d": 3}, "gone": True}
+    new = {"a": 1, "b": {"c": 2, "d": 4}, "added": [1]}
+    assert merge_patch(old, new) == {"b": {"d": 4}, "gone": None, "added": [1]}
+    assert merge_patch(old, old) == {}
+
+def test_apply_merge_patch_round_trips():
+    old = {"a": 1, "b": {"c": 2, "d": 3}, "list": [1, 2], "gone": {"x": 1}}
+    new = {"a": 2, "b": {"c": 2}, "list": [3], "new": {"y": {"z": 1}}}
+    assert apply_merge_patch(old, merge_patch(old, new)) == new
+    # The target is not modified in place
+    assert old["b"] == {"c": 2, "d": 3}
+
+def test_apply_merge_patch_replaces_non_objects():
+    assert apply_merge_patch({"a": 1}, [1, 2]) == [1, 2]
+    assert apply_merge_patch("text", {"a": 1}) == {"a": 1}
+
+def test_workload_key_includes_cluster_and_namespace():
+    assert workload_key(_deployment("api", "prod", "eu")) == "eu/prod/api"
+    assert workload_key(_deployment("api", "prod")) == "prod/api"
+    assert workload_key({"namespace": "prod"}) is None
+
+def test_same_named_deployments_stay_apart_in_keyed_form():
+    state = _snapshot(0, workload=[_deployment("api", "prod", "eu", ["p1"]), _deployment("api", "prod", "us", ["p2"])])
+    keyed = to_keyed(state)
+    assert sorted(keyed["workload"]) == ["eu/prod/api", "us/prod/api"]
+    assert keyed["workload"]["eu/prod/api"]["pods"] == {"p1": {"pod_id": "p1", "cpu": 1}}
+    assert from_keyed(keyed)["workload"] == state["workload"]
+
+def test_changed_pod_patches_only_that_pod():
+    encoder = DeltaEncoder(keyframe_interval=10)
+    first = _snapshot(1, workload=[_deployment("api", pods=["p1", "p2"])])
+    second = _snapshot(2, workload=[_deployment("api", pods=["p1", "p2"])])
+    second["workload"][0]["pods"][1]["cpu"] = 5
+    encoder.encode(first)
+    row = encoder.encode(second)
+    assert row["kind"] == "delta"
+    assert row["delta"]["workload"] == {"default/api": {"pods": {"p2": {"cpu": 5}}}}
+
+def test_encoder_rows_reconstruct_every_snapshot():
+    snapshots = [
+        _snapshot(1, workload=[_deployment("api", pods=["p1"])], agents=[{"name": "a", "deployment_name": "d"}]),
+        _snapshot(2, workload=[_deployment("api", pods=["p1", "p2"])], agents=[{"name": "a", "deployment_name": "d"}]),
+        _snapshot(3, workload=[_deployment("api", pods=["p2"]), _deployment("web", pods=["w1"])]),
+        _snapshot(4, workload=[_deployment("web", pods=["w1"])]),
+    ]
+    encoder = DeltaEncoder(keyframe_interval=3)
+    rows = [encoder.encode(s) for s in snapshots]
+    assert [r["kind"] for r in rows] == ["keyframe", "delta", "delta", "keyframe"]
+
+    keyframe = rows[0]["state"]
+    for i, snapshot in enumerate(snapshots[:3]):
+        assert reconstruct(keyframe, [r["delta"] for r in rows[1:i + 1]]) == snapshot
+
+def test_reset_forces_a_keyframe():
+    encoder = DeltaEncoder(keyframe_interval=10)
+    encoder.encode(_snapshot(1))
+    encoder.reset()
+    row = encoder.encode(_snapshot(2))
+    assert row["kind"] == "keyframe"
+    assert row["keyframe_id"] == "snapshot-2"
@@ -0,0 +1,65 @@
+import pytest
+
+from collectors.litellm_collector.collector import RateWindow, parse_model_counters
+
+METRICS = """
+# HELP litellm_requests_metric_total Total requests
+# TYPE litellm_requests_metric_total counter
+litellm_requests_metric_total{model="gpt-4",user="a"} 10.0
+litellm_requests_metric_total{model="gpt-4",user="b"} 5.0
+litellm_proxy_total_requests_metric_total{model="claude",end_user=""} 7
+litellm_total_tokens_total{model="gpt-4"} 1500
+litellm_total_tokens_metric_total{model="claude"} 300
+litellm_requests_metric_total{user="no-model"} 99
+litellm_spend_metric_total{model="gpt-4"} 1.5
+process_cpu_seconds_total 12
+litellm_requests_metric_total{model="escaped \\"quote\\""} 1
+"""
+
+def test_parse_sums_counters_per_model():
+    counters = parse_model_counters(METRICS)
+    assert counters["gpt-4"] == (15.0, 1500.0)
+    assert counters["claude"] == (7.0, 300.0)
+    # Samples without a model label and other metrics are ignored
+    assert set(counters) == {"gpt-4", "claude", 'escaped \\"quote\\"'}
+
+def test_parse_empty_text():
+    assert parse_model_counters("") == {}
+
+def test_rate_needs_two_samples():
+    window = RateWindow(window_seconds=60, max_samples=10)
+    assert window.per_minute() == (0.0, 0.0)
+    window.add(0, 10, 100)
+    assert window.per_minute() == (0.0, 0.0)
+
+def test_rate_is_increase_over_window_per_minute():
+    window = RateWindow(window_seconds=60, max_samples=100)
+    for t in range(0, 31, 5):
+        window.add(t, t * 2, t * 20)
+    # 60 requests and 600 tokens over 30 seconds
+    assert window.per_minute() == (120.0, 1200.0)
+
+def test_samples_outside_the_window_are_dropped():
+    window = RateWindow(window_seconds=10, max_samples=100)
+    window.add(0, 0, 0)
+    window.add(5, 100, 100)
+    window.add(20, 110, 110)
+    window.add(25, 120, 120)
+    assert [s[0] for s in window.samples] == [20, 25]
+    assert window.per_minute() == (120.0, 120.0)
+
+def test_counter_reset_starts_a_fresh_window():
+    window = RateWindow(window_seconds=60, max_samples=100)
+    window.add(0, 500, 5000)
+    window.add(5, 510, 5100)
+    window.add(10, 3, 30)
+    assert list(window.samples) == [(10, 3, 30)]
+    window.add(20, 13, 130)
+    assert window.per_minute() == (60.0, 600.0)
+
+def test_max_samples_bounds_memory():
+    window = RateWindow(window_seconds=3600, max_samples=3)
+    for t in range(10):
+        window.add(t, t, t)
+    assert len(window.samples) == 3
+    assert window.per_minute() == pytest.approx((60.0, 60.0))
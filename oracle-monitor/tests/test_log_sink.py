@@ -0,0 +1,125 @@
+import pytest
+
+from collectors.storage.log_sink import BatchingLogSink, is_row_error
+
+class APIError(Exception):
+    """Shaped like postgrest's APIError: the SQLSTATE, PGRST code or HTTP status is in `code`."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+@pytest.mark.parametrize("error", [
+    APIError("23502"),     # not_null_violation
+    APIError("23505"),     # unique_violation
+    APIError("22P02"),     # invalid_text_representation
+    APIError("22001"),     # string_data_right_truncation
+    APIError("PGRST102"),  # invalid request body
+    TypeError("Object of type bytes is not JSON serializable"),
+    ValueError("Out of range float values are not JSON compliant"),
+])
+def test_row_errors(error):
+    assert is_row_error(error)
+
+@pytest.mark.parametrize("error", [
+    ConnectionError("connection reset"),
+    TimeoutError(),
+    APIError(None),
+    APIError("08006"),     # connection_failure
+    APIError("40P01"),     # deadlock_detected
+    APIError("53300"),     # too_many_connections
+    APIError("57014"),     # query_canceled (statement timeout)
+    APIError("42P01"),     # undefined_table: a deployment problem, not the rows'
+    APIError("PGRST003"),  # timed out acquiring a connection
+    APIError("PGRST204"),  # column missing from the schema cache
+    APIError("503"),
+    APIError("400"),
+])
+def test_everything_else_is_transient(error):
+    assert not is_row_error(error)
+
+class FakeTable:
+    """Rejects any batch holding a row whose message is in `bad`; fails everything while `down`."""
+
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.down = False
+        self.rows = []
+        self.commits = 0
+        self.calls = 0
+
+    def insert(self, rows):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("database unreachable")
+        if any(r["message"] in self.bad for r in rows):
+            raise APIError("23514")
+        self.rows.extend(rows)
+
+    def commit(self):
+        self.commits += 1
+
+def _sink(table, **kwargs):
+    dropped = []
+    sink = BatchingLogSink(table.insert, table.commit, dead_letter=lambda row, e: dropped.append(row["message"]),
+                           **kwargs)
+    return sink, dropped
+
+def _fill(sink, messages):
+    for message in messages:
+        sink.add({"message": message})
+
+def test_flush_inserts_and_commits():
+    table = FakeTable()
+    sink, _ = _sink(table)
+    _fill(sink, ["a", "b"])
+    assert sink.flush()
+    assert [r["message"] for r in table.rows] == ["a", "b"]
+    assert table.commits == 1
+    assert sink.buffer == []
+
+def test_bad_row_is_isolated_then_dropped_after_max_attempts():
+    table = FakeTable(bad={"bad"})
+    sink, dropped = _sink(table, max_attempts=2)
+    messages = [f"m{i}" for i in range(8)]
+    messages[5] = "bad"
+    _fill(sink, messages)
+
+    # The good rows are stored around the bad one, which stays buffered and nothing is committed
+    assert not sink.flush()
+    assert sorted(r["message"] for r in table.rows) == sorted(m for m in messages if m != "bad")
+    assert [r["message"] for r in sink.buffer] == ["bad"]
+    assert table.commits == 0
+
+    assert sink.flush()
+    assert dropped == ["bad"]
+    assert sink.dropped == 1
+    assert table.commits == 1
+
+def test_transient_failure_keeps_the_whole_batch_without_splitting():
+    table = FakeTable()
+    table.down = True
+    sink, dropped = _sink(table, max_attempts=1)
+    _fill(sink, ["a", "b", "c", "d"])
+    for _ in range(5):
+        assert not sink.flush()
+    assert table.calls == 5
+    assert len(sink.buffer) == 4
+    assert dropped == [] and table.commits == 0
+
+    table.down = False
+    assert sink.flush()
+    assert [r["message"] for r in table.rows] == ["a", "b", "c", "d"]
+    assert table.commits == 1
+
+def test_due_when_full_or_old():
+    sink, _ = _sink(FakeTable(), max_rows=2, max_latency_seconds=60)
+    assert sink.time_until_flush() is None
+    sink.add({"message": "a"})
+    assert not sink.due()
+    sink.add({"message": "b"})
+    assert sink.due() and sink.room() == 0
+
+    sink, _ = _sink(FakeTable(), max_rows=100, max_latency_seconds=0)
+    sink.add({"message": "a"})
+    assert sink.due()
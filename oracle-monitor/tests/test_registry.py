@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from api.models.agent import AgentRegistration
+from api.registry import AgentRegistry, SQLiteAgentRegistry
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_registry(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteAgentRegistry(str(tmp_path / "agents.db"), expire_interval_seconds=0, **kwargs)
+        return AgentRegistry(**kwargs)
+    return make
+
+def _agent(name, deployment="research-agent-deployment"):
+    return AgentRegistration(name=name, deployment_name=deployment)
+
+def _names(agents):
+    return sorted(a["name"] for a in agents)
+
+def test_changes_since_returns_only_newer_changes(make_registry):
+    registry = make_registry()
+    registry.upsert(_agent("a"))
+    registry.upsert(_agent("b"))
+    full = registry.changes_since(0)
+    assert full["full"] and _names(full["upserts"]) == ["a", "b"]
+
+    registry.upsert(_agent("c"))
+    registry.remove("a")
+    changes = registry.changes_since(full["version"], full["epoch"])
+    assert not changes["full"]
+    assert _names(changes["upserts"]) == ["c"]
+    assert changes["removed"] == ["a"]
+    assert changes["version"] == full["version"] + 2
+
+    assert registry.changes_since(changes["version"], changes["epoch"])["upserts"] == []
+
+def test_unchanged_upsert_keeps_the_version(make_registry):
+    registry = make_registry()
+    assert registry.upsert(_agent("a"))
+    version = registry.version
+    assert not registry.upsert(_agent("a"))
+    assert registry.version == version
+
+def test_foreign_epoch_or_future_version_gets_a_full_resync(make_registry):
+    registry = make_registry()
+    registry.upsert(_agent("a"))
+    assert registry.changes_since(1, "other-epoch")["full"]
+    assert registry.changes_since(registry.version + 5, registry.epoch)["full"]
+
+def test_dropped_tombstones_force_a_full_resync(make_registry):
+    registry = make_registry(max_tombstones=1)
+    for name in ("a", "b", "c"):
+        registry.upsert(_agent(name))
+    version = registry.version
+    registry.remove("a")
+    registry.remove("b")
+    changes = registry.changes_since(version, registry.epoch)
+    assert changes["full"]
+    assert _names(changes["upserts"]) == ["c"]
+
+def test_heartbeats_merge_fields_and_report_unknown_agents(make_registry):
+    registry = make_registry()
+    registry.upsert(_agent("a"))
+    version = registry.version
+    unknown = registry.heartbeat_many([
+        {"name": "a", "activity": {"active_task_ids": []}},
+        {"name": "ghost", "deployment_name": "x"},
+    ])
+    assert unknown == ["ghost"]
+    assert "ghost" not in registry
+    # Nothing changed for "a": a refreshed heartbeat, not a new version
+    assert registry.version == version
+
+    registry.heartbeat_many([{"name": "a", "deployment_name": "writer-agent-deployment"}])
+    assert registry.version == version + 1
+    assert _names(registry.by_deployment("writer-agent-deployment")) == ["a"]
+    assert registry.by_deployment("research-agent-deployment") == []
+
+def test_agents_expire_after_ttl(make_registry):
+    registry = make_registry(ttl_seconds=30)
+    now = time.time()
+    registry.upsert(_agent("old"), now=now - 20)
+    registry.upsert(_agent("beating"), now=now - 20)
+    registry.heartbeat_many([{"name": "beating"}], now=now - 5)
+
+    assert registry.expire(now=now + 15) == ["old"]
+    assert _names(registry.all()) == ["beating"]
+    assert "old" not in registry
+
+def test_expiry_is_reported_as_a_removal(make_registry):
+    registry = make_registry(ttl_seconds=30)
+    now = time.time()
+    registry.upsert(_agent("old"), now=now - 60)
+    version, epoch = registry.version, registry.epoch
+    registry.upsert(_agent("fresh"), now=now)
+    changes = registry.changes_since(version, epoch)
+    assert changes["removed"] == ["old"]
+    assert _names(changes["upserts"]) == ["fresh"]
+
+def test_without_ttl_agents_never_expire(make_registry):
+    registry = make_registry()
+    registry.upsert(_agent("a"), now=0)
+    assert registry.expire(now=time.time()) == []
+    assert "a" in registry
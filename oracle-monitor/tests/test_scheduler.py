@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+
+import pytest
+
+from collectors.aggregator.scheduler import CollectorScheduler
+from collectors.base.collector import Collector
+
+class FakeCollector(Collector):
+    interval_seconds = 8.0
+    min_interval_seconds = 2.0
+    max_interval_seconds = 12.0
+    deadline_seconds = 1.0
+
+    def collect(self):
+        return []
+
+def _finish(scheduler, name, value=None, error=None):
+    """Complete one collect() call for `name` as the pool would."""
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+    scheduler._done(name, future)
+
+@pytest.fixture
+def scheduler():
+    # Not started: calls are completed by hand
+    scheduler = CollectorScheduler({"queues": FakeCollector()})
+    yield scheduler
+    scheduler.shutdown()
+
+def test_first_result_keeps_the_base_interval(scheduler):
+    _finish(scheduler, "queues", [1])
+    assert scheduler.intervals() == {"queues": 8.0}
+
+def test_unchanged_output_backs_off_up_to_the_max(scheduler):
+    _finish(scheduler, "queues", [1])
+    _finish(scheduler, "queues", [1])
+    assert scheduler.intervals()["queues"] == 8.0 * CollectorScheduler.BACKOFF
+    for _ in range(10):
+        _finish(scheduler, "queues", [1])
+    assert scheduler.intervals()["queues"] == 12.0
+
+def test_changed_output_halves_down_to_the_min(scheduler):
+    _finish(scheduler, "queues", [0])
+    _finish(scheduler, "queues", [1])
+    assert scheduler.intervals()["queues"] == 4.0
+    for i in range(2, 6):
+        _finish(scheduler, "queues", [i])
+    assert scheduler.intervals()["queues"] == 2.0
+
+def test_failures_keep_the_interval_and_the_last_value(scheduler):
+    _finish(scheduler, "queues", [1])
+    _finish(scheduler, "queues", error=RuntimeError("broker down"))
+    assert scheduler.intervals()["queues"] == 8.0
+    values, stale = scheduler.latest()
+    assert values == {"queues": [1]}
+    assert stale == ["queues"]
+
+    _finish(scheduler, "queues", [1])
+    assert scheduler.latest() == ({"queues": [1]}, [])
+
+def test_fixed_intervals_without_adaptive():
+    scheduler = CollectorScheduler({"queues": FakeCollector()}, adaptive=False)
+    try:
+        for i in range(4):
+            _finish(scheduler, "queues", [i])
+        assert scheduler.intervals() == {"queues": 8.0}
+    finally:
+        scheduler.shutdown()
+
+def test_never_collected_sections_are_stale(scheduler):
+    assert scheduler.latest() == ({"queues": []}, ["queues"])
+
+def test_changes_wake_waiters(scheduler):
+    assert not scheduler.wait_for_change(0)
+    _finish(scheduler, "queues", [1])
+    assert scheduler.wait_for_change(0)
+    _finish(scheduler, "queues", [1])
+    assert not scheduler.wait_for_change(0)
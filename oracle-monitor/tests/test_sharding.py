@@ -0,0 +1,74 @@
+import pytest
+
+from collectors.base.sharding import HashRing
+from collectors.k8s_collector.sharded import merge_workloads
+
+TARGETS = [f"cluster-{c}/ns-{n}" for c in range(4) for n in range(50)]
+
+def test_owner_is_deterministic_and_ignores_member_order():
+    a = HashRing(["shard-0", "shard-1", "shard-2"])
+    b = HashRing(["shard-2", "shard-0", "shard-1", "shard-0"])
+    assert a.members == b.members == ["shard-0", "shard-1", "shard-2"]
+    assert all(a.owner(t) == b.owner(t) for t in TARGETS)
+
+def test_assign_covers_every_target_once():
+    assignment = HashRing(["shard-0", "shard-1", "shard-2"]).assign(TARGETS + TARGETS[:10])
+    assert set(assignment) == {"shard-0", "shard-1", "shard-2"}
+    owned = [t for targets in assignment.values() for t in targets]
+    assert sorted(owned) == sorted(TARGETS)
+    assert all(targets == sorted(targets) for targets in assignment.values())
+    # 64 virtual nodes spread 200 targets roughly evenly
+    assert all(len(targets) > 30 for targets in assignment.values())
+
+def test_adding_a_member_only_moves_targets_to_it():
+    before = HashRing(["shard-0", "shard-1", "shard-2"])
+    after = HashRing(["shard-0", "shard-1", "shard-2", "shard-3"])
+    moved = [t for t in TARGETS if before.owner(t) != after.owner(t)]
+    assert all(after.owner(t) == "shard-3" for t in moved)
+    assert 0 < len(moved) < len(TARGETS) / 2
+
+def test_member_owning_nothing_gets_an_empty_list():
+    assert HashRing(["a", "b"]).assign([]) == {"a": [], "b": []}
+
+def test_empty_ring_is_rejected():
+    with pytest.raises(ValueError):
+        HashRing([])
+
+def _row(collected_at, workload, failed=None):
+    row = {"collected_at": collected_at, "targets": sorted(workload), "workload": workload}
+    if failed is not None:
+        row["failed"] = failed
+    return row
+
+NOW = 1767225600.0  # 2026-01-01T00:00:00Z
+
+def test_merge_takes_each_target_from_its_freshest_row():
+    rows = [
+        _row("2025-12-31T23:59:50+00:00", {"a": [{"deployment_name": "old"}], "b": [{"deployment_name": "b"}]}),
+        _row("2025-12-31T23:59:55+00:00", {"a": [{"deployment_name": "new"}]}),
+    ]
+    merged, missing = merge_workloads(rows, ["a", "b"], 30, now=NOW)
+    assert merged == [{"deployment_name": "new"}, {"deployment_name": "b"}]
+    assert missing == []
+
+def test_merge_reports_old_and_uncovered_targets_as_missing():
+    rows = [_row("2025-12-31T23:58:00+00:00", {"a": [{"deployment_name": "a"}]})]
+    merged, missing = merge_workloads(rows, ["a", "b"], 30, now=NOW)
+    # Old data is still served, but flagged
+    assert merged == [{"deployment_name": "a"}]
+    assert missing == ["a", "b"]
+
+def test_merge_prefers_a_row_that_collected_the_target_over_a_newer_failure():
+    rows = [
+        _row("2025-12-31T23:59:58+00:00", {"a": [], "b": [{"deployment_name": "b-new"}]}, failed=["a"]),
+        _row("2025-12-31T23:59:50+00:00", {"a": [{"deployment_name": "a-prev-owner"}]}),
+    ]
+    merged, missing = merge_workloads(rows, ["a", "b"], 30, now=NOW)
+    assert merged == [{"deployment_name": "a-prev-owner"}, {"deployment_name": "b-new"}]
+    assert missing == []
+
+def test_merge_marks_a_target_missing_when_only_a_failed_row_covers_it():
+    rows = [_row("2025-12-31T23:59:58+00:00", {"a": [{"deployment_name": "a-last"}]}, failed=["a"])]
+    merged, missing = merge_workloads(rows, ["a"], 30, now=NOW)
+    assert merged == [{"deployment_name": "a-last"}]
+    assert missing == ["a"]